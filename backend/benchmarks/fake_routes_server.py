@@ -0,0 +1,121 @@
+"""Local stand-in for the Google Routes computeRoutes endpoint.
+
+Usage:
+    python benchmarks/fake_routes_server.py --port 9100 --latency-ms 80 --alternatives 3 --steps 200
+
+Upstream trouble can be simulated with --error-rate (share of requests
+answered with HTTP 503) and --slow-rate/--slow-ms (share of requests that
+take --slow-ms instead of --latency-ms).
+
+Point the backend at it with
+GOOGLE_ROUTES_API_URL=http://127.0.0.1:9100/directions/v2:computeRoutes.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI, Request, Response
+from services import polyline
+
+
+def build_route(origin, destination, steps: int, rnd: random.Random) -> dict:
+    lat, lng = origin
+    d_lat = (destination[0] - origin[0]) / steps
+    d_lng = (destination[1] - origin[1]) / steps
+    points = [(lat, lng)]
+    route_steps = []
+    total = 0
+    for i in range(steps):
+        next_lat = origin[0] + d_lat * (i + 1) + rnd.uniform(-0.0005, 0.0005)
+        next_lng = origin[1] + d_lng * (i + 1) + rnd.uniform(-0.0005, 0.0005)
+        distance = rnd.randint(20, 400)
+        total += distance
+        route_steps.append({
+            "distanceMeters": distance,
+            "startLocation": {"latLng": {"latitude": lat, "longitude": lng}},
+            "endLocation": {"latLng": {"latitude": next_lat, "longitude": next_lng}}
+        })
+        lat, lng = next_lat, next_lng
+        points.append((lat, lng))
+
+    return {
+        "legs": [{
+            "steps": route_steps,
+            "localizedValues": {
+                "distance": {"text": f"{total / 1000:.1f} km"},
+                "duration": {"text": f"{max(1, total // 700)} mins"}
+            }
+        }],
+        "polyline": {"encodedPolyline": polyline.encode(points)}
+    }
+
+
+def create_app(
+    latency_ms: float,
+    alternatives: int,
+    steps: int,
+    error_rate: float = 0.0,
+    slow_rate: float = 0.0,
+    slow_ms: float = 0.0
+) -> FastAPI:
+    app = FastAPI(title="Fake Routes API")
+    app.state.requests = 0
+    app.state.errors = 0
+    faults = random.Random()
+
+    @app.post("/directions/v2:computeRoutes")
+    async def compute_routes(request: Request):
+        body = await request.json()
+        origin = body["origin"]["location"]["latLng"]
+        destination = body["destination"]["location"]["latLng"]
+        origin = (origin["latitude"], origin["longitude"])
+        destination = (destination["latitude"], destination["longitude"])
+
+        app.state.requests += 1
+        delay_ms = slow_ms if faults.random() < slow_rate else latency_ms
+        if delay_ms:
+            await asyncio.sleep(delay_ms / 1000)
+        if faults.random() < error_rate:
+            app.state.errors += 1
+            return Response(content=b'{"error": {"code": 503}}', status_code=503, media_type="application/json")
+
+        # Deterministic per origin/destination so repeated trips get identical answers.
+        rnd = random.Random(hash((origin, destination)))
+        routes = [build_route(origin, destination, steps, rnd) for _ in range(alternatives)]
+        return Response(content=json.dumps({"routes": routes}), media_type="application/json")
+
+    @app.get("/stats")
+    async def stats():
+        return {"requests": app.state.requests, "errors": app.state.errors}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--alternatives", type=int, default=3)
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-ms", type=float, default=2000.0)
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run(
+        create_app(args.latency_ms, args.alternatives, args.steps, args.error_rate, args.slow_rate, args.slow_ms),
+        host=args.host,
+        port=args.port,
+        log_level="warning"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,391 @@
+"""End-to-end load test for the backend against the local fake Routes API.
+
+Starts benchmarks/fake_routes_server.py and the FastAPI app (uvicorn main:app)
+on a scratch SQLite database. Creates test users, then drives a fixed request
+rate across the route, history, login and signup endpoints and reports
+latency percentiles, throughput and per-worker CPU/RSS.
+
+    python benchmarks/load_test.py --rps 50 --duration 30 --workers 2
+    python benchmarks/load_test.py --update-baseline      # record benchmarks/baseline.json
+    python benchmarks/load_test.py --baseline benchmarks/baseline.json   # exit 1 on regression
+
+Latency is measured from each request's scheduled start, so time spent
+waiting for a free concurrency slot is included (no coordinated omission).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+ENDPOINTS = ("route", "history", "login", "signup")
+PASSWORD = "bench-password"
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, weight = part.split("=")
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint in mix: {name}")
+        weights[name] = float(weight)
+    return weights
+
+
+class ProcessSampler:
+    """Samples CPU time and RSS of the uvicorn worker processes from /proc.
+
+    With a single worker uvicorn serves from the parent process; with several,
+    workers are the parent's ``spawn_main`` children (the password pool's
+    forkserver and the resource tracker are skipped).
+    """
+
+    def __init__(self, parent_pid: int, multi_worker: bool):
+        self.parent_pid = parent_pid
+        self.multi_worker = multi_worker
+        self.ticks = os.sysconf("SC_CLK_TCK")
+        self.cpu_start: Dict[int, float] = {}
+        self.cpu_end: Dict[int, float] = {}
+        self.max_rss_mb: Dict[int, float] = {}
+
+    def workers(self) -> List[int]:
+        if not self.multi_worker:
+            return [self.parent_pid]
+
+        children = []
+        for entry in Path("/proc").iterdir():
+            if entry.name.isdigit():
+                try:
+                    fields = (entry / "stat").read_text().rsplit(")", 1)[1].split()
+                    cmdline = (entry / "cmdline").read_bytes()
+                except OSError:
+                    continue
+                if int(fields[1]) == self.parent_pid and b"spawn_main" in cmdline:
+                    children.append(int(entry.name))
+        return children
+
+    def cpu_seconds(self, pid: int) -> Optional[float]:
+        try:
+            fields = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+        except OSError:
+            return None
+        return (int(fields[11]) + int(fields[12])) / self.ticks
+
+    @staticmethod
+    def rss_mb(pid: int) -> Optional[float]:
+        try:
+            for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+        except OSError:
+            return None
+        return None
+
+    def sample(self, final: bool = False) -> None:
+        for pid in self.workers():
+            cpu = self.cpu_seconds(pid)
+            if cpu is None:
+                continue
+            self.cpu_start.setdefault(pid, cpu)
+            if final:
+                self.cpu_end[pid] = cpu
+            rss = self.rss_mb(pid)
+            if rss is not None:
+                self.max_rss_mb[pid] = max(self.max_rss_mb.get(pid, 0.0), rss)
+
+    def report(self, elapsed: float) -> Dict[str, dict]:
+        return {
+            str(pid): {
+                "cpu_percent": round((self.cpu_end.get(pid, start) - start) / elapsed * 100, 1),
+                "max_rss_mb": round(self.max_rss_mb.get(pid, 0.0), 1)
+            }
+            for pid, start in self.cpu_start.items()
+        }
+
+
+class LoadGenerator:
+    def __init__(self, client: httpx.AsyncClient, users: List[dict], args):
+        self.client = client
+        self.users = users
+        self.args = args
+        self.rnd = random.Random(args.seed)
+        self.trips = [
+            (52.40 + self.rnd.uniform(0, 0.2), 13.20 + self.rnd.uniform(0, 0.3),
+             52.40 + self.rnd.uniform(0, 0.2), 13.20 + self.rnd.uniform(0, 0.3))
+            for _ in range(args.unique_trips)
+        ]
+        self.latencies: Dict[str, List[float]] = {name: [] for name in ENDPOINTS}
+        self.errors: Dict[str, int] = {name: 0 for name in ENDPOINTS}
+
+    async def call(self, name: str) -> httpx.Response:
+        user = self.rnd.choice(self.users)
+        if name == "route":
+            start_lat, start_lng, end_lat, end_lng = self.rnd.choice(self.trips)
+            return await self.client.post("/maps/calculate-route", headers=user["headers"], json={
+                "start_lat": start_lat, "start_lng": start_lng, "end_lat": end_lat, "end_lng": end_lng,
+                "optimization_criteria": "fastest", "mode": "driving"
+            })
+        if name == "history":
+            return await self.client.get(f"/users/{user['id']}/routes", headers=user["headers"])
+        if name == "login":
+            return await self.client.post("/auth/login", json={"email": user["email"], "password": PASSWORD})
+        return await self.client.post("/auth/signup", json={
+            "email": f"bench-{uuid.uuid4().hex[:12]}@example.com", "password": PASSWORD, "name": "Bench"
+        })
+
+    async def run(self, rps: float, duration: float, record: bool) -> float:
+        mix = parse_mix(self.args.mix)
+        names, weights = list(mix), list(mix.values())
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        tasks = []
+
+        async def one(name: str, scheduled: float):
+            async with semaphore:
+                try:
+                    response = await self.call(name)
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+            if record:
+                self.latencies[name].append((loop.time() - scheduled) * 1000)
+                if not ok:
+                    self.errors[name] += 1
+
+        count = int(rps * duration)
+        for i in range(count):
+            scheduled = started + i / rps
+            delay = scheduled - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(self.rnd.choices(names, weights)[0], scheduled)))
+
+        await asyncio.gather(*tasks)
+        return loop.time() - started
+
+    def report(self, elapsed: float) -> Dict[str, dict]:
+        endpoints = {}
+        for name in ENDPOINTS:
+            values = self.latencies[name]
+            if not values:
+                continue
+            endpoints[name] = {
+                "requests": len(values),
+                "errors": self.errors[name],
+                "throughput_rps": round(len(values) / elapsed, 2),
+                "p50_ms": round(percentile(values, 50), 2),
+                "p95_ms": round(percentile(values, 95), 2),
+                "p99_ms": round(percentile(values, 99), 2)
+            }
+        return endpoints
+
+
+def wait_for(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+def start_servers(args, workdir: str):
+    output = None if args.verbose else subprocess.DEVNULL
+    fake_url = f"http://127.0.0.1:{args.fake_port}"
+    fake = subprocess.Popen([
+        sys.executable, str(BACKEND_DIR / "benchmarks" / "fake_routes_server.py"),
+        "--port", str(args.fake_port),
+        "--latency-ms", str(args.upstream_latency_ms),
+        "--alternatives", str(args.alternatives),
+        "--steps", str(args.steps)
+    ], cwd=BACKEND_DIR, stdout=output, stderr=output)
+
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{Path(workdir) / 'bench.db'}",
+        "PERSISTENT_ROUTE_CACHE_PATH": str(Path(workdir) / "route_cache.db"),
+        "AUTH_TOKEN_SECRET_PATH": str(Path(workdir) / "token_secret"),
+        "GOOGLE_MAPS_API_KEY": "benchmark",
+        "GOOGLE_ROUTES_API_URL": f"{fake_url}/directions/v2:computeRoutes",
+        "UPSTREAM_HTTP2": "false"
+    })
+    if args.bcrypt_rounds:
+        env["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    # Create the schema up front so several workers don't race to create it on import.
+    subprocess.run([sys.executable, str(BACKEND_DIR / "scripts" / "init_database.py")],
+                   cwd=BACKEND_DIR, env=env, stdout=output, check=True)
+    app = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", "127.0.0.1", "--port", str(args.app_port),
+        "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"
+    ], cwd=BACKEND_DIR, env=env, stdout=output, stderr=output)
+
+    wait_for(f"{fake_url}/stats")
+    wait_for(f"http://127.0.0.1:{args.app_port}/health")
+    return fake, app
+
+
+def stop(process: subprocess.Popen) -> None:
+    if process.poll() is None:
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def compare(result: dict, baseline: dict, max_regression: float) -> List[str]:
+    failures = []
+    if baseline.get("config") != result["config"]:
+        failures.append(f"run config {result['config']} does not match baseline config {baseline.get('config')}")
+    for name, current in result["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if not previous:
+            continue
+        for metric in ("p95_ms", "p99_ms"):
+            if previous[metric] and current[metric] > previous[metric] * (1 + max_regression):
+                failures.append(f"{name} {metric}: {current[metric]} > baseline {previous[metric]}")
+        if previous["throughput_rps"] and current["throughput_rps"] < previous["throughput_rps"] * (1 - max_regression):
+            failures.append(f"{name} throughput_rps: {current['throughput_rps']} < baseline {previous['throughput_rps']}")
+        if current["errors"] > previous["errors"]:
+            failures.append(f"{name} errors: {current['errors']} > baseline {previous['errors']}")
+    return failures
+
+
+def print_report(result: dict) -> None:
+    print(f"\n{'endpoint':<10}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in result["endpoints"].items():
+        print(f"{name:<10}{stats['requests']:>10}{stats['errors']:>8}{stats['throughput_rps']:>10}"
+              f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+    print(f"\ntotal throughput: {result['throughput_rps']} req/s over {result['elapsed_s']} s")
+    for pid, stats in result["workers"].items():
+        print(f"worker {pid}: cpu {stats['cpu_percent']}%  max rss {stats['max_rss_mb']} MB")
+
+
+async def drive(args, app_pid: Optional[int]) -> dict:
+    sampler = ProcessSampler(app_pid, args.workers > 1) if app_pid else None
+    async with httpx.AsyncClient(base_url=args.app_url, timeout=60.0,
+                                 limits=httpx.Limits(max_connections=args.concurrency)) as client:
+        users = []
+        for _ in range(args.users):
+            response = await client.post("/auth/signup", json={
+                "email": f"bench-{uuid.uuid4().hex[:12]}@example.com", "password": PASSWORD, "name": "Bench"
+            })
+            response.raise_for_status()
+            data = response.json()
+            users.append({**data["user"], "headers": {"Authorization": f"Bearer {data['access_token']}"}})
+
+        generator = LoadGenerator(client, users, args)
+        if args.warmup:
+            await generator.run(args.rps, args.warmup, record=False)
+
+        sampling = True
+
+        async def sample_loop():
+            while sampling:
+                sampler.sample()
+                await asyncio.sleep(0.5)
+
+        sample_task = asyncio.create_task(sample_loop()) if sampler else None
+        elapsed = await generator.run(args.rps, args.duration, record=True)
+        sampling = False
+        if sample_task:
+            await sample_task
+            sampler.sample(final=True)
+
+    endpoints = generator.report(elapsed)
+    return {
+        "config": {
+            "rps": args.rps, "duration": args.duration, "concurrency": args.concurrency, "workers": args.workers,
+            "mix": args.mix, "upstream_latency_ms": args.upstream_latency_ms,
+            "alternatives": args.alternatives, "steps": args.steps, "bcrypt_rounds": args.bcrypt_rounds
+        },
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(sum(e["requests"] for e in endpoints.values()) / elapsed, 2),
+        "endpoints": endpoints,
+        "workers": sampler.report(elapsed) if sampler else {}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rps", type=float, default=50)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--unique-trips", type=int, default=200)
+    parser.add_argument("--mix", default="route=70,history=20,login=5,signup=5")
+    parser.add_argument("--upstream-latency-ms", type=float, default=80)
+    parser.add_argument("--alternatives", type=int, default=3)
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--bcrypt-rounds", type=int, default=None)
+    parser.add_argument("--app-port", type=int, default=8765)
+    parser.add_argument("--fake-port", type=int, default=9100)
+    parser.add_argument("--app-url", default=None, help="Drive an already running app instead of starting one")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true", help="Show server logs")
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    parser.add_argument("--baseline", default=None, help="Fail if results regress against this report")
+    parser.add_argument("--max-regression", type=float, default=0.25)
+    parser.add_argument("--update-baseline", action="store_true", help=f"Write results to {DEFAULT_BASELINE}")
+    args = parser.parse_args()
+
+    processes = []
+    app_pid = None
+    with tempfile.TemporaryDirectory(prefix="mapapp-bench-") as workdir:
+        try:
+            if args.app_url is None:
+                fake, app = start_servers(args, workdir)
+                processes = [app, fake]
+                app_pid = app.pid
+                args.app_url = f"http://127.0.0.1:{args.app_port}"
+            result = asyncio.run(drive(args, app_pid))
+        finally:
+            for process in processes:
+                stop(process)
+
+    print_report(result)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2))
+    if args.update_baseline:
+        DEFAULT_BASELINE.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"\nBaseline written to {DEFAULT_BASELINE}")
+    if args.baseline:
+        failures = compare(result, json.loads(Path(args.baseline).read_text()), args.max_regression)
+        if failures:
+            print("\nPerformance regressions:")
+            for failure in failures:
+                print(f"  {failure}")
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Per-response serialization cost of the route and history endpoints.
+
+Compares FastAPI's default path (validate the returned value against
+response_model, jsonable_encoder, stdlib json) with the fast path the
+routers use (model_construct without validation, serialized by
+pydantic-core or orjson).
+
+    python benchmarks/serialization_bench.py --history-rows 500 --alternatives 2 --repeat 200
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import Row
+from sqlalchemy.engine.result import SimpleResultMetaData
+
+from schemas.route_schemas import AlternativeRoute, RouteHistoryResponse, RouteResponse
+from services import polyline
+from services.user_service import ROUTE_HISTORY_LIST_COLUMNS, UserService
+
+
+def sample_polyline(points: int) -> str:
+    return polyline.encode([(12.9 + i * 0.0007, 77.5 + i * 0.0004) for i in range(points)])
+
+
+def history_rows(count: int) -> List[Row]:
+    keys = [column.key for column in ROUTE_HISTORY_LIST_COLUMNS]
+    metadata = SimpleResultMetaData(keys)
+    created_at = datetime(2026, 1, 1)
+    rows = []
+    for i in range(count):
+        values = (
+            i, 12.97, 77.59, 13.01, 77.65, "12.3 km", "25 mins", "fastest", "Type A", 5, 3, 180, 12.3,
+            created_at + timedelta(minutes=i)
+        )
+        rows.append(Row(metadata, None, metadata._key_to_index, values))
+    return rows
+
+
+def route_payload(alternatives: int, points: int) -> dict:
+    encoded = sample_polyline(points)
+    other_routes = [
+        {
+            "route_index": i + 1, "polyline": encoded, "num_nodes": points, "bonus_type": "Type B",
+            "bonus_value": 10, "total_distance_meters": 13400, "total_distance_km": 13.4,
+            "is_feasible": True, "max_round_trips": 4, "distance": "13.4 km", "duration": "28 mins"
+        }
+        for i in range(alternatives)
+    ]
+    return {
+        "status": "success", "polyline": encoded, "distance": "12.3 km", "duration": "25 mins",
+        "optimization_used": "fastest", "route_id": 42, "bonus_type": "Type A", "bonus_value": 5,
+        "max_round_trips": 4, "num_nodes": points, "total_distance_km": 12.3,
+        "message": "Optimal route selected", "other_routes": other_routes
+    }
+
+
+def default_path(field, content) -> bytes:
+    """What FastAPI does for a response_model route returning ``content``."""
+    serialized = asyncio.run(serialize_response(field=field, response_content=content))
+    return JSONResponse(serialized).body
+
+
+def timed(fn: Callable[[], bytes], repeat: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history-rows", type=int, default=500)
+    parser.add_argument("--alternatives", type=int, default=2)
+    parser.add_argument("--points", type=int, default=300, help="Points per polyline")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = history_rows(args.history_rows)
+    history_field = create_response_field(name="history", type_=List[RouteHistoryResponse])
+    payload = route_payload(args.alternatives, args.points)
+    route_field = create_response_field(name="route", type_=RouteResponse)
+
+    cases = [
+        (f"history ({args.history_rows} rows)", lambda: default_path(history_field, rows),
+         lambda: ORJSONResponse(UserService.history_payload(rows)).body),
+        (f"route ({args.alternatives} alternatives)", lambda: default_path(route_field, RouteResponse(**payload)),
+         lambda: RouteResponse.model_construct(
+             **{**payload, "other_routes": [AlternativeRoute.model_construct(**r) for r in payload["other_routes"]]}
+         ).model_dump_json().encode()),
+    ]
+
+    print(f"{'response':<28}{'default ms':>12}{'fast ms':>12}{'speedup':>10}")
+    for name, default, fast in cases:
+        before = timed(default, args.repeat)
+        after = timed(fast, args.repeat)
+        print(f"{name:<28}{before:>12.3f}{after:>12.3f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
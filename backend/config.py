@@ -14,5 +14,144 @@ class Config:
 
             
         self.GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
+        self.GOOGLE_ROUTES_API_URL = os.getenv(
+            "GOOGLE_ROUTES_API_URL", "https://routes.googleapis.com/directions/v2:computeRoutes"
+        )
+        # Comma separated computeRoutes response fields requested on top of the ones MapService reads
+        self.ROUTES_EXTRA_FIELDS = [
+            field.strip() for field in os.getenv("ROUTES_EXTRA_FIELDS", "").split(",") if field.strip()
+        ]
+
+        # Routing backend: "google", "local" (offline road graph) or "auto" (local when it covers the trip)
+        self.ROUTING_BACKEND = os.getenv("ROUTING_BACKEND", "google").lower()
+        self.LOCAL_GRAPH_PATH = os.getenv("LOCAL_GRAPH_PATH", "")
+        self.LOCAL_DEFAULT_SPEED_KMH = float(os.getenv("LOCAL_DEFAULT_SPEED_KMH", "50"))
+        self.LOCAL_NUM_LANDMARKS = int(os.getenv("LOCAL_NUM_LANDMARKS", "8"))
+        self.LOCAL_MAX_SNAP_METERS = float(os.getenv("LOCAL_MAX_SNAP_METERS", "500"))
+        self.LOCAL_ALTERNATIVES = int(os.getenv("LOCAL_ALTERNATIVES", "3"))
+
+        # SQLite connection pragmas
+        self.SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+        self.SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+        self.SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+        # Negative values are KiB, positive values are pages
+        self.SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-16000"))
+
+        # Password hashing (bcrypt runs in a dedicated process pool)
+        self.BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+        self.PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+        self.PASSWORD_POOL_MAX_QUEUE = int(os.getenv("PASSWORD_POOL_MAX_QUEUE", "64"))
+
+        # Signed access tokens issued on login/signup. Every worker must share the secret: without
+        # AUTH_TOKEN_SECRET a random one is generated once into AUTH_TOKEN_SECRET_PATH
+        self.AUTH_TOKEN_SECRET = os.getenv("AUTH_TOKEN_SECRET", "")
+        self.AUTH_TOKEN_SECRET_PATH = (
+            os.getenv("AUTH_TOKEN_SECRET_PATH") or str(self.BACKEND_DIR / "data" / "token_secret")
+        )
+        self.AUTH_TOKEN_TTL_SECONDS = int(os.getenv("AUTH_TOKEN_TTL_SECONDS", "86400"))
+        # Accept a bare x-user-id header from clients that do not send a bearer token yet
+        self.AUTH_ALLOW_USER_ID_HEADER = os.getenv("AUTH_ALLOW_USER_ID_HEADER", "false").lower() == "true"
+        # In-process cache of user profiles for endpoints that need the user row
+        self.USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+        self.USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "300"))
+
+        # Tolerance in metres used to simplify polylines before they are stored (0 keeps full geometry)
+        self.POLYLINE_STORAGE_TOLERANCE_M = float(os.getenv("POLYLINE_STORAGE_TOLERANCE_M", "1.0"))
+
+        # Batch route calculation
+        self.BATCH_MAX_ROUTES = int(os.getenv("BATCH_MAX_ROUTES", "500"))
+        self.BATCH_UPSTREAM_CONCURRENCY = int(os.getenv("BATCH_UPSTREAM_CONCURRENCY", "16"))
+
+        # Vehicle profiles accepted by one feasibility sweep
+        self.FEASIBILITY_MAX_VEHICLES = int(os.getenv("FEASIBILITY_MAX_VEHICLES", "5000"))
+
+        # Route history pagination
+        self.ROUTE_HISTORY_PAGE_SIZE = int(os.getenv("ROUTE_HISTORY_PAGE_SIZE", "50"))
+        self.ROUTE_HISTORY_MAX_PAGE_SIZE = int(os.getenv("ROUTE_HISTORY_MAX_PAGE_SIZE", "500"))
+
+        # Shared upstream HTTP client (connection pool + per-phase timeouts)
+        self.UPSTREAM_HTTP2 = os.getenv("UPSTREAM_HTTP2", "true").lower() == "true"
+        self.UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "100"))
+        self.UPSTREAM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+        self.UPSTREAM_KEEPALIVE_EXPIRY = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "30"))
+        self.UPSTREAM_CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "5"))
+        self.UPSTREAM_READ_TIMEOUT = float(os.getenv("UPSTREAM_READ_TIMEOUT", "30"))
+        self.UPSTREAM_WRITE_TIMEOUT = float(os.getenv("UPSTREAM_WRITE_TIMEOUT", "10"))
+        self.UPSTREAM_POOL_TIMEOUT = float(os.getenv("UPSTREAM_POOL_TIMEOUT", "5"))
+
+        # Admission control for route calculations (per worker): requests beyond ADMISSION_MAX_CONCURRENCY
+        # wait up to ADMISSION_QUEUE_TIMEOUT_MS in a per-user fair queue; a full queue answers 429 at once
+        self.ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+        self.ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "32"))
+        self.ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+        self.ADMISSION_MAX_QUEUE_PER_USER = int(os.getenv("ADMISSION_MAX_QUEUE_PER_USER", "8"))
+        self.ADMISSION_QUEUE_TIMEOUT_MS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", "2000"))
+        # Comma separated user_id:weight pairs; a user with weight 2 gets twice the share of a queue
+        # contended by others (users not listed have weight 1)
+        self.ADMISSION_USER_WEIGHTS = {
+            user_id.strip(): float(weight)
+            for user_id, weight in (
+                pair.split(":", 1) for pair in os.getenv("ADMISSION_USER_WEIGHTS", "").split(",") if pair.strip()
+            )
+        }
+
+        # Upstream resilience: total time per routing call (all attempts), a duplicate request once an
+        # attempt is slower than the observed latency percentile, bounded retries on transport errors and
+        # retryable statuses, and a circuit breaker that fails fast after consecutive failures
+        self.UPSTREAM_DEADLINE_SECONDS = float(os.getenv("UPSTREAM_DEADLINE_SECONDS", "10"))
+        self.UPSTREAM_HEDGE_ENABLED = os.getenv("UPSTREAM_HEDGE_ENABLED", "true").lower() == "true"
+        self.UPSTREAM_HEDGE_PERCENTILE = float(os.getenv("UPSTREAM_HEDGE_PERCENTILE", "95"))
+        # Hedge delay until enough latencies are observed, and the floor afterwards
+        self.UPSTREAM_HEDGE_INITIAL_DELAY_MS = float(os.getenv("UPSTREAM_HEDGE_INITIAL_DELAY_MS", "1000"))
+        self.UPSTREAM_HEDGE_MIN_DELAY_MS = float(os.getenv("UPSTREAM_HEDGE_MIN_DELAY_MS", "50"))
+        self.UPSTREAM_MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", "2"))
+        self.UPSTREAM_RETRY_BACKOFF_MS = float(os.getenv("UPSTREAM_RETRY_BACKOFF_MS", "100"))
+        # Retries allowed per upstream call on average, with a reserve for bursts
+        self.UPSTREAM_RETRY_BUDGET_RATIO = float(os.getenv("UPSTREAM_RETRY_BUDGET_RATIO", "0.2"))
+        self.UPSTREAM_RETRY_BUDGET_RESERVE = float(os.getenv("UPSTREAM_RETRY_BUDGET_RESERVE", "10"))
+        self.UPSTREAM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("UPSTREAM_BREAKER_FAILURE_THRESHOLD", "5"))
+        self.UPSTREAM_BREAKER_RESET_SECONDS = float(os.getenv("UPSTREAM_BREAKER_RESET_SECONDS", "30"))
+        # When the upstream fails, serve a saved route near the request's endpoints up to this old
+        self.UPSTREAM_STALE_FALLBACK_ENABLED = os.getenv("UPSTREAM_STALE_FALLBACK_ENABLED", "true").lower() == "true"
+        self.UPSTREAM_STALE_MAX_AGE_SECONDS = float(os.getenv("UPSTREAM_STALE_MAX_AGE_SECONDS", "604800"))
+
+        # Prometheus-text metrics on /metrics
+        self.METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+        # Opt-in per-request profiling: requests carrying PROFILING_HEADER or picked at
+        # PROFILING_SAMPLE_RATE get their stacks sampled into PROFILING_DIR. Only the users
+        # in PROFILING_USER_IDS (comma-separated) may trigger profiles with the header
+        # and read them from /profiles; nobody when empty
+        self.PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+        self.PROFILING_HEADER = os.getenv("PROFILING_HEADER", "X-Profile")
+        self.PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+        self.PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "5"))
+        self.PROFILING_DIR = os.getenv("PROFILING_DIR") or str(self.BACKEND_DIR / "data" / "profiles")
+        self.PROFILING_MAX_PROFILES = int(os.getenv("PROFILING_MAX_PROFILES", "200"))
+        self.PROFILING_USER_IDS = {
+            int(user_id) for user_id in os.getenv("PROFILING_USER_IDS", "").split(",") if user_id.strip()
+        }
+
+        # In-process route result cache
+        self.ROUTE_CACHE_ENABLED = os.getenv("ROUTE_CACHE_ENABLED", "true").lower() == "true"
+        self.ROUTE_CACHE_MAX_ENTRIES = int(os.getenv("ROUTE_CACHE_MAX_ENTRIES", "1024"))
+        self.ROUTE_CACHE_TTL_SECONDS = float(os.getenv("ROUTE_CACHE_TTL_SECONDS", "600"))
+        # Decimal places kept from each coordinate when building the cache key (4 ~= 11 m)
+        self.ROUTE_CACHE_PRECISION = int(os.getenv("ROUTE_CACHE_PRECISION", "4"))
+
+        # Disk-backed route cache shared by all workers and kept across restarts (second level
+        # behind the in-process cache)
+        self.PERSISTENT_ROUTE_CACHE_ENABLED = os.getenv("PERSISTENT_ROUTE_CACHE_ENABLED", "true").lower() == "true"
+        self.PERSISTENT_ROUTE_CACHE_PATH = (
+            os.getenv("PERSISTENT_ROUTE_CACHE_PATH") or str(self.BACKEND_DIR / "data" / "route_cache.db")
+        )
+        self.PERSISTENT_ROUTE_CACHE_MAX_ENTRIES = int(os.getenv("PERSISTENT_ROUTE_CACHE_MAX_ENTRIES", "100000"))
+        self.PERSISTENT_ROUTE_CACHE_TTL_SECONDS = float(os.getenv("PERSISTENT_ROUTE_CACHE_TTL_SECONDS", "86400"))
+
+        # Reuse a route saved in the last NEARBY_ROUTE_MAX_AGE_SECONDS whose start and end are both
+        # within NEARBY_ROUTE_RADIUS_M of the request's, instead of calling the routing backend
+        self.NEARBY_ROUTE_REUSE_ENABLED = os.getenv("NEARBY_ROUTE_REUSE_ENABLED", "true").lower() == "true"
+        self.NEARBY_ROUTE_RADIUS_M = float(os.getenv("NEARBY_ROUTE_RADIUS_M", "50"))
+        self.NEARBY_ROUTE_MAX_AGE_SECONDS = float(os.getenv("NEARBY_ROUTE_MAX_AGE_SECONDS", "3600"))
         
 config = Config()
@@ -1,12 +1,28 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
 import os
 from dotenv import load_dotenv
 from logging.config import dictConfig
 import logging
 
-from models.base import create_tables
-from routers import auth_router, map_router, user_router
+from models.base import create_tables, dispose_engines
+from routers import auth_router, map_router, user_router, profile_router
+from services.upstream_client import upstream_client
+from services.routing_backend import get_routing_backend
+from services.route_cache import route_cache
+from services.persistent_route_cache import persistent_route_cache
+from services.map_service import route_calculations
+from services.upstream_resilience import google_routes_upstream
+from services.admission import route_admission
+from services.user_service import user_profile_cache
+from services.access_tokens import AccessTokens
+from services.password_hasher import password_hasher
+from services.auth_service import login_stats
+from services.metrics import registry, MetricsMiddleware
+from services.profiler import ProfilingMiddleware
+from config import config
 
 load_dotenv()
 
@@ -37,10 +53,30 @@ logging_config = {
 
 dictConfig(logging_config)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await upstream_client.start()
+    password_hasher.start()
+    persistent_route_cache.start()
+    await get_routing_backend().start()
+    # Load (or generate) the token signing secret before serving, not on the first login.
+    AccessTokens.secret()
+    try:
+        yield
+    finally:
+        await upstream_client.close()
+        await password_hasher.close()
+        await persistent_route_cache.close()
+        await dispose_engines()
+
+
 app = FastAPI(
     title="Map Route API with Authentication",
     description="Backend API for the authenticated map routing application with charging point bonuses",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 create_tables()
@@ -57,11 +93,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Profile-Id"],
 )
 
 app.include_router(auth_router.router)
 app.include_router(map_router.router)
 app.include_router(user_router.router)
+app.include_router(profile_router.router)
+
+if config.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+if config.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, router=app.router)
+
+registry.register_stats("upstream", upstream_client.stats)
+registry.register_stats("upstream_resilience", google_routes_upstream.stats)
+registry.register_stats("route_cache", route_cache.stats)
+registry.register_stats("user_profile_cache", user_profile_cache.stats)
+registry.register_stats("persistent_route_cache", persistent_route_cache.stats)
+registry.register_stats("route_calculations", route_calculations.stats)
+registry.register_stats("admission", route_admission.stats)
+registry.register_stats("password_pool", password_hasher.stats)
+registry.register_stats("login", login_stats.stats)
 
 
 @app.get("/health")
@@ -70,6 +123,30 @@ async def health_check():
     return {"status": "healthy", "version": "2.0.0"}
 
 
+@app.get("/health/stats")
+async def health_stats():
+    """Runtime resource usage stats."""
+    return {
+        "upstream": upstream_client.stats(),
+        "upstream_resilience": google_routes_upstream.stats(),
+        "route_cache": route_cache.stats(),
+        "user_profile_cache": user_profile_cache.stats(),
+        "persistent_route_cache": persistent_route_cache.stats(),
+        "route_calculations": route_calculations.stats(),
+        "admission": route_admission.stats(),
+        "password_pool": password_hasher.stats(),
+        "login": login_stats.stats()
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of this worker's metrics."""
+    if not config.METRICS_ENABLED:
+        return Response(status_code=404)
+    return Response(content=registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -81,6 +158,9 @@ async def root():
             "maps": "/maps/",
             "users": "/users/",
             "health": "/health",
+            "stats": "/health/stats",
+            "metrics": "/metrics",
+            "profiles": "/profiles",
             "docs": "/docs"
         }
     }
@@ -1,7 +1,10 @@
 from models.users import Users
 from models.maps import Maps
 from models.route_history import RouteHistory
+from models.polylines import Polylines
+from models.route_alternatives import RouteAlternatives
+from models.user_route_stats import UserRouteStats
 
 __all__ = [
-    "Users", "Maps", "RouteHistory"
+    "Users", "Maps", "RouteHistory", "Polylines", "RouteAlternatives", "UserRouteStats"
 ]
\ No newline at end of file
@@ -1,31 +1,73 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 from pathlib import Path
+import os
 from dotenv import load_dotenv
+from config import config
+from models.route_spatial_index import create_route_spatial_index
 
 load_dotenv()
 
 BACKEND_DIR = Path(__file__).resolve().parent.parent
 
-DATABASE_URL =  f"sqlite:///{BACKEND_DIR / 'data' / 'map_app.db'}"
+DATABASE_PATH = BACKEND_DIR / 'data' / 'map_app.db'
+# DATABASE_URL may point at another SQLite file (e.g. a scratch database for benchmarks).
+DATABASE_URL = os.getenv("DATABASE_URL") or f"sqlite:///{DATABASE_PATH}"
+ASYNC_DATABASE_URL = DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
 
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Configure every new SQLite connection (journal mode, durability, lock waits)."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={config.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={config.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA cache_size={config.SQLITE_CACHE_SIZE}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+# Synchronous engine for schema management and offline scripts.
 engine = create_engine(DATABASE_URL)
+event.listen(engine, "connect", apply_sqlite_pragmas)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine used by the request handlers so queries never block the event loop.
+async_engine = create_async_engine(ASYNC_DATABASE_URL)
+event.listen(async_engine.sync_engine, "connect", apply_sqlite_pragmas)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
 def create_tables():
     """Create all database tables."""
     Base.metadata.create_all(bind=engine)
+    # create_all skips tables that already exist, so add indexes introduced later.
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+    # The R*Tree over route endpoints is a virtual table, created outside the ORM metadata.
+    with engine.begin() as connection:
+        create_route_spatial_index(connection)
 
-def get_db():
-    """Dependency to get database session."""
-    db = SessionLocal()
-    try:
+async def get_db():
+    """Dependency to get an async database session."""
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+async def dispose_engines():
+    """Release pooled database connections on shutdown."""
+    await async_engine.dispose()
+    engine.dispose()
 
 if __name__ == "__main__":
-    create_tables()
\ No newline at end of file
+    create_tables()
@@ -10,6 +10,7 @@ class Maps(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     selected_route = Column(Integer, ForeignKey("route_history.id"),nullable=False)
+    # Legacy: alternatives are stored in route_alternatives; only older rows fill this in.
     other_routes = Column(JSON)
     created_at = Column(DateTime, default=datetime.utcnow)
     
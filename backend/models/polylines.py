@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, LargeBinary, Text
+from models.base import Base
+
+
+class Polylines(Base):
+    """Encoded polylines stored once and shared by every row that uses the same geometry."""
+
+    __tablename__ = "polylines"
+
+    id = Column(Integer, primary_key=True)
+    # SHA-1 of the encoded polyline; identical geometry maps to one row.
+    hash = Column(LargeBinary(20), unique=True, nullable=False)
+    encoded = Column(Text, nullable=False)
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+from sqlalchemy.orm import relationship
+from models.base import Base
+
+
+class RouteAlternatives(Base):
+    """A non-selected alternative of a calculated route, one row per alternative."""
+
+    __tablename__ = "route_alternatives"
+
+    id = Column(Integer, primary_key=True)
+    route_history_id = Column(Integer, ForeignKey("route_history.id"), nullable=False, index=True)
+    route_index = Column(Integer, nullable=False)
+    polyline_id = Column(Integer, ForeignKey("polylines.id"), nullable=False)
+    distance_meters = Column(Integer, nullable=False)
+    num_nodes = Column(Integer, nullable=False)
+    bonus_type = Column(String, nullable=True)
+    bonus_value = Column(Integer, default=0)
+    is_feasible = Column(Boolean, nullable=False)
+    max_round_trips = Column(Integer, default=0)
+    # Localized text as returned by the routing backend (e.g. "12.3 km", "18 mins")
+    distance = Column(String, nullable=True)
+    duration = Column(String, nullable=True)
+
+    # Relationships
+    route_history = relationship("RouteHistory", back_populates="alternatives")
+    polyline = relationship("Polylines")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from models.base import Base
@@ -6,6 +6,10 @@ from models.base import Base
 
 class RouteHistory(Base):
     __tablename__ = "route_history"
+    __table_args__ = (
+        # Serves the per-user history listing, which pages by (created_at, id).
+        Index("ix_route_history_user_created", "user_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -27,3 +31,4 @@ class RouteHistory(Base):
     # Relationship
     user = relationship("Users", back_populates="route_history")
     maps = relationship("Maps", back_populates="route_history")
+    alternatives = relationship("RouteAlternatives", back_populates="route_history", lazy="noload")
@@ -0,0 +1,55 @@
+from sqlalchemy import Column, Float, Integer, MetaData, Table, text
+from sqlalchemy.engine import Connection
+
+# 4-D R*Tree over (start, end) coordinates of route_history. SQLite keeps it in
+# sync through triggers, so inserts from any code path (ORM, scripts) are indexed.
+ROUTE_HISTORY_RTREE = "route_history_rtree"
+
+# Query-side description of the virtual table. It lives outside Base.metadata so
+# create_all never tries to create it as a regular table.
+route_history_rtree = Table(
+    ROUTE_HISTORY_RTREE,
+    MetaData(),
+    Column("id", Integer, primary_key=True),
+    *(
+        Column(f"{bound}_{end}_{axis}", Float)
+        for end in ("start", "end") for axis in ("lat", "lng") for bound in ("min", "max")
+    )
+)
+
+SPATIAL_INDEX_DDL = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {ROUTE_HISTORY_RTREE} USING rtree(
+        id,
+        min_start_lat, max_start_lat, min_start_lng, max_start_lng,
+        min_end_lat, max_end_lat, min_end_lng, max_end_lng
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS route_history_rtree_insert AFTER INSERT ON route_history BEGIN
+        INSERT INTO {ROUTE_HISTORY_RTREE} VALUES (
+            new.id, new.start_lat, new.start_lat, new.start_lng, new.start_lng,
+            new.end_lat, new.end_lat, new.end_lng, new.end_lng
+        );
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS route_history_rtree_update
+    AFTER UPDATE OF start_lat, start_lng, end_lat, end_lng ON route_history BEGIN
+        UPDATE {ROUTE_HISTORY_RTREE} SET
+            min_start_lat = new.start_lat, max_start_lat = new.start_lat,
+            min_start_lng = new.start_lng, max_start_lng = new.start_lng,
+            min_end_lat = new.end_lat, max_end_lat = new.end_lat,
+            min_end_lng = new.end_lng, max_end_lng = new.end_lng
+        WHERE id = new.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS route_history_rtree_delete AFTER DELETE ON route_history BEGIN
+        DELETE FROM {ROUTE_HISTORY_RTREE} WHERE id = old.id;
+    END""",
+)
+
+
+def create_route_spatial_index(connection: Connection) -> None:
+    """Create the R*Tree and its triggers, indexing any routes saved before it existed."""
+    for statement in SPATIAL_INDEX_DDL:
+        connection.execute(text(statement))
+    connection.execute(text(
+        f"""INSERT INTO {ROUTE_HISTORY_RTREE}
+        SELECT id, start_lat, start_lat, start_lng, start_lng, end_lat, end_lat, end_lng, end_lng
+        FROM route_history WHERE id NOT IN (SELECT id FROM {ROUTE_HISTORY_RTREE})"""
+    ))
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from models.base import Base
+
+
+class UserRouteStats(Base):
+    """Running per-user totals over route_history, updated with every saved route."""
+
+    __tablename__ = "user_route_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    route_count = Column(Integer, nullable=False, default=0)
+    total_distance_km = Column(Float, nullable=False, default=0.0)
+    total_round_trips = Column(Integer, nullable=False, default=0)
+    max_round_trips = Column(Integer, nullable=False, default=0)
+    total_nodes = Column(Integer, nullable=False, default=0)
+    total_bonus_value = Column(Integer, nullable=False, default=0)
+    # Charging bonus distribution
+    bonus_none_count = Column(Integer, nullable=False, default=0)
+    bonus_type_a_count = Column(Integer, nullable=False, default=0)
+    bonus_type_b_count = Column(Integer, nullable=False, default=0)
+    first_route_at = Column(DateTime, nullable=True)
+    last_route_at = Column(DateTime, nullable=True)
@@ -0,0 +1,46 @@
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import config
+from models.base import get_db
+from services.access_tokens import AccessTokens
+from services.user_service import UserService
+
+
+async def current_user_id(request: Request, db: AsyncSession = Depends(get_db)) -> int:
+    """The authenticated user's id from the bearer token.
+
+    A valid token is proof enough that the user exists, so this costs no
+    query. With ``AUTH_ALLOW_USER_ID_HEADER`` a bare ``x-user-id`` header is
+    accepted instead, checked against the user profile cache.
+    """
+    authorization = request.headers.get("authorization")
+    if authorization:
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            raise HTTPException(status_code=401, detail="Bearer token required", headers={"WWW-Authenticate": "Bearer"})
+        try:
+            return AccessTokens.verify(token.strip())
+        except ValueError as e:
+            raise HTTPException(status_code=401, detail=str(e), headers={"WWW-Authenticate": "Bearer"})
+
+    user_id = request.headers.get("x-user-id")
+    if config.AUTH_ALLOW_USER_ID_HEADER and user_id and user_id.isdigit():
+        if await UserService.get_user_profile(db, int(user_id)) is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        return int(user_id)
+
+    raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+
+
+async def profiling_user(user_id: int = Depends(current_user_id)) -> int:
+    """For ``/profiles``: captured stacks are only for the users in ``PROFILING_USER_IDS``."""
+    if user_id not in config.PROFILING_USER_IDS:
+        raise HTTPException(status_code=403, detail="Not allowed to access profiles")
+    return user_id
+
+
+async def current_user_matches(user_id: int, current: int = Depends(current_user_id)) -> int:
+    """For ``/users/{user_id}/...`` endpoints: the path must name the authenticated user."""
+    if user_id != current:
+        raise HTTPException(status_code=403, detail="Not allowed to access another user's data")
+    return user_id
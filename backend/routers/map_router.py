@@ -1,36 +1,179 @@
-from fastapi import APIRouter, HTTPException, Depends, Request
-from sqlalchemy.orm import Session
-from typing import List
+import orjson
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from models.base import get_db
+from routers.dependencies import current_user_id
 from services.map_service import MapService
-from services.user_service import UserService
-from schemas.route_schemas import RouteRequest, RouteResponse, RouteHistoryResponse
+from services.route_store import RouteStore
+from schemas.route_schemas import RouteRequest, RouteResponse, RouteHistoryResponse, BatchRouteRequest, BatchRouteResponse, AlternativeRoute
+from schemas.route_schemas import FeasibilitySweepRequest, FeasibilitySweepResponse
+from services.metrics import registry, route_stage_seconds
+from services.upstream_resilience import UpstreamError, UpstreamUnavailableError
+from services.admission import AdmissionRejected, route_admission
+from config import config
 
 router = APIRouter(prefix="/maps", tags=["maps"])
 
+route_results_total = registry.counter(
+    "route_results_total", "Route calculations by response status (success or error).", ("status",)
+)
 
-@router.post("/calculate-route", response_model=RouteResponse)
+
+def upstream_http_error(e: UpstreamError) -> HTTPException:
+    """503 (with Retry-After when known) while the upstream is unavailable, 502 when it failed."""
+    if isinstance(e, UpstreamUnavailableError):
+        headers = {"Retry-After": str(max(1, round(e.retry_after)))} if e.retry_after is not None else None
+        return HTTPException(status_code=503, detail=str(e), headers=headers)
+    return HTTPException(status_code=502, detail=str(e))
+
+
+async def admit_route_calculation(user_id: int = Depends(current_user_id)):
+    """Hold an admission slot for the whole request, or answer 429 with Retry-After."""
+    if not config.ADMISSION_ENABLED:
+        yield
+        return
+
+    try:
+        async with route_admission.slot(user_id):
+            yield
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
+@router.post("/calculate-route", response_model=RouteResponse, dependencies=[Depends(admit_route_calculation)])
 async def calculate_route(
-    req: Request,
     request: RouteRequest,
-    db: Session = Depends(get_db)
+    user_id: int = Depends(current_user_id),
+    db: AsyncSession = Depends(get_db)
 ):
     """Calculate optimal route with charging point bonuses for a specific user."""
     try:
-        user_id = req.headers.get("x-user-id")
-        # print("------------- found user id :: ", user_id)
-        user = UserService.get_user_by_id(db, user_id)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
         result = await MapService.calculate_optimal_route(db, user_id, request)
-        return result
+        route_results_total.inc(result.status)
+
+        # Serialized here rather than by FastAPI so the cost shows up as its own stage.
+        with route_stage_seconds.time("serialize"):
+            body = result.model_dump_json()
+        return Response(content=body, media_type="application/json")
     
     except HTTPException:
         raise
+    except UpstreamError as e:
+        raise upstream_http_error(e)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Route calculation failed: {str(e)}")
 
 
+@router.post("/calculate-route/stream", dependencies=[Depends(admit_route_calculation)])
+async def calculate_route_stream(
+    request: RouteRequest,
+    user_id: int = Depends(current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """Calculate an optimal route and stream it as NDJSON events, best route first.
+
+    Events, one JSON object per line: ``route`` (selected route and metrics),
+    ``alternative`` (one per other route), ``saved`` (persisted ``route_id``),
+    ``done``; or ``error`` with a message.
+    """
+    try:
+        route_analyses = await MapService.get_route_alternatives(request)
+
+    except HTTPException:
+        raise
+    except UpstreamError as e:
+        raise upstream_http_error(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Route calculation failed: {str(e)}")
+
+    async def events():
+        status = "success"
+        async for event in MapService.stream_optimal_route(db, user_id, route_analyses, request):
+            if event["event"] == "error":
+                status = "error"
+            yield orjson.dumps(event) + b"\n"
+        route_results_total.inc(status)
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+@router.post("/calculate-routes", response_model=BatchRouteResponse)
+async def calculate_routes(
+    batch: BatchRouteRequest,
+    user_id: int = Depends(current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """Calculate optimal routes for many origin/destination pairs in one call."""
+    try:
+        if len(batch.routes) > config.BATCH_MAX_ROUTES:
+            raise HTTPException(status_code=400, detail=f"At most {config.BATCH_MAX_ROUTES} routes per batch")
+
+        return await MapService.calculate_optimal_routes(db, user_id, batch.routes)
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch route calculation failed: {str(e)}")
+
+
+@router.post(
+    "/feasibility", response_model=FeasibilitySweepResponse, dependencies=[Depends(admit_route_calculation)]
+)
+async def feasibility_sweep(
+    sweep: FeasibilitySweepRequest,
+    user_id: int = Depends(current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """Which vehicle profiles can do a trip: feasibility and round trips for every profile on every alternative.
+
+    The route is either one of the user's saved routes (``route_id``) or
+    calculated from ``route`` without being saved.
+    """
+    try:
+        if len(sweep.vehicles) > config.FEASIBILITY_MAX_VEHICLES:
+            raise HTTPException(
+                status_code=400, detail=f"At most {config.FEASIBILITY_MAX_VEHICLES} vehicles per sweep"
+            )
+
+        result = await MapService.feasibility_sweep(db, user_id, sweep)
+        if result is None:
+            raise HTTPException(status_code=404, detail="Route not found")
+        return Response(content=result.model_dump_json(), media_type="application/json")
+
+    except HTTPException:
+        raise
+    except UpstreamError as e:
+        raise upstream_http_error(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Feasibility sweep failed: {str(e)}")
+
+
+@router.get("/routes/{route_id}/alternatives", response_model=List[AlternativeRoute])
+async def get_route_alternatives(
+    route_id: int,
+    simplify_tolerance_m: Optional[float] = Query(default=None, ge=0),
+    user_id: int = Depends(current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """Alternatives of a saved route, loaded on demand."""
+    try:
+        owner_id = await RouteStore.get_route_owner(db, route_id)
+        if owner_id is None or owner_id != user_id:
+            raise HTTPException(status_code=404, detail="Route not found")
+
+        return ORJSONResponse(await RouteStore.get_alternatives(db, route_id, simplify_tolerance_m))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve route alternatives: {str(e)}")
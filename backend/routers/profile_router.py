@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from typing import List
+from config import config
+from routers.dependencies import profiling_user
+from services.profiler import profile_store
+
+router = APIRouter(prefix="/profiles", tags=["profiles"], dependencies=[Depends(profiling_user)])
+
+
+def _require_enabled():
+    if not config.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+
+
+@router.get("", response_model=List[dict])
+async def list_profiles():
+    """Captured request profiles, newest first."""
+    _require_enabled()
+    return profile_store.list()
+
+
+@router.get("/{profile_id}")
+async def download_profile(profile_id: str):
+    """Collapsed stacks for one profile (load into speedscope or flamegraph.pl)."""
+    _require_enabled()
+    path = profile_store.path(profile_id, ".folded")
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=path.name)
@@ -1,27 +1,25 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from config import config
 from models.base import get_db
+from routers.dependencies import current_user_matches
 from services.user_service import UserService
 from schemas.auth_schemas import UserProfileResponse
-from schemas.route_schemas import RouteHistoryResponse
+from schemas.route_schemas import RouteHistoryResponse, UserRouteStatsResponse
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
-@router.get("/{user_id}", response_model=UserProfileResponse)
-async def get_user_profile(user_id: int, db: Session = Depends(get_db)):
+@router.get("/{user_id}", response_model=UserProfileResponse, dependencies=[Depends(current_user_matches)])
+async def get_user_profile(user_id: int, db: AsyncSession = Depends(get_db)):
     try:
-        user = UserService.get_user_by_id(db, user_id)
-        if not user:
+        profile = await UserService.get_user_profile(db, user_id)
+        if not profile:
             raise HTTPException(status_code=404, detail="User not found")
         
-        return UserProfileResponse(
-            id=user.id,
-            email=user.email,
-            name=user.name,
-            created_at=user.created_at
-        )
+        return profile
     
     except HTTPException:
         raise
@@ -30,17 +28,54 @@ async def get_user_profile(user_id: int, db: Session = Depends(get_db)):
 
 
 
-@router.get("/{user_id}/routes", response_model=List[RouteHistoryResponse])
-async def get_user_routes(user_id: int, db: Session = Depends(get_db)):
+@router.get("/{user_id}/routes", response_model=List[RouteHistoryResponse], dependencies=[Depends(current_user_matches)])
+async def get_user_routes(
+    user_id: int,
+    limit: Optional[int] = Query(default=None, ge=1),
+    cursor: Optional[str] = None,
+    include_polyline: Optional[bool] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """List a user's routes newest first.
+
+    Without ``limit`` or ``cursor`` every route is returned with its polyline,
+    as before pagination existed. With either, one page is returned (without
+    polylines unless ``include_polyline=true``) and the next page cursor is
+    sent in X-Next-Cursor.
+    """
     try:
-        user = UserService.get_user_by_id(db, user_id)
-        if not user:
+        if not await UserService.get_user_profile(db, user_id):
             raise HTTPException(status_code=404, detail="User not found")
         
-        routes = UserService.get_user_route_history(db, user_id)
-        return routes
+        paginated = limit is not None or cursor is not None
+        page_size = (
+            min(limit or config.ROUTE_HISTORY_PAGE_SIZE, config.ROUTE_HISTORY_MAX_PAGE_SIZE) if paginated else None
+        )
+        routes, next_cursor = await UserService.get_user_route_history(
+            db, user_id, page_size, cursor=cursor,
+            include_polyline=include_polyline if include_polyline is not None else not paginated
+        )
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+        return ORJSONResponse(UserService.history_payload(routes), headers=headers)
     
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve user routes: {str(e)}")
+
+
+@router.get("/{user_id}/stats", response_model=UserRouteStatsResponse, dependencies=[Depends(current_user_matches)])
+async def get_user_stats(user_id: int, db: AsyncSession = Depends(get_db)):
+    """Aggregate route statistics for a user, read from the maintained totals."""
+    try:
+        if not await UserService.get_user_profile(db, user_id):
+            raise HTTPException(status_code=404, detail="User not found")
+
+        return await UserService.get_route_stats(db, user_id)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve user stats: {str(e)}")
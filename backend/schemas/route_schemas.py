@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, List, Dict
 from datetime import datetime
 
@@ -10,6 +10,24 @@ class RouteRequest(BaseModel):
     end_lng: float
     optimization_criteria: Optional[str]
     mode: Optional[str]
+    use_cache: bool = True
+    # Return simplified geometry: an explicit tolerance in metres, or one derived from the map zoom level
+    simplify_tolerance_m: Optional[float] = Field(default=None, ge=0)
+    zoom: Optional[float] = Field(default=None, ge=0, le=22)
+
+
+class AlternativeRoute(BaseModel):
+    route_index: int
+    polyline: Optional[str] = None
+    num_nodes: int
+    bonus_type: Optional[str] = None
+    bonus_value: int = 0
+    total_distance_meters: int
+    total_distance_km: float
+    is_feasible: bool
+    max_round_trips: int
+    distance: Optional[str] = None
+    duration: Optional[str] = None
 
 
 class RouteResponse(BaseModel):
@@ -25,7 +43,19 @@ class RouteResponse(BaseModel):
     num_nodes: Optional[int] = None
     total_distance_km: Optional[float] = None
     message: Optional[str] = None
-    other_routes: Optional[List[Dict]] = None
+    other_routes: Optional[List[AlternativeRoute]] = None
+
+
+class BatchRouteRequest(BaseModel):
+    routes: List[RouteRequest] = Field(min_length=1)
+
+
+class BatchRouteResponse(BaseModel):
+    status: str
+    succeeded: int
+    failed: int
+    # One entry per requested route, in request order; failed entries have status "error"
+    results: List[RouteResponse]
 
 
 class RouteHistoryResponse(BaseModel):
@@ -43,6 +73,69 @@ class RouteHistoryResponse(BaseModel):
     num_nodes: Optional[int]
     total_distance_km: Optional[float]
     created_at: datetime
+    polyline_data: Optional[str] = None
 
     class Config:
         from_attributes = True
+
+
+class UserRouteStatsResponse(BaseModel):
+    user_id: int
+    route_count: int = 0
+    total_distance_km: float = 0.0
+    average_distance_km: float = 0.0
+    average_round_trips: float = 0.0
+    max_round_trips: int = 0
+    average_nodes: float = 0.0
+    total_bonus_value: int = 0
+    bonus_distribution: Dict[str, int] = Field(default_factory=dict)
+    first_route_at: Optional[datetime] = None
+    last_route_at: Optional[datetime] = None
+
+
+class VehicleProfile(BaseModel):
+    # Caller's identifier for the vehicle, echoed back in the results
+    id: Optional[str] = None
+    initial_charge: float = Field(ge=0)
+    charge_per_km: float = Field(ge=0)
+
+
+class FeasibilitySweepRequest(BaseModel):
+    vehicles: List[VehicleProfile] = Field(min_length=1)
+    # Either a saved route of the user or a route to calculate (not saved to history)
+    route_id: Optional[int] = None
+    route: Optional[RouteRequest] = None
+
+    @model_validator(mode="after")
+    def one_route_source(self):
+        if (self.route_id is None) == (self.route is None):
+            raise ValueError("Give exactly one of route_id or route")
+        return self
+
+
+class SweepRoute(BaseModel):
+    route_index: int
+    total_distance_km: float
+    bonus_type: Optional[str] = None
+    bonus_value: int = 0
+    distance: Optional[str] = None
+    duration: Optional[str] = None
+
+
+class VehicleFeasibility(BaseModel):
+    vehicle_id: Optional[str] = None
+    # Per route, in the order of FeasibilitySweepResponse.routes
+    is_feasible: List[bool]
+    max_round_trips: List[int]
+    # Feasible route with the most round trips, as the route endpoint would select it
+    best_route_index: Optional[int] = None
+    best_round_trips: int = 0
+
+
+class FeasibilitySweepResponse(BaseModel):
+    status: str
+    route_id: Optional[int] = None
+    routes: List[SweepRoute] = Field(default_factory=list)
+    vehicles: List[VehicleFeasibility] = Field(default_factory=list)
+    feasible_vehicles: int = 0
+    message: Optional[str] = None
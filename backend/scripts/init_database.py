@@ -3,12 +3,18 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from models.base import Base, engine
+from models.route_spatial_index import create_route_spatial_index
 from models.users import Users
 from models.maps import Maps
 from models.route_history import RouteHistory
+from models.polylines import Polylines
+from models.route_alternatives import RouteAlternatives
+from models.user_route_stats import UserRouteStats
 
 def init_database():
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        create_route_spatial_index(connection)
     print(f"Tables created: {list(Base.metadata.tables.keys())}")
 
 if __name__ == "__main__":
@@ -0,0 +1,90 @@
+"""Move alternatives stored as Maps.other_routes JSON into route_alternatives.
+
+Usage:
+    python scripts/migrate_alternatives.py [--batch-size 500] [--vacuum]
+
+Safe to re-run: only Maps rows that still have other_routes are migrated, and
+each batch is committed together with clearing their JSON.
+"""
+import argparse
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import null, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models.base import SessionLocal, create_tables, engine
+from models import Maps, Polylines, RouteAlternatives
+from services.route_store import RouteStore
+
+
+def migrate(batch_size: int) -> int:
+    migrated = 0
+    last_id = 0
+    with SessionLocal() as db:
+        while True:
+            maps = db.execute(
+                select(Maps)
+                .where(Maps.id > last_id, Maps.other_routes.isnot(None))
+                .order_by(Maps.id)
+                .limit(batch_size)
+            ).scalars().all()
+            if not maps:
+                break
+            last_id = maps[-1].id
+
+            encoded = {
+                route["polyline"]: RouteStore.polyline_hash(route["polyline"])
+                for map_record in maps for route in map_record.other_routes or [] if route.get("polyline")
+            }
+            if encoded:
+                db.execute(
+                    sqlite_insert(Polylines)
+                    .values([{"hash": digest, "encoded": line} for line, digest in encoded.items()])
+                    .on_conflict_do_nothing(index_elements=["hash"])
+                )
+            ids = dict(db.execute(
+                select(Polylines.hash, Polylines.id).where(Polylines.hash.in_(list(encoded.values())))
+            ).all())
+
+            for map_record in maps:
+                for route in map_record.other_routes or []:
+                    if not route.get("polyline"):
+                        continue
+                    db.add(RouteAlternatives(
+                        route_history_id=map_record.selected_route,
+                        route_index=route.get("route_index", 0),
+                        polyline_id=ids[encoded[route["polyline"]]],
+                        distance_meters=route.get("total_distance_meters", 0),
+                        num_nodes=route.get("num_nodes", 0),
+                        bonus_type=route.get("bonus_type"),
+                        bonus_value=route.get("bonus_value", 0),
+                        is_feasible=bool(route.get("is_feasible")),
+                        max_round_trips=route.get("max_round_trips", 0),
+                        distance=route.get("distance"),
+                        duration=route.get("duration")
+                    ))
+                # SQL NULL rather than JSON null, so the row is not picked up again.
+                map_record.other_routes = null()
+
+            db.commit()
+            migrated += len(maps)
+            print(f"Migrated {migrated} routes")
+
+    return migrated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--vacuum", action="store_true", help="Reclaim the freed space afterwards")
+    args = parser.parse_args()
+
+    create_tables()
+    total = migrate(args.batch_size)
+    print(f"Done: {total} routes migrated")
+
+    if args.vacuum:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text("VACUUM"))
+        print("Database vacuumed")
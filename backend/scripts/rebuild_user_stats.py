@@ -0,0 +1,55 @@
+"""Rebuild user_route_stats from route_history.
+
+Usage:
+    python scripts/rebuild_user_stats.py [--user-id ID]
+
+Backfills the table for existing data, or repairs it if it drifted. Runs as a
+single transaction, so the API keeps serving the old totals until it commits.
+"""
+import argparse
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import case, delete, func, insert, select
+from models.base import SessionLocal, create_tables
+from models import RouteHistory, UserRouteStats
+from services.user_service import BONUS_COUNT_COLUMNS
+
+
+def rebuild(user_id: int = None) -> int:
+    columns = {
+        "user_id": RouteHistory.user_id,
+        "route_count": func.count(RouteHistory.id),
+        "total_distance_km": func.coalesce(func.sum(RouteHistory.total_distance_km), 0.0),
+        "total_round_trips": func.coalesce(func.sum(RouteHistory.max_round_trips), 0),
+        "max_round_trips": func.coalesce(func.max(RouteHistory.max_round_trips), 0),
+        "total_nodes": func.coalesce(func.sum(RouteHistory.num_nodes), 0),
+        "total_bonus_value": func.coalesce(func.sum(RouteHistory.bonus_value), 0),
+        "first_route_at": func.min(RouteHistory.created_at),
+        "last_route_at": func.max(RouteHistory.created_at),
+    }
+    for bonus_type, column in BONUS_COUNT_COLUMNS.items():
+        columns[column] = func.sum(case((RouteHistory.bonus_type == bonus_type, 1), else_=0))
+
+    aggregate = select(*columns.values()).group_by(RouteHistory.user_id)
+    clear = delete(UserRouteStats)
+    if user_id is not None:
+        aggregate = aggregate.where(RouteHistory.user_id == user_id)
+        clear = clear.where(UserRouteStats.user_id == user_id)
+
+    with SessionLocal() as db:
+        db.execute(clear)
+        result = db.execute(insert(UserRouteStats).from_select(list(columns.keys()), aggregate))
+        db.commit()
+        return result.rowcount
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", type=int, default=None, help="Only rebuild this user's totals")
+    args = parser.parse_args()
+
+    create_tables()
+    count = rebuild(args.user_id)
+    print(f"Rebuilt route stats for {count} users")
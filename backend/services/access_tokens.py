@@ -0,0 +1,107 @@
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+import orjson
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Seconds of clock skew tolerated when checking expiry.
+EXPIRY_LEEWAY_SECONDS = 30
+_HEADER = base64.urlsafe_b64encode(b'{"alg":"HS256","typ":"JWT"}').rstrip(b"=")
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+class AccessTokens:
+    """Stateless HS256 (JWT) access tokens carrying the user id and an expiry.
+
+    Tokens are verified with an HMAC in-process, so authenticating a request
+    needs no database lookup. All workers must share the signing secret:
+    ``AUTH_TOKEN_SECRET`` when set, otherwise a random secret generated once
+    into ``AUTH_TOKEN_SECRET_PATH``.
+    """
+
+    _secret: Optional[bytes] = None
+
+    @staticmethod
+    def secret() -> bytes:
+        if AccessTokens._secret is None:
+            if config.AUTH_TOKEN_SECRET:
+                AccessTokens._secret = config.AUTH_TOKEN_SECRET.encode("utf-8")
+            else:
+                AccessTokens._secret = AccessTokens.load_or_create_secret(Path(config.AUTH_TOKEN_SECRET_PATH))
+        return AccessTokens._secret
+
+    @staticmethod
+    def load_or_create_secret(path: Path) -> bytes:
+        """Read the shared secret, generating it first if no worker has yet.
+
+        The secret is written to a private temporary file which is then
+        hard-linked into place. The link fails if the path already exists, so
+        when several workers start together exactly one secret wins, and
+        ``path`` never exists without its full content.
+        """
+        if path.exists():
+            return path.read_bytes().strip()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(secrets.token_hex(32).encode("ascii"))
+            try:
+                os.link(temp_path, path)
+                logger.warning("AUTH_TOKEN_SECRET is not set; generated a signing secret in %s", path)
+            except FileExistsError:
+                pass
+        finally:
+            os.unlink(temp_path)
+        return path.read_bytes().strip()
+
+    @staticmethod
+    def sign(signing_input: bytes) -> bytes:
+        return _b64encode(hmac.new(AccessTokens.secret(), signing_input, hashlib.sha256).digest())
+
+    @staticmethod
+    def issue(user_id: int, ttl_seconds: Optional[float] = None) -> str:
+        now = int(time.time())
+        ttl = config.AUTH_TOKEN_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        payload = _b64encode(orjson.dumps({"sub": str(user_id), "iat": now, "exp": now + int(ttl)}))
+        signing_input = _HEADER + b"." + payload
+        return (signing_input + b"." + AccessTokens.sign(signing_input)).decode("ascii")
+
+    @staticmethod
+    def verify(token: str) -> int:
+        """The user id of a valid token; raises ``ValueError`` for malformed, forged or expired ones."""
+        try:
+            header, payload, signature = token.encode("ascii").split(b".")
+        except (UnicodeEncodeError, ValueError):
+            raise ValueError("Malformed access token")
+
+        if header != _HEADER or not hmac.compare_digest(signature, AccessTokens.sign(header + b"." + payload)):
+            raise ValueError("Invalid access token")
+
+        try:
+            claims = orjson.loads(_b64decode(payload))
+            user_id = int(claims["sub"])
+            expires_at = float(claims["exp"])
+        except (ValueError, KeyError, TypeError):
+            raise ValueError("Malformed access token")
+
+        if expires_at + EXPIRY_LEEWAY_SECONDS < time.time():
+            raise ValueError("Access token expired")
+        return user_id
@@ -0,0 +1,165 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Hashable, Optional
+from config import config
+from services.metrics import registry
+
+admission_wait_seconds = registry.histogram(
+    "admission_wait_seconds", "Time admitted requests spent queued for a slot.", ("controller",)
+)
+admission_rejections_total = registry.counter(
+    "admission_rejections_total", "Requests turned away by admission control, by reason.", ("controller", "reason")
+)
+
+
+class AdmissionRejected(Exception):
+    """The request was not admitted; ``retry_after`` is a hint in seconds."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Server busy ({reason.replace('_', ' ')}), retry in {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded concurrency with a short, per-user fair wait queue.
+
+    Up to ``max_concurrency`` requests run at once. Beyond that requests wait
+    at most ``queue_timeout`` seconds in a queue of ``max_queue`` entries
+    (``max_queue_per_user`` for any single user). Waiters are released in
+    weighted fair order: each user's requests are tagged with a virtual
+    finish time advancing by ``1 / weight``, so a user with many queued
+    requests cannot starve others. Requests that find the queue full, or
+    time out in it, are rejected straight away with a retry hint.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        max_queue: int,
+        max_queue_per_user: int,
+        queue_timeout: float,
+        weights: Optional[Dict[str, float]] = None
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_queue_per_user = max_queue_per_user
+        self.queue_timeout = queue_timeout
+        self.weights = weights or {}
+        self.active = 0
+        self.queued = 0
+        self._heap = []
+        self._sequence = itertools.count()
+        self._queued_per_user: Dict[Hashable, int] = {}
+        self._finish_tags: Dict[Hashable, float] = {}
+        self._virtual_time = 0.0
+        # Moving average of how long an admitted request holds its slot, for Retry-After.
+        self._service_seconds = 0.1
+        self.admitted = 0
+        self.rejected = 0
+
+    def retry_after(self) -> int:
+        backlog = (self.queued + 1) / max(1, self.max_concurrency)
+        return max(1, math.ceil(backlog * self._service_seconds))
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        self.rejected += 1
+        admission_rejections_total.inc(self.name, reason)
+        return AdmissionRejected(reason, self.retry_after())
+
+    async def acquire(self, user: Hashable) -> None:
+        """Wait for a slot; raises ``AdmissionRejected`` when the request should be turned away."""
+        if self.active < self.max_concurrency and not self.queued:
+            self.active += 1
+            self.admitted += 1
+            return
+
+        if self.queued >= self.max_queue:
+            raise self._reject("queue_full")
+        if self._queued_per_user.get(user, 0) >= self.max_queue_per_user:
+            raise self._reject("user_queue_full")
+
+        tag = max(self._virtual_time, self._finish_tags.get(user, 0.0)) + 1.0 / self.weights.get(str(user), 1.0)
+        self._finish_tags[user] = tag
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (tag, next(self._sequence), waiter))
+        self.queued += 1
+        self._queued_per_user[user] = self._queued_per_user.get(user, 0) + 1
+
+        started = time.monotonic()
+        try:
+            async with asyncio.timeout(self.queue_timeout):
+                await waiter
+        except TimeoutError:
+            # The slot may have been handed over just as the deadline passed.
+            if not waiter.done() or waiter.cancelled():
+                waiter.cancel()
+                raise self._reject("queue_timeout")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                waiter.cancel()
+            raise
+        finally:
+            self.queued -= 1
+            remaining = self._queued_per_user.pop(user) - 1
+            if remaining:
+                self._queued_per_user[user] = remaining
+            if not self.queued:
+                # Nobody is waiting, so earlier tags no longer matter.
+                self._finish_tags.clear()
+
+        self.admitted += 1
+        admission_wait_seconds.observe(time.monotonic() - started, self.name)
+
+    def release(self, service_seconds: Optional[float] = None) -> None:
+        if service_seconds is not None:
+            self._service_seconds += 0.1 * (service_seconds - self._service_seconds)
+        self.active -= 1
+        while self._heap and self.active < self.max_concurrency:
+            tag, _, waiter = heapq.heappop(self._heap)
+            # Entries of waiters that timed out or went away are skipped here.
+            if waiter.done():
+                continue
+            self._virtual_time = tag
+            self.active += 1
+            waiter.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, user: Hashable):
+        """Hold a slot for the block, feeding its duration into the Retry-After estimate."""
+        await self.acquire(user)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self.queued,
+            "users_queued": len(self._queued_per_user),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "service_ms": round(self._service_seconds * 1000, 1)
+        }
+
+
+route_admission = AdmissionController(
+    "calculate_route",
+    max_concurrency=config.ADMISSION_MAX_CONCURRENCY,
+    max_queue=config.ADMISSION_MAX_QUEUE,
+    max_queue_per_user=config.ADMISSION_MAX_QUEUE_PER_USER,
+    queue_timeout=config.ADMISSION_QUEUE_TIMEOUT_MS / 1000,
+    weights=config.ADMISSION_USER_WEIGHTS
+)
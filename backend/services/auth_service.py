@@ -1,28 +1,74 @@
-import bcrypt
-from sqlalchemy.orm import Session
+import time
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from models import Users
 from schemas.auth_schemas import UserSignupRequest, UserLoginRequest
-from typing import Optional
+from services.metrics import registry
+from services.password_hasher import PasswordPoolSaturated, password_hasher
+from typing import Dict, Optional
+
+login_attempts_total = registry.counter(
+    "login_attempts_total", "Login attempts by outcome (success, invalid_credentials, saturated, error).", ("outcome",)
+)
+
+
+class LoginStats:
+    """Login outcomes and latency; a login turned away by a saturated password pool is not a failed login."""
+
+    def __init__(self):
+        self.count = 0
+        self.failed = 0
+        self.saturated = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, outcome: str, elapsed_ms: float) -> None:
+        login_attempts_total.inc(outcome)
+        self.count += 1
+        if outcome == "saturated":
+            # Rejected before any bcrypt work, so it stays out of the latency figures.
+            self.saturated += 1
+            return
+        if outcome == "invalid_credentials":
+            self.failed += 1
+        elif outcome == "error":
+            self.errors += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def stats(self) -> Dict[str, float]:
+        measured = self.count - self.saturated
+        return {
+            "count": self.count,
+            "failed": self.failed,
+            "saturated": self.saturated,
+            "errors": self.errors,
+            "avg_ms": round(self.total_ms / measured, 2) if measured else 0.0,
+            "max_ms": round(self.max_ms, 2)
+        }
+
+
+login_stats = LoginStats()
 
 
 class AuthService:
     @staticmethod
-    def hash_password(password: str) -> str:
-        salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-        return hashed.decode('utf-8')
+    async def hash_password(password: str) -> str:
+        return await password_hasher.hash(password)
     
     @staticmethod
-    def verify_password(password: str, hashed_password: str) -> bool:
-        return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+    async def verify_password(password: str, hashed_password: str) -> bool:
+        return await password_hasher.verify(password, hashed_password)
     
     @staticmethod
-    def get_user_by_email(db: Session, email: str) -> Optional[Users]:
-        return db.query(Users).filter(Users.email == email).first()
+    async def get_user_by_email(db: AsyncSession, email: str) -> Optional[Users]:
+        result = await db.execute(select(Users).where(Users.email == email))
+        return result.scalars().first()
     
     @staticmethod
-    def create_user(db: Session, user_data: UserSignupRequest) -> Users:
-        hashed_password = AuthService.hash_password(user_data.password)
+    async def create_user(db: AsyncSession, user_data: UserSignupRequest) -> Users:
+        hashed_password = await AuthService.hash_password(user_data.password)
         
         db_user = Users(
             email=user_data.email,
@@ -31,29 +77,36 @@ class AuthService:
         )
         
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
         return db_user
     
     @staticmethod
-    def authenticate_user(db: Session, login_data: UserLoginRequest) -> Optional[Users]:
-        user = AuthService.get_user_by_email(db, login_data.email)
-        
-        if not user:
-            return None
-        
-        if not AuthService.verify_password(login_data.password, user.password_hash):
-            return None
-        
-        return user
+    async def authenticate_user(db: AsyncSession, login_data: UserLoginRequest) -> Optional[Users]:
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            user = await AuthService.get_user_by_email(db, login_data.email)
+            
+            if not user or not await AuthService.verify_password(login_data.password, user.password_hash):
+                outcome = "invalid_credentials"
+                return None
+            
+            outcome = "success"
+            return user
+        except PasswordPoolSaturated:
+            outcome = "saturated"
+            raise
+        finally:
+            login_stats.record(outcome, (time.perf_counter() - started) * 1000)
     
     @staticmethod
-    def signup_or_login(db: Session, email: str, password: str, name: str = None) -> tuple[Users, bool]:
+    async def signup_or_login(db: AsyncSession, email: str, password: str, name: str = None) -> tuple[Users, bool]:
 
-        existing_user = AuthService.get_user_by_email(db, email)
+        existing_user = await AuthService.get_user_by_email(db, email)
         
         if existing_user:
-            if AuthService.verify_password(password, existing_user.password_hash):
+            if await AuthService.verify_password(password, existing_user.password_hash):
                 return existing_user, False
             else:
                 raise ValueError("Invalid password")
@@ -62,5 +115,5 @@ class AuthService:
                 raise ValueError("Name is required for new user registration")
             
             user_data = UserSignupRequest(email=email, password=password, name=name)
-            new_user = AuthService.create_user(db, user_data)
+            new_user = await AuthService.create_user(db, user_data)
             return new_user, True
@@ -0,0 +1,11 @@
+import numpy as np
+
+# Mean Earth radius (IUGG), in metres.
+EARTH_RADIUS_METERS = 6371008.8
+
+
+def haversine_meters(lat1, lng1, lat2, lng2):
+    """Great-circle distance in metres; arguments may be scalars or NumPy arrays."""
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(a))
@@ -0,0 +1,398 @@
+"""Offline road-graph router.
+
+The graph is read from a CSV edge list with the header::
+
+    from_id,from_lat,from_lng,to_id,to_lat,to_lng,length_m[,speed_kmh][,oneway]
+
+Each row is a road segment. ``speed_kmh`` defaults to
+``LOCAL_DEFAULT_SPEED_KMH``; unless ``oneway`` is 1 the reverse segment is
+added too. The edge list is compiled into forward/backward CSR arrays plus
+ALT landmark distance tables (A*, landmarks and the triangle inequality),
+which are cached next to the source file as ``<file>.idx.npz`` and reused
+while the source file (size and mtime), the landmark count and the default
+speed are unchanged.
+"""
+import csv
+import heapq
+import logging
+import math
+import os
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from services import polyline
+from services.geo import EARTH_RADIUS_METERS, haversine_meters
+
+logger = logging.getLogger(__name__)
+
+WEIGHT_KINDS = ("time", "length")
+
+
+def format_duration(seconds: float) -> str:
+    minutes = max(1, int(round(seconds / 60)))
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours} hour{'s' if hours > 1 else ''} {minutes} min{'s' if minutes != 1 else ''}"
+    return f"{minutes} min{'s' if minutes != 1 else ''}"
+
+
+def build_csr(num_nodes: int, src: np.ndarray, dst: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """CSR offsets and the edge order grouping edges by ``src``."""
+    order = np.argsort(src, kind="stable")
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=num_nodes), out=indptr[1:])
+    return indptr, order
+
+
+class LocalRoadGraph:
+    """Compact directed road graph with an ALT speed-up index."""
+
+    def __init__(
+        self,
+        node_lat: np.ndarray,
+        node_lng: np.ndarray,
+        edge_src: np.ndarray,
+        edge_dst: np.ndarray,
+        edge_length: np.ndarray,
+        edge_time: np.ndarray,
+        landmarks: Optional[Dict[str, Tuple[np.ndarray, np.ndarray]]] = None,
+        num_landmarks: int = 8,
+        grid_cell_deg: float = 0.01
+    ):
+        self.node_lat = node_lat
+        self.node_lng = node_lng
+        self.num_nodes = len(node_lat)
+        self.edge_src = edge_src
+        self.edge_dst = edge_dst
+        self.edge_length = edge_length
+        self.edge_time = edge_time
+
+        # Forward and backward adjacency in CSR form, as plain lists for fast scalar access in the search loops.
+        fwd_indptr, fwd_order = build_csr(self.num_nodes, edge_src, edge_dst)
+        bwd_indptr, bwd_order = build_csr(self.num_nodes, edge_dst, edge_src)
+        self._fwd_indptr = fwd_indptr.tolist()
+        self._fwd_edges = fwd_order.tolist()
+        self._bwd_indptr = bwd_indptr.tolist()
+        self._bwd_edges = bwd_order.tolist()
+        self._edge_src = edge_src.tolist()
+        self._edge_dst = edge_dst.tolist()
+        self._weights = {"time": edge_time.tolist(), "length": edge_length.tolist()}
+
+        if landmarks is None:
+            landmarks = {kind: self._build_landmarks(kind, num_landmarks) for kind in WEIGHT_KINDS}
+        # kind -> (dist from landmarks, dist to landmarks), each shaped (num_nodes, num_landmarks)
+        self.landmarks = landmarks
+        self._landmark_rows = {
+            kind: (dist_from.tolist(), dist_to.tolist()) for kind, (dist_from, dist_to) in landmarks.items()
+        }
+
+        self._grid_cell_deg = grid_cell_deg
+        self._grid = self._build_grid()
+
+    @classmethod
+    def from_csv(cls, path: str, default_speed_kmh: float, num_landmarks: int) -> "LocalRoadGraph":
+        node_index: Dict[str, int] = {}
+        node_lat: List[float] = []
+        node_lng: List[float] = []
+        src: List[int] = []
+        dst: List[int] = []
+        length: List[float] = []
+        speed: List[float] = []
+
+        def node(node_id: str, lat: str, lng: str) -> int:
+            index = node_index.get(node_id)
+            if index is None:
+                index = node_index[node_id] = len(node_lat)
+                node_lat.append(float(lat))
+                node_lng.append(float(lng))
+            return index
+
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                u = node(row["from_id"], row["from_lat"], row["from_lng"])
+                v = node(row["to_id"], row["to_lat"], row["to_lng"])
+                edge_length = float(row["length_m"])
+                edge_speed = float(row.get("speed_kmh") or default_speed_kmh)
+                src.append(u)
+                dst.append(v)
+                length.append(edge_length)
+                speed.append(edge_speed)
+                if str(row.get("oneway") or "0").strip() not in ("1", "true", "yes"):
+                    src.append(v)
+                    dst.append(u)
+                    length.append(edge_length)
+                    speed.append(edge_speed)
+
+        edge_length = np.array(length, dtype=np.float64)
+        edge_time = edge_length / (np.array(speed, dtype=np.float64) / 3.6)
+        return cls(
+            np.array(node_lat, dtype=np.float64),
+            np.array(node_lng, dtype=np.float64),
+            np.array(src, dtype=np.int64),
+            np.array(dst, dtype=np.int64),
+            edge_length,
+            edge_time,
+            num_landmarks=num_landmarks
+        )
+
+    @staticmethod
+    def _index_fingerprint(path: str, default_speed_kmh: float, num_landmarks: int) -> Dict[str, np.ndarray]:
+        """What a compiled index was built from; any difference means it must be rebuilt."""
+        source = os.stat(path)
+        return {
+            "source_stat": np.array([source.st_size, source.st_mtime_ns], dtype=np.int64),
+            "num_landmarks": np.array(num_landmarks, dtype=np.int64),
+            "default_speed_kmh": np.array(default_speed_kmh, dtype=np.float64)
+        }
+
+    @classmethod
+    def load(cls, path: str, default_speed_kmh: float = 50.0, num_landmarks: int = 8) -> "LocalRoadGraph":
+        """Load a graph, reusing the compiled index file when it was built from the same inputs."""
+        index_path = f"{path}.idx.npz"
+        fingerprint = cls._index_fingerprint(path, default_speed_kmh, num_landmarks)
+        if os.path.exists(index_path):
+            with np.load(index_path) as data:
+                if all(key in data and np.array_equal(data[key], value) for key, value in fingerprint.items()):
+                    landmarks = {kind: (data[f"{kind}_from"], data[f"{kind}_to"]) for kind in WEIGHT_KINDS}
+                    graph = cls(
+                        data["node_lat"], data["node_lng"], data["edge_src"], data["edge_dst"],
+                        data["edge_length"], data["edge_time"], landmarks=landmarks
+                    )
+                    logger.info(
+                        "Loaded road graph index %s (%d nodes, %d edges)",
+                        index_path, graph.num_nodes, len(graph.edge_src)
+                    )
+                    return graph
+            logger.info("Road graph index %s is stale, rebuilding", index_path)
+
+        graph = cls.from_csv(path, default_speed_kmh, num_landmarks)
+        arrays = {
+            **fingerprint,
+            "node_lat": graph.node_lat,
+            "node_lng": graph.node_lng,
+            "edge_src": graph.edge_src,
+            "edge_dst": graph.edge_dst,
+            "edge_length": graph.edge_length,
+            "edge_time": graph.edge_time
+        }
+        for kind, (dist_from, dist_to) in graph.landmarks.items():
+            arrays[f"{kind}_from"] = dist_from
+            arrays[f"{kind}_to"] = dist_to
+        try:
+            np.savez(index_path, **arrays)
+        except OSError as e:
+            logger.warning("Could not write road graph index %s: %s", index_path, e)
+        logger.info("Built road graph from %s (%d nodes, %d edges)", path, graph.num_nodes, len(graph.edge_src))
+        return graph
+
+    def _dijkstra_all(self, source: int, kind: str, backward: bool = False) -> np.ndarray:
+        indptr = self._bwd_indptr if backward else self._fwd_indptr
+        edges = self._bwd_edges if backward else self._fwd_edges
+        heads = self._edge_src if backward else self._edge_dst
+        weights = self._weights[kind]
+
+        dist = [math.inf] * self.num_nodes
+        dist[source] = 0.0
+        heap = [(0.0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for i in range(indptr[u], indptr[u + 1]):
+                e = edges[i]
+                v = heads[e]
+                nd = d + weights[e]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    heapq.heappush(heap, (nd, v))
+        return np.array(dist, dtype=np.float64)
+
+    def _build_landmarks(self, kind: str, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Pick landmarks by farthest-point selection and store distances from and to each."""
+        count = min(count, self.num_nodes)
+        dist_from = np.empty((self.num_nodes, count), dtype=np.float64)
+        dist_to = np.empty((self.num_nodes, count), dtype=np.float64)
+        if count == 0:
+            return dist_from, dist_to
+
+        closest = np.full(self.num_nodes, np.inf)
+        landmark = 0
+        for i in range(count):
+            dist_from[:, i] = self._dijkstra_all(landmark, kind)
+            dist_to[:, i] = self._dijkstra_all(landmark, kind, backward=True)
+            reachable = np.where(np.isfinite(dist_from[:, i]), dist_from[:, i], 0.0)
+            closest = np.minimum(closest, reachable)
+            landmark = int(np.argmax(closest))
+        return dist_from, dist_to
+
+    def _build_grid(self) -> Dict[Tuple[int, int], np.ndarray]:
+        cells_lat = np.floor(self.node_lat / self._grid_cell_deg).astype(np.int64)
+        cells_lng = np.floor(self.node_lng / self._grid_cell_deg).astype(np.int64)
+        grid: Dict[Tuple[int, int], List[int]] = {}
+        for node, cell in enumerate(zip(cells_lat.tolist(), cells_lng.tolist())):
+            grid.setdefault(cell, []).append(node)
+        return {cell: np.array(nodes, dtype=np.int64) for cell, nodes in grid.items()}
+
+    def nearest_node(self, lat: float, lng: float, max_distance_m: float) -> Optional[int]:
+        """Closest graph node within ``max_distance_m``, searching grid rings outward."""
+        cell_lat = math.floor(lat / self._grid_cell_deg)
+        cell_lng = math.floor(lng / self._grid_cell_deg)
+        cell_height_m = self._grid_cell_deg * math.pi / 180 * EARTH_RADIUS_METERS
+        max_ring = int(max_distance_m / (cell_height_m * max(math.cos(math.radians(lat)), 0.01))) + 1
+
+        best_node, best_distance = None, math.inf
+        for ring in range(max_ring + 1):
+            candidates = [
+                self._grid[cell]
+                for cell in (
+                    (cell_lat + dy, cell_lng + dx)
+                    for dy in range(-ring, ring + 1)
+                    for dx in range(-ring, ring + 1)
+                    if max(abs(dy), abs(dx)) == ring
+                )
+                if cell in self._grid
+            ]
+            if candidates:
+                nodes = np.concatenate(candidates)
+                distances = haversine_meters(lat, lng, self.node_lat[nodes], self.node_lng[nodes])
+                i = int(np.argmin(distances))
+                if distances[i] < best_distance:
+                    best_node, best_distance = int(nodes[i]), float(distances[i])
+            # Anything in further rings is at least `ring` cells away.
+            if best_node is not None and best_distance <= ring * cell_height_m * math.cos(math.radians(lat)):
+                break
+
+        return best_node if best_distance <= max_distance_m else None
+
+    def shortest_path(
+        self,
+        source: int,
+        target: int,
+        kind: str = "time",
+        penalties: Optional[Dict[int, float]] = None
+    ) -> Optional[List[int]]:
+        """ALT A* search returning the edge ids of the best path, or None if unreachable."""
+        indptr = self._fwd_indptr
+        edges = self._fwd_edges
+        heads = self._edge_dst
+        weights = self._weights[kind]
+        penalties = penalties or {}
+        dist_from, dist_to = self._landmark_rows[kind]
+        from_target = dist_from[target]
+        to_target = dist_to[target]
+
+        heuristics: Dict[int, float] = {}
+
+        def heuristic(v: int) -> float:
+            # max over landmarks of d(L,t) - d(L,v) and d(v,L) - d(t,L); NaN (inf - inf) never wins max().
+            h = heuristics.get(v)
+            if h is None:
+                h = 0.0
+                for lt, lv in zip(from_target, dist_from[v]):
+                    h = max(h, lt - lv)
+                for vl, tl in zip(dist_to[v], to_target):
+                    h = max(h, vl - tl)
+                heuristics[v] = h
+            return h
+
+        dist = {source: 0.0}
+        parent_edge: Dict[int, int] = {}
+        heap = [(heuristic(source), 0.0, source)]
+        while heap:
+            _, d, u = heapq.heappop(heap)
+            if u == target:
+                break
+            if d > dist.get(u, math.inf):
+                continue
+            for i in range(indptr[u], indptr[u + 1]):
+                e = edges[i]
+                v = heads[e]
+                nd = d + weights[e] * penalties.get(e, 1.0)
+                if nd < dist.get(v, math.inf):
+                    h = heuristic(v)
+                    if math.isinf(h):
+                        continue
+                    dist[v] = nd
+                    parent_edge[v] = e
+                    heapq.heappush(heap, (nd + h, nd, v))
+        else:
+            return None
+
+        path = []
+        node = target
+        while node != source:
+            e = parent_edge[node]
+            path.append(e)
+            node = self._edge_src[e]
+        path.reverse()
+        return path
+
+    def alternative_paths(
+        self,
+        source: int,
+        target: int,
+        k: int,
+        kind: str = "time",
+        penalty: float = 1.4,
+        max_stretch: float = 1.5
+    ) -> List[List[int]]:
+        """Up to ``k`` distinct paths found by penalising the edges of earlier ones."""
+        weights = self._weights[kind]
+        penalties: Dict[int, float] = {}
+        paths: List[List[int]] = []
+        seen = set()
+        best_cost = None
+
+        for _ in range(k * 2):
+            if len(paths) >= k:
+                break
+            path = self.shortest_path(source, target, kind, penalties)
+            if path is None:
+                break
+            cost = sum(weights[e] for e in path)
+            if best_cost is None:
+                best_cost = cost
+            elif cost > best_cost * max_stretch:
+                break
+
+            key = tuple(path)
+            if key not in seen:
+                seen.add(key)
+                paths.append(path)
+            for e in path:
+                penalties[e] = penalties.get(e, 1.0) * penalty
+
+        return paths
+
+    def path_to_route(self, path: List[int]) -> dict:
+        """Express a path in the computeRoutes response shape consumed by MapService."""
+        steps = []
+        points = []
+        total_length = 0.0
+        total_time = 0.0
+        for e in path:
+            u = self._edge_src[e]
+            v = self._edge_dst[e]
+            length = self._weights["length"][e]
+            total_length += length
+            total_time += self._weights["time"][e]
+            start = (float(self.node_lat[u]), float(self.node_lng[u]))
+            end = (float(self.node_lat[v]), float(self.node_lng[v]))
+            if not points:
+                points.append(start)
+            points.append(end)
+            steps.append({
+                "distanceMeters": int(round(length)),
+                "startLocation": {"latLng": {"latitude": start[0], "longitude": start[1]}},
+                "endLocation": {"latLng": {"latitude": end[0], "longitude": end[1]}}
+            })
+
+        return {
+            "legs": [{
+                "steps": steps,
+                "localizedValues": {
+                    "distance": {"text": f"{total_length / 1000:.1f} km"},
+                    "duration": {"text": format_duration(total_time)}
+                }
+            }],
+            "polyline": {"encodedPolyline": polyline.encode(points)}
+        }
@@ -1,55 +1,47 @@
-import httpx
+import asyncio
 import random
-from sqlalchemy.orm import Session
-from typing import Dict, Tuple
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, List, Optional, Tuple
 from models import RouteHistory, Maps
-from schemas.route_schemas import RouteRequest, RouteResponse
+from models.base import AsyncSessionLocal
+from schemas.route_schemas import (
+    RouteRequest, RouteResponse, BatchRouteResponse, AlternativeRoute,
+    FeasibilitySweepRequest, FeasibilitySweepResponse, SweepRoute, VehicleFeasibility, VehicleProfile
+)
 import logging
 from config import config
+from services.routing_backend import get_routing_backend
+from services.route_cache import RouteCache, route_cache
+from services.persistent_route_cache import persistent_route_cache
+from services.single_flight import SingleFlight
+from services.route_analysis import RouteAnalysis, analyze_routes, evaluate_feasibility
+from services.metrics import registry, route_stage_seconds
+from services.route_store import RouteStore
+from services.upstream_resilience import UpstreamError
+from services.admission import route_admission
+from services.user_service import UserService
+from services import polyline
 
 logger = logging.getLogger(__name__)
 
 INITIAL_CHARGE = 100
 CHARGE_PER_KM = 1 
 
+# Identical in-flight route calculations share one upstream call and analysis pass.
+route_calculations = SingleFlight()
 
-class MapService:
-    @staticmethod
-    def build_route_graph(route_obj: dict) -> Dict[Tuple[float, float], Dict[Tuple[float, float], int]]:
-        graph = {}
-        legs = route_obj.get("legs", [])
-        
-        for leg in legs:
-            steps = leg.get("steps", [])
-            for step in steps:
-                start = step.get("startLocation", {}).get("latLng", {})
-                end = step.get("endLocation", {}).get("latLng", {})
-                distance = step.get("distanceMeters", 0)
-                
-                if not start.get("latitude") or not start.get("longitude") or \
-                   not end.get("latitude") or not end.get("longitude"):
-                    continue
-                    
-                start_node = (start.get("latitude"), start.get("longitude"))
-                end_node = (end.get("latitude"), end.get("longitude"))
-                
-                if start_node not in graph:
-                    graph[start_node] = {}
-                
-                graph[start_node][end_node] = distance
-        
-        return graph
+nearby_route_lookups_total = registry.counter(
+    "nearby_route_lookups_total", "Lookups for a reusable nearby saved route by outcome (hit or miss).",
+    ("outcome",)
+)
+stale_route_fallbacks_total = registry.counter(
+    "stale_route_fallbacks_total", "Upstream failures answered with a stale saved route, by outcome (hit or miss).",
+    ("outcome",)
+)
 
-    @staticmethod
-    def count_unique_nodes(graph: Dict[Tuple[float, float], Dict[Tuple[float, float], int]]) -> int:
-        all_nodes = set()
-        all_nodes.update(graph.keys())
-        
-        for destinations in graph.values():
-            all_nodes.update(destinations.keys())
-        
-        return len(all_nodes)
 
+class MapService:
     @staticmethod
     def determine_charging_bonus(num_nodes: int) -> Tuple[str, int]:
         if num_nodes >= 3:
@@ -60,198 +52,445 @@ class MapService:
             return "None", 0
 
     @staticmethod
-    def get_total_distance_meters(route_obj: dict) -> int:
-        total = 0
-        legs = route_obj.get("legs", [])
-        for leg in legs:
-            steps = leg.get("steps", [])
-            for step in steps:
-                total += step.get("distanceMeters", 0)
-        return total
+    def analyze_routes(routes: List[dict]) -> List[RouteAnalysis]:
+        return analyze_routes(
+            routes,
+            MapService.determine_charging_bonus,
+            initial_charge=INITIAL_CHARGE,
+            charge_per_km=CHARGE_PER_KM
+        )
 
     @staticmethod
-    def calculate_route_feasibility_and_trips(
-        total_distance_meters: int, 
-        bonus_value: int,
-        initial_charge: int = INITIAL_CHARGE,
-        charge_per_km: int = CHARGE_PER_KM
-    ) -> Tuple[bool, int]:
-        total_distance_km = total_distance_meters / 1000.0
-        total_charge = initial_charge + bonus_value
-        
-        charge_needed_per_trip = total_distance_km * charge_per_km
-        
-        if total_charge < charge_needed_per_trip:
-            return False, 0
-        
-        charge_needed_per_round_trip = charge_needed_per_trip * 2
-        max_round_trips = int(total_charge / charge_needed_per_round_trip)
-        
-        return True, max_round_trips
+    async def fetch_route_alternatives(request: RouteRequest) -> List[RouteAnalysis]:
+        routes = await get_routing_backend().compute_routes(request)
+        with route_stage_seconds.time("analysis"):
+            return MapService.analyze_routes(routes)
+
+    @staticmethod
+    async def find_nearby_route_analyses(request: RouteRequest, max_age_seconds: float) -> Optional[List[RouteAnalysis]]:
+        """Alternatives of a saved route with endpoints near the request's, if there is one."""
+        # Own session: the lookup may run on behalf of several coalesced requests.
+        async with AsyncSessionLocal() as db:
+            route_record = await RouteStore.find_nearby_route(db, request, config.NEARBY_ROUTE_RADIUS_M, max_age_seconds)
+            if route_record is None:
+                return None
+            return await RouteStore.get_route_analyses(db, route_record)
 
     @staticmethod
-    async def calculate_optimal_route(db: Session, user_id: int, request: RouteRequest) -> RouteResponse:
-        google_api_key = config.GOOGLE_MAPS_API_KEY #os.getenv("GOOGLE_DIRECTIONS_API_KEY")
+    async def get_route_alternatives(request: RouteRequest) -> List[RouteAnalysis]:
+        """Analysed alternatives for a request, served from the route cache when possible.
+
+        Lookups go to the in-process cache first, then to the persistent cache
+        shared with other workers, then to recently saved routes with nearby
+        endpoints. If the upstream call fails, an older nearby saved route is
+        served instead when there is one. Concurrent requests that normalize
+        to the same key share a single lookup and upstream call. The returned
+        list may be shared with other requests and must not be mutated.
+        """
+        use_cache = config.ROUTE_CACHE_ENABLED and request.use_cache
+        key = RouteCache.make_key(request)
+
+        if use_cache:
+            cached = route_cache.get(key)
+            if cached is not None:
+                return cached
+
+        use_persistent = use_cache and config.PERSISTENT_ROUTE_CACHE_ENABLED
+        use_nearby = request.use_cache and config.NEARBY_ROUTE_REUSE_ENABLED
+
+        async def fetch() -> List[RouteAnalysis]:
+            if use_persistent:
+                with route_stage_seconds.time("persistent_cache"):
+                    stored = await persistent_route_cache.get(key)
+                if stored:
+                    route_cache.set(key, stored)
+                    return stored
+
+            if use_nearby:
+                with route_stage_seconds.time("nearby_lookup"):
+                    nearby = await MapService.find_nearby_route_analyses(request, config.NEARBY_ROUTE_MAX_AGE_SECONDS)
+                nearby_route_lookups_total.inc("hit" if nearby else "miss")
+                if nearby:
+                    if config.ROUTE_CACHE_ENABLED:
+                        route_cache.set(key, nearby)
+                    return nearby
+
+            try:
+                route_analyses = await MapService.fetch_route_alternatives(request)
+            except UpstreamError as e:
+                # Stale answers are not cached, so the next request tries the upstream again.
+                if not (request.use_cache and config.UPSTREAM_STALE_FALLBACK_ENABLED):
+                    raise
+                stale = await MapService.find_nearby_route_analyses(request, config.UPSTREAM_STALE_MAX_AGE_SECONDS)
+                stale_route_fallbacks_total.inc("hit" if stale else "miss")
+                if not stale:
+                    raise
+                logger.warning("Serving a stale saved route: %s", e)
+                return stale
+            if config.ROUTE_CACHE_ENABLED and route_analyses:
+                route_cache.set(key, route_analyses)
+                if config.PERSISTENT_ROUTE_CACHE_ENABLED:
+                    persistent_route_cache.set_in_background(key, route_analyses)
+            return route_analyses
+
+        # Requests that bypass the cache must not be coalesced onto a lookup that reads it.
+        return await route_calculations.do((key, use_persistent, use_nearby), fetch)
+
+    @staticmethod
+    def response_tolerance(request: RouteRequest) -> Optional[float]:
+        """Simplification tolerance in metres requested by the client, if any."""
+        if request.simplify_tolerance_m is not None:
+            return request.simplify_tolerance_m
+        if request.zoom is not None:
+            mid_lat = (request.start_lat + request.end_lat) / 2
+            return polyline.zoom_to_tolerance(request.zoom, mid_lat)
+        return None
+
+    @staticmethod
+    def alternative_data(analysis: RouteAnalysis, tolerance_meters: Optional[float]) -> dict:
+        route_data = analysis.to_dict()
+        route_data["polyline"] = polyline.simplify_encoded(analysis.polyline, tolerance_meters)
+        return route_data
+
+    @staticmethod
+    def alternatives_data(
+        route_analyses: List[RouteAnalysis],
+        best_route_index: int,
+        tolerance_meters: Optional[float]
+    ) -> List[AlternativeRoute]:
+        # Built from our own analysis, so validation is skipped.
+        return [
+            AlternativeRoute.model_construct(**MapService.alternative_data(analysis, tolerance_meters))
+            for analysis in route_analyses
+            if analysis.route_index != best_route_index
+        ]
+
+    @staticmethod
+    def select_best_route(route_analyses: List[RouteAnalysis]) -> Tuple[Optional[RouteAnalysis], Optional[str]]:
+        """Pick the feasible alternative with the most round trips, or explain why there is none."""
+        if not route_analyses:
+            return None, "Route calculation failed: No route found"
+
+        feasible_routes = [analysis for analysis in route_analyses if analysis.is_feasible]
         
-        if not google_api_key:
-            raise ValueError("Google Directions API key not configured")
-
-        google_directions_url = "https://routes.googleapis.com/directions/v2:computeRoutes"
-        headers = {
-            "X-Goog-Api-Key": google_api_key,
-            "X-Goog-FieldMask": "*"
-        }
-        body = {
-            "origin": {
-                "location": {
-                    "latLng": {
-                        "latitude": request.start_lat,
-                        "longitude": request.start_lng
-                    }
-                }
-            },
-            "destination": {
-                "location": {
-                    "latLng": {
-                        "latitude": request.end_lat,
-                        "longitude": request.end_lng
-                    }
-                }
-            },
-            "travelMode": "DRIVE",
-            "languageCode": "en-US",
-            "units": "METRIC",
-            "computeAlternativeRoutes": True
-        }
-
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(url=google_directions_url, headers=headers, json=body)
-            route_data = response.json()
-
-            routes = route_data.get("routes", [])
-            if not routes:
-                return RouteResponse(
-                    status="error",
-                    message="Route calculation failed: No route found"
-                )
+        if not feasible_routes:
+            return None, "No feasible routes found. All routes exceed vehicle charge capacity."
 
-            route_analyses = []
-            
-            for i, route in enumerate(routes):
-                graph = MapService.build_route_graph(route)
-                num_nodes = MapService.count_unique_nodes(graph)
-                bonus_type, bonus_value = MapService.determine_charging_bonus(num_nodes)
-                total_distance_meters = MapService.get_total_distance_meters(route)
-                is_feasible, max_round_trips = MapService.calculate_route_feasibility_and_trips(
-                    total_distance_meters, bonus_value
-                )
-                
-                route_analysis = {
-                    "route_index": i,
-                    "route": route,
-                    "graph": graph,
-                    "num_nodes": num_nodes,
-                    "bonus_type": bonus_type,
-                    "bonus_value": bonus_value,
-                    "total_distance_meters": total_distance_meters,
-                    "total_distance_km": total_distance_meters / 1000.0,
-                    "is_feasible": is_feasible,
-                    "max_round_trips": max_round_trips
-                }
-                
-                route_analyses.append(route_analysis)
-
-            feasible_routes = [analysis for analysis in route_analyses if analysis["is_feasible"]]
-            
-            if not feasible_routes:
-                return RouteResponse(
-                    status="error",
-                    message="No feasible routes found. All routes exceed vehicle charge capacity."
+        return max(feasible_routes, key=lambda x: x.max_round_trips), None
+
+    @staticmethod
+    def build_route_records(
+        user_id: int,
+        request: RouteRequest,
+        route_analyses: List[RouteAnalysis],
+        best_route_analysis: RouteAnalysis
+    ) -> Tuple[RouteHistory, Maps]:
+        """Unsaved RouteHistory/Maps rows for a calculation.
+
+        The Maps row references its RouteHistory through the relationship, so
+        any number of pairs can be added and inserted in a single flush.
+        Alternatives are stored separately by ``RouteStore.add_alternatives``.
+        """
+        route_record = RouteHistory(
+            user_id=user_id,
+            start_lat=request.start_lat,
+            start_lng=request.start_lng,
+            end_lat=request.end_lat,
+            end_lng=request.end_lng,
+            distance=best_route_analysis.distance,
+            duration=best_route_analysis.duration,
+            polyline_data=polyline.simplify_encoded(
+                best_route_analysis.polyline, config.POLYLINE_STORAGE_TOLERANCE_M
+            ),
+            optimization_criteria=request.optimization_criteria,
+            bonus_type=best_route_analysis.bonus_type,
+            bonus_value=best_route_analysis.bonus_value,
+            max_round_trips=best_route_analysis.max_round_trips,
+            num_nodes=best_route_analysis.num_nodes,
+            total_distance_km=best_route_analysis.total_distance_km
+        )
+
+        map_record = Maps(
+            user_id=user_id,
+            route_history=route_record
+        )
+
+        return route_record, map_record
+
+    @staticmethod
+    async def add_route_records(
+        db: AsyncSession,
+        user_id: int,
+        saved: List[Tuple[RouteHistory, Maps, List[RouteAnalysis], RouteAnalysis]]
+    ) -> None:
+        """Stage everything a saved calculation writes, for the caller to commit in one go.
+
+        Each entry is ``(route_record, map_record, route_analyses, best_route_analysis)``.
+        """
+        await RouteStore.add_alternatives(db, [
+            (route_record, route_analyses, best_route_analysis.route_index)
+            for route_record, _, route_analyses, best_route_analysis in saved
+        ])
+        db.add_all([record for route_record, map_record, _, _ in saved for record in (route_record, map_record)])
+        await UserService.add_route_stats(db, user_id, [route_record for route_record, _, _, _ in saved])
+
+    @staticmethod
+    def build_route_response(
+        request: RouteRequest,
+        route_analyses: List[RouteAnalysis],
+        best_route_analysis: RouteAnalysis,
+        route_id: Optional[int],
+        include_other_routes: bool = True
+    ) -> RouteResponse:
+        response_tolerance = MapService.response_tolerance(request)
+        other_routes = None
+        if include_other_routes:
+            other_routes = MapService.alternatives_data(
+                route_analyses, best_route_analysis.route_index, response_tolerance
+            )
+
+        return RouteResponse.model_construct(
+            status="success",
+            polyline=polyline.simplify_encoded(best_route_analysis.polyline, response_tolerance),
+            distance=best_route_analysis.distance,
+            duration=best_route_analysis.duration,
+            optimization_used=request.optimization_criteria,
+            route_id=route_id,
+            bonus_type=best_route_analysis.bonus_type,
+            bonus_value=best_route_analysis.bonus_value,
+            max_round_trips=best_route_analysis.max_round_trips,
+            num_nodes=best_route_analysis.num_nodes,
+            total_distance_km=round(best_route_analysis.total_distance_km, 2),
+            other_routes=other_routes,
+            message=f"Optimal route selected with {best_route_analysis.bonus_type} charging bonus "
+                   f"(+{best_route_analysis.bonus_value} units). "
+                   f"Maximum round trips: {best_route_analysis.max_round_trips}. "
+                   f"Route has {best_route_analysis.num_nodes} nodes."
+        )
+
+    @staticmethod
+    async def calculate_optimal_route(db: AsyncSession, user_id: int, request: RouteRequest) -> RouteResponse:
+        # "alternatives" covers cache lookup, waiting on a coalesced call and the upstream fetch.
+        with route_stage_seconds.time("alternatives"):
+            route_analyses = await MapService.get_route_alternatives(request)
+
+        best_route_analysis, error_message = MapService.select_best_route(route_analyses)
+        if best_route_analysis is None:
+            return RouteResponse(status="error", message=error_message)
+
+        with route_stage_seconds.time("build_records"):
+            route_record, map_record = MapService.build_route_records(
+                user_id, request, route_analyses, best_route_analysis
+            )
+        # All rows go out in one flush and one commit; the flush assigns route_record.id.
+        with route_stage_seconds.time("db_commit"):
+            await MapService.add_route_records(
+                db, user_id, [(route_record, map_record, route_analyses, best_route_analysis)]
+            )
+            await db.commit()
+
+        with route_stage_seconds.time("build_response"):
+            return MapService.build_route_response(request, route_analyses, best_route_analysis, route_record.id)
+
+    @staticmethod
+    async def stream_optimal_route(
+        db: AsyncSession,
+        user_id: int,
+        route_analyses: List[RouteAnalysis],
+        request: RouteRequest
+    ) -> AsyncIterator[dict]:
+        """Events for the streaming route endpoint, best route first.
+
+        Yields ``route`` (the selected route, without alternatives or id) as
+        soon as it is known, then one ``alternative`` per other route while
+        the rows are committed in the background, then ``saved`` with the
+        ``route_id`` and finally ``done``. Failures are reported as an
+        ``error`` event.
+        """
+        best_route_analysis, error_message = MapService.select_best_route(route_analyses)
+        if best_route_analysis is None:
+            yield {"event": "error", "message": error_message}
+            return
+
+        route_record, map_record = MapService.build_route_records(
+            user_id, request, route_analyses, best_route_analysis
+        )
+
+        async def persist() -> None:
+            with route_stage_seconds.time("db_commit"):
+                await MapService.add_route_records(
+                    db, user_id, [(route_record, map_record, route_analyses, best_route_analysis)]
                 )
+                await db.commit()
 
-            best_route_analysis = max(feasible_routes, key=lambda x: x["max_round_trips"])
-            best_route = best_route_analysis["route"]
-
-            overview_polyline = best_route.get("polyline", {}).get("encodedPolyline", "")
-            
-            leg = best_route["legs"][0] if best_route.get("legs") and len(best_route["legs"]) > 0 else None
-            if leg:
-                distance_text = leg.get("localizedValues", {}).get("distance", {}).get("text", "")
-                duration_text = leg.get("localizedValues", {}).get("duration", {}).get("text", "")
-            else:
-                distance_text = f"{best_route_analysis['total_distance_km']:.2f} km"
-                duration_text = ""
-
-            route_record = RouteHistory(
-                user_id=user_id,
-                start_lat=request.start_lat,
-                start_lng=request.start_lng,
-                end_lat=request.end_lat,
-                end_lng=request.end_lng,
-                distance=distance_text,
-                duration=duration_text,
-                polyline_data=overview_polyline,
-                optimization_criteria=request.optimization_criteria,
-                bonus_type=best_route_analysis['bonus_type'],
-                bonus_value=best_route_analysis['bonus_value'],
-                max_round_trips=best_route_analysis['max_round_trips'],
-                num_nodes=best_route_analysis['num_nodes'],
-                total_distance_km=best_route_analysis['total_distance_km']
+        commit = asyncio.ensure_future(persist())
+        try:
+            best = MapService.build_route_response(
+                request, route_analyses, best_route_analysis, None, include_other_routes=False
             )
-            db.add(route_record)
-            db.commit()
-            db.refresh(route_record)
+            yield {"event": "route", **best.model_dump(exclude={"route_id", "other_routes"})}
 
-            other_routes_data = []
+            response_tolerance = MapService.response_tolerance(request)
             for analysis in route_analyses:
-                if analysis["route_index"] != best_route_analysis["route_index"]:
-                    route_data = {
-                        "route_index": analysis["route_index"],
-                        "polyline": analysis["route"].get("polyline", {}).get("encodedPolyline", ""),
-                        "num_nodes": analysis["num_nodes"],
-                        "bonus_type": analysis["bonus_type"],
-                        "bonus_value": analysis["bonus_value"],
-                        "total_distance_meters": analysis["total_distance_meters"],
-                        "total_distance_km": analysis["total_distance_km"],
-                        "is_feasible": analysis["is_feasible"],
-                        "max_round_trips": analysis["max_round_trips"]
-                    }
-                    
-                    route_leg = analysis["route"]["legs"][0] if analysis["route"].get("legs") and len(analysis["route"]["legs"]) > 0 else None
-                    if route_leg:
-                        route_data["distance"] = route_leg.get("localizedValues", {}).get("distance", {}).get("text", "")
-                        route_data["duration"] = route_leg.get("localizedValues", {}).get("duration", {}).get("text", "")
-                    else:
-                        route_data["distance"] = f"{analysis['total_distance_km']:.2f} km"
-                        route_data["duration"] = ""
-                    
-                    other_routes_data.append(route_data)
-
-            map_record = Maps(
-                user_id=user_id,
-                selected_route=route_record.id,
-                other_routes=other_routes_data
+                if analysis.route_index != best_route_analysis.route_index:
+                    yield {"event": "alternative", "route": MapService.alternative_data(analysis, response_tolerance)}
+
+            try:
+                await commit
+            except Exception as e:
+                logger.error("Failed to save streamed route: %s", e)
+                await db.rollback()
+                yield {"event": "error", "message": f"Route could not be saved: {str(e)}"}
+                return
+
+            yield {"event": "saved", "route_id": route_record.id}
+            yield {"event": "done"}
+        finally:
+            # The client may disconnect mid-stream; let the commit finish rather than leave it half done.
+            if not commit.done():
+                await asyncio.shield(commit)
+
+    @staticmethod
+    async def calculate_optimal_routes(
+        db: AsyncSession,
+        user_id: int,
+        requests: List[RouteRequest]
+    ) -> BatchRouteResponse:
+        """Calculate many routes with bounded upstream concurrency and persist them in bulk.
+
+        Each route takes its own admission slot while it is calculated, so a
+        batch queues alongside single requests instead of holding the worker;
+        a route turned away by admission control is reported as failed.
+        """
+        semaphore = asyncio.Semaphore(config.BATCH_UPSTREAM_CONCURRENCY)
+
+        async def compute(request: RouteRequest) -> List[RouteAnalysis]:
+            async with semaphore:
+                if not config.ADMISSION_ENABLED:
+                    return await MapService.get_route_alternatives(request)
+                async with route_admission.slot(user_id):
+                    return await MapService.get_route_alternatives(request)
+
+        outcomes = await asyncio.gather(*(compute(request) for request in requests), return_exceptions=True)
+
+        results: List[Optional[RouteResponse]] = [None] * len(requests)
+        selected = []
+        for index, (request, outcome) in enumerate(zip(requests, outcomes)):
+            if isinstance(outcome, Exception):
+                logger.warning("Batch route %d failed: %s", index, outcome)
+                results[index] = RouteResponse(status="error", message=f"Route calculation failed: {str(outcome)}")
+                continue
+
+            best_route_analysis, error_message = MapService.select_best_route(outcome)
+            if best_route_analysis is None:
+                results[index] = RouteResponse(status="error", message=error_message)
+                continue
+
+            route_record, map_record = MapService.build_route_records(
+                user_id, request, outcome, best_route_analysis
             )
-            db.add(map_record)
-            db.commit()
-            db.refresh(map_record)
-
-            return RouteResponse(
-                status="success",
-                polyline=overview_polyline,
-                distance=distance_text,
-                duration=duration_text,
-                optimization_used=request.optimization_criteria,
-                route_id=route_record.id,
-                bonus_type=best_route_analysis['bonus_type'],
-                bonus_value=best_route_analysis['bonus_value'],
-                max_round_trips=best_route_analysis['max_round_trips'],
-                num_nodes=best_route_analysis['num_nodes'],
-                total_distance_km=round(best_route_analysis['total_distance_km'], 2),
-                other_routes=other_routes_data, 
-                message=f"Optimal route selected with {best_route_analysis['bonus_type']} charging bonus "
-                       f"(+{best_route_analysis['bonus_value']} units). "
-                       f"Maximum round trips: {best_route_analysis['max_round_trips']}. "
-                       f"Route has {best_route_analysis['num_nodes']} nodes."
+            selected.append((index, request, outcome, best_route_analysis, route_record, map_record))
+
+        if selected:
+            await MapService.add_route_records(db, user_id, [
+                (route_record, map_record, route_analyses, best_route_analysis)
+                for _, _, route_analyses, best_route_analysis, route_record, map_record in selected
+            ])
+            await db.commit()
+
+        for index, request, route_analyses, best_route_analysis, route_record, _ in selected:
+            results[index] = MapService.build_route_response(
+                request, route_analyses, best_route_analysis, route_record.id
             )
 
+        succeeded = len(selected)
+        failed = len(requests) - succeeded
+        return BatchRouteResponse(
+            status="success" if failed == 0 else ("error" if succeeded == 0 else "partial"),
+            succeeded=succeeded,
+            failed=failed,
+            results=results
+        )
+
+    @staticmethod
+    def sweep_vehicle_feasibility(
+        route_analyses: List[RouteAnalysis],
+        vehicles: List[VehicleProfile],
+        route_id: Optional[int] = None
+    ) -> FeasibilitySweepResponse:
+        """Feasibility and round trips of every vehicle profile on every alternative in one vectorized pass.
+
+        Each alternative keeps the charging bonus it was analysed with. A
+        vehicle's best route is chosen like ``select_best_route``: the
+        feasible alternative with the most round trips, earliest on ties.
+        """
+        if not route_analyses:
+            return FeasibilitySweepResponse(status="error", message="Route calculation failed: No route found")
+
+        total_distance_meters = np.array([analysis.total_distance_meters for analysis in route_analyses])
+        bonus_values = np.array([analysis.bonus_value for analysis in route_analyses])
+        initial_charge = np.array([vehicle.initial_charge for vehicle in vehicles])[:, np.newaxis]
+        charge_per_km = np.array([vehicle.charge_per_km for vehicle in vehicles])[:, np.newaxis]
+
+        # (vehicles, alternatives) matrices
+        is_feasible, max_round_trips = evaluate_feasibility(
+            total_distance_meters, bonus_values, initial_charge, charge_per_km
+        )
+        candidates = np.where(is_feasible, max_round_trips, -1)
+        best_column = candidates.argmax(axis=1)
+        has_feasible = is_feasible.any(axis=1)
+        route_indices = np.array([analysis.route_index for analysis in route_analyses])
+
+        best_route_index = np.where(has_feasible, route_indices[best_column], -1).tolist()
+        best_round_trips = np.maximum(candidates.max(axis=1), 0).tolist()
+        is_feasible_rows = is_feasible.tolist()
+        max_round_trips_rows = max_round_trips.tolist()
+
+        # Built from our own arrays, so validation is skipped.
+        return FeasibilitySweepResponse.model_construct(
+            status="success",
+            route_id=route_id,
+            routes=[
+                SweepRoute.model_construct(
+                    route_index=analysis.route_index,
+                    total_distance_km=round(analysis.total_distance_km, 2),
+                    bonus_type=analysis.bonus_type,
+                    bonus_value=analysis.bonus_value,
+                    distance=analysis.distance,
+                    duration=analysis.duration
+                )
+                for analysis in route_analyses
+            ],
+            vehicles=[
+                VehicleFeasibility.model_construct(
+                    vehicle_id=vehicle.id,
+                    is_feasible=is_feasible_rows[i],
+                    max_round_trips=max_round_trips_rows[i],
+                    best_route_index=best_route_index[i] if best_route_index[i] >= 0 else None,
+                    best_round_trips=best_round_trips[i]
+                )
+                for i, vehicle in enumerate(vehicles)
+            ],
+            feasible_vehicles=int(has_feasible.sum()),
+            message=None
+        )
+
+    @staticmethod
+    async def feasibility_sweep(
+        db: AsyncSession,
+        user_id: int,
+        request: FeasibilitySweepRequest
+    ) -> Optional[FeasibilitySweepResponse]:
+        """Sweep the vehicles over a saved route of the user (None if it isn't theirs) or a calculated one."""
+        if request.route_id is not None:
+            route_record = await RouteStore.get_route(db, request.route_id)
+            if route_record is None or route_record.user_id != user_id:
+                return None
+            route_analyses = await RouteStore.get_route_analyses(db, route_record)
+        else:
+            with route_stage_seconds.time("alternatives"):
+                route_analyses = await MapService.get_route_alternatives(request.route)
+
+        with route_stage_seconds.time("feasibility_sweep"):
+            return MapService.sweep_vehicle_feasibility(route_analyses, request.vehicles, request.route_id)
+
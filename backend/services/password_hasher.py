@@ -0,0 +1,106 @@
+import asyncio
+import bcrypt
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+def _hash_password(password: str, rounds: int) -> str:
+    salt = bcrypt.gensalt(rounds=rounds)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+
+def _verify_password(password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+class PasswordPoolSaturated(Exception):
+    """Raised when too many password operations are already queued."""
+
+
+class PasswordHasher:
+    """Runs bcrypt in a bounded process pool so it never blocks the event loop."""
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    @staticmethod
+    def _mp_context():
+        # Workers are forked from a clean forkserver rather than from the event loop
+        # process. The forkserver preloads this module so bcrypt is imported once, but
+        # each worker still re-imports the parent's __main__, as with spawn.
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])
+        return context
+
+    def start(self) -> None:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=config.PASSWORD_POOL_WORKERS,
+                mp_context=self._mp_context()
+            )
+            logger.info("Password hashing pool started (workers=%s, max_queue=%s)",
+                        config.PASSWORD_POOL_WORKERS, config.PASSWORD_POOL_MAX_QUEUE)
+
+    async def close(self) -> None:
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            # Waiting for the workers to exit blocks, so it happens off the event loop.
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+    async def _run(self, fn, *args):
+        if self.pending >= config.PASSWORD_POOL_MAX_QUEUE:
+            self.rejected += 1
+            raise PasswordPoolSaturated("Password hashing pool is saturated, try again shortly")
+
+        self.start()
+        self.pending += 1
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._executor, fn, *args)
+        except BaseException:
+            # Failures (including a broken pool) stay out of the latency figures.
+            self.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.completed += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash_password, password, config.BCRYPT_ROUNDS)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(_verify_password, password, hashed_password)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "workers": config.PASSWORD_POOL_WORKERS,
+            "max_queue": config.PASSWORD_POOL_MAX_QUEUE,
+            "pending": self.pending,
+            "saturation": self.pending / config.PASSWORD_POOL_MAX_QUEUE if config.PASSWORD_POOL_MAX_QUEUE else 0.0,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_ms": round(self.total_ms / self.completed, 2) if self.completed else 0.0,
+            "max_ms": round(self.max_ms, 2)
+        }
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Hashable, List, Optional
+import orjson
+from config import config
+from services.route_analysis import RouteAnalysis
+
+logger = logging.getLogger(__name__)
+
+# Bump when the stored layout of RouteAnalysis changes so old entries are ignored.
+FORMAT_VERSION = 1
+# Expired and surplus entries are pruned once every this many writes.
+PRUNE_EVERY = 64
+
+
+class PersistentRouteCache:
+    """Disk-backed route cache in its own SQLite file, shared by every worker process.
+
+    Sits behind the in-process ``RouteCache``: a worker that starts cold (or
+    was just redeployed) still finds routes other workers analysed. Entries
+    expire after ``ttl_seconds``; beyond ``max_entries`` the oldest writes are
+    evicted. All SQLite work runs on one dedicated thread with its own
+    connection, and any SQLite error is logged and treated as a miss.
+    """
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: float):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._connection: Optional[sqlite3.Connection] = None
+        self._writes_since_prune = 0
+        self._pending_writes = set()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.errors = 0
+
+    @staticmethod
+    def make_key(key: Hashable) -> str:
+        return f"v{FORMAT_VERSION}|" + "|".join(str(part) for part in key)
+
+    @staticmethod
+    def encode(route_analyses: List[RouteAnalysis]) -> bytes:
+        return orjson.dumps([
+            [getattr(analysis, field) for field in RouteAnalysis.__slots__] for analysis in route_analyses
+        ])
+
+    @staticmethod
+    def decode(value: bytes) -> List[RouteAnalysis]:
+        return [RouteAnalysis(*fields) for fields in orjson.loads(value)]
+
+    def start(self) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="route-cache")
+
+    async def close(self) -> None:
+        # Background writes that have not reached the executor yet are flushed first.
+        if self._pending_writes:
+            await asyncio.gather(*self._pending_writes, return_exceptions=True)
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.get_running_loop().run_in_executor(executor, self._close_connection)
+            await asyncio.to_thread(executor.shutdown)
+
+    def _close_connection(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, isolation_level=None)
+            connection.execute(f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}")
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS route_cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, stored_at REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS ix_route_cache_stored_at ON route_cache (stored_at)")
+            connection.execute("CREATE INDEX IF NOT EXISTS ix_route_cache_expires_at ON route_cache (expires_at)")
+            self._connection = connection
+        return self._connection
+
+    def _get(self, key: str) -> Optional[bytes]:
+        row = self._connect().execute(
+            "SELECT value FROM route_cache WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set(self, key: str, value: bytes) -> None:
+        connection = self._connect()
+        now = time.time()
+        connection.execute(
+            "INSERT OR REPLACE INTO route_cache (key, value, stored_at, expires_at) VALUES (?, ?, ?, ?)",
+            (key, value, now, now + self.ttl_seconds)
+        )
+        self.writes += 1
+        self._writes_since_prune += 1
+        if self._writes_since_prune >= PRUNE_EVERY:
+            self._writes_since_prune = 0
+            self._prune(connection, now)
+
+    def _prune(self, connection: sqlite3.Connection, now: float) -> None:
+        self.expirations += connection.execute("DELETE FROM route_cache WHERE expires_at <= ?", (now,)).rowcount
+        surplus = connection.execute("SELECT COUNT(*) FROM route_cache").fetchone()[0] - self.max_entries
+        if surplus > 0:
+            self.evictions += connection.execute(
+                "DELETE FROM route_cache WHERE key IN (SELECT key FROM route_cache ORDER BY stored_at LIMIT ?)",
+                (surplus,)
+            ).rowcount
+
+    async def _run(self, fn, *args):
+        self.start()
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def get(self, key: Hashable) -> Optional[List[RouteAnalysis]]:
+        try:
+            value = await self._run(self._get, PersistentRouteCache.make_key(key))
+            route_analyses = PersistentRouteCache.decode(value) if value is not None else None
+        except (sqlite3.Error, ValueError, TypeError) as e:
+            self.errors += 1
+            logger.warning("Persistent route cache read failed: %s", e)
+            return None
+
+        if route_analyses is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return route_analyses
+
+    async def set(self, key: Hashable, route_analyses: List[RouteAnalysis]) -> None:
+        if self.max_entries <= 0:
+            return
+        try:
+            await self._run(self._set, PersistentRouteCache.make_key(key), PersistentRouteCache.encode(route_analyses))
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning("Persistent route cache write failed: %s", e)
+
+    def set_in_background(self, key: Hashable, route_analyses: List[RouteAnalysis]) -> None:
+        """Store without making the caller wait for the disk write."""
+        task = asyncio.ensure_future(self.set(key, route_analyses))
+        self._pending_writes.add(task)
+        task.add_done_callback(self._pending_writes.discard)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "pending_writes": len(self._pending_writes),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "errors": self.errors
+        }
+
+
+persistent_route_cache = PersistentRouteCache(
+    path=config.PERSISTENT_ROUTE_CACHE_PATH,
+    max_entries=config.PERSISTENT_ROUTE_CACHE_MAX_ENTRIES,
+    ttl_seconds=config.PERSISTENT_ROUTE_CACHE_TTL_SECONDS
+)
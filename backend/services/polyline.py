@@ -0,0 +1,123 @@
+import math
+import numpy as np
+from typing import List, Optional, Sequence, Tuple
+from services.geo import EARTH_RADIUS_METERS
+
+# Web Mercator ground resolution at the equator for zoom level 0, in metres per pixel.
+METERS_PER_PIXEL_ZOOM_0 = 156543.03392
+
+
+def decode(encoded: str, precision: int = 5) -> List[Tuple[float, float]]:
+    """Decode a Google encoded polyline into ``(lat, lng)`` pairs."""
+    factor = 10 ** precision
+    points = []
+    index = 0
+    lat = 0
+    lng = 0
+    length = len(encoded)
+
+    while index < length:
+        deltas = []
+        for _ in range(2):
+            result = 0
+            shift = 0
+            while True:
+                byte = ord(encoded[index]) - 63
+                index += 1
+                result |= (byte & 0x1f) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+
+        lat += deltas[0]
+        lng += deltas[1]
+        points.append((lat / factor, lng / factor))
+
+    return points
+
+
+def _encode_value(value: int, chunks: List[str]) -> None:
+    value = ~(value << 1) if value < 0 else value << 1
+    while value >= 0x20:
+        chunks.append(chr((0x20 | (value & 0x1f)) + 63))
+        value >>= 5
+    chunks.append(chr(value + 63))
+
+
+def encode(points: Sequence[Tuple[float, float]], precision: int = 5) -> str:
+    """Encode ``(lat, lng)`` pairs as a Google encoded polyline."""
+    factor = 10 ** precision
+    chunks = []
+    prev_lat = 0
+    prev_lng = 0
+
+    for lat, lng in points:
+        lat = int(round(lat * factor))
+        lng = int(round(lng * factor))
+        _encode_value(lat - prev_lat, chunks)
+        _encode_value(lng - prev_lng, chunks)
+        prev_lat = lat
+        prev_lng = lng
+
+    return "".join(chunks)
+
+
+def zoom_to_tolerance(zoom: float, latitude: float = 0.0, pixels: float = 1.0) -> float:
+    """Ground distance in metres covered by ``pixels`` screen pixels at a map zoom level."""
+    return METERS_PER_PIXEL_ZOOM_0 * math.cos(math.radians(latitude)) / (2 ** zoom) * pixels
+
+
+def simplify(points: Sequence[Tuple[float, float]], tolerance_meters: float) -> List[Tuple[float, float]]:
+    """Douglas-Peucker simplification with a tolerance in metres.
+
+    Points are projected onto a local equirectangular plane, which is accurate
+    enough for the distances involved in route display.
+    """
+    if tolerance_meters <= 0 or len(points) < 3:
+        return list(points)
+
+    coords = np.asarray(points, dtype=np.float64)
+    lat0 = math.radians(float(coords[:, 0].mean()))
+    y = np.radians(coords[:, 0]) * EARTH_RADIUS_METERS
+    x = np.radians(coords[:, 1]) * EARTH_RADIUS_METERS * math.cos(lat0)
+
+    keep = np.zeros(len(coords), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(coords) - 1)]
+
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+
+        dx = x[last] - x[first]
+        dy = y[last] - y[first]
+        px = x[first + 1:last] - x[first]
+        py = y[first + 1:last] - y[first]
+        segment_length_sq = dx * dx + dy * dy
+        if segment_length_sq == 0:
+            distances = np.hypot(px, py)
+        else:
+            distances = np.abs(dx * py - dy * px) / math.sqrt(segment_length_sq)
+
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance_meters:
+            split = first + 1 + farthest
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+
+    return [points[i] for i in np.flatnonzero(keep)]
+
+
+def simplify_encoded(encoded: str, tolerance_meters: Optional[float]) -> str:
+    """Simplify an encoded polyline, returning it unchanged when no tolerance applies."""
+    if not encoded or not tolerance_meters or tolerance_meters <= 0:
+        return encoded
+
+    points = decode(encoded)
+    simplified = simplify(points, tolerance_meters)
+    if len(simplified) == len(points):
+        return encoded
+    return encode(simplified)
@@ -0,0 +1,276 @@
+import asyncio
+import json
+import linecache
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+from config import config
+from services.access_tokens import AccessTokens
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ID_PATTERN = re.compile(r"^[0-9]{8}T[0-9]{6}Z-[0-9a-f]{8}$")
+
+# Threads parked in these files, or on a line making one of these calls, are
+# waiting for work (e.g. the aiosqlite thread blocked on its queue) rather than doing any.
+_IDLE_FILES = ("threading.py", "queue.py", os.path.join("concurrent", "futures", "thread.py"))
+_IDLE_CALL = re.compile(r"\.(get|wait|acquire|select|poll)\(")
+# Frames of the loop machinery itself; everything up to the last of them is dropped
+# from event loop samples so stacks start at the running coroutine.
+_LOOP_FILES = tuple(os.path.join("asyncio", name) for name in ("runners.py", "base_events.py", "events.py"))
+_MAX_DEPTH = 128
+
+
+class RequestProfile:
+    """Collapsed stacks sampled while one request was being handled."""
+
+    def __init__(self, method: str, path: str, loop: asyncio.AbstractEventLoop, task: Optional[asyncio.Task]):
+        self.id = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{uuid.uuid4().hex[:8]}"
+        self.method = method
+        self.path = path
+        self.loop = loop
+        self.loop_thread_id = threading.get_ident()
+        self.task = task
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started = time.perf_counter()
+        self.duration_ms = 0.0
+        self.status: Optional[int] = None
+
+    def metadata(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "duration_ms": round(self.duration_ms, 2),
+            "samples": self.samples,
+            "interval_ms": config.PROFILING_INTERVAL_MS
+        }
+
+    def save(self, directory: Path) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        lines = [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+        (directory / f"{self.id}.folded").write_text("\n".join(lines) + "\n")
+        (directory / f"{self.id}.json").write_text(json.dumps(self.metadata()))
+
+
+class StackSampler:
+    """Background thread that samples every busy thread while profiles are active.
+
+    Samples from the event loop thread are prefixed with the task that was
+    running: ``request`` for the profiled request's own task, ``idle`` when
+    the loop was waiting on I/O, otherwise the task's coroutine name. A request that is slow because another task held
+    the loop therefore shows that task's frames rather than its own. Other
+    threads (the aiosqlite connection thread, ``to_thread`` workers) are
+    prefixed with ``thread:<name>`` and skipped while they are idle.
+    """
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._profiles: List[RequestProfile] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._labels: Dict[object, str] = {}
+        self._idle_lines: Dict[tuple, bool] = {}
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def remove(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles.remove(profile)
+            if not self._profiles:
+                self._wakeup.clear()
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _is_idle(self, frame) -> bool:
+        code = frame.f_code
+        if code.co_filename.endswith(_IDLE_FILES):
+            return True
+        key = (code, frame.f_lineno)
+        idle = self._idle_lines.get(key)
+        if idle is None:
+            idle = bool(_IDLE_CALL.search(linecache.getline(code.co_filename, frame.f_lineno)))
+            self._idle_lines[key] = idle
+        return idle
+
+    def _stack(self, frame, trim_loop: bool = False) -> List[str]:
+        stack = []
+        while frame is not None and len(stack) < _MAX_DEPTH:
+            if trim_loop and frame.f_code.co_filename.endswith(_LOOP_FILES):
+                break
+            stack.append(self._label(frame.f_code))
+            frame = frame.f_back
+        stack.reverse()
+        return stack
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while True:
+            self._wakeup.wait()
+            time.sleep(self.interval_seconds)
+
+            with self._lock:
+                profiles = list(self._profiles)
+            if not profiles:
+                continue
+
+            frames = sys._current_frames()
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            loop_threads = {profile.loop_thread_id for profile in profiles}
+            others = []
+            for thread_id, frame in frames.items():
+                if thread_id == own_id or thread_id in loop_threads:
+                    continue
+                if self._is_idle(frame):
+                    continue
+                others.append(";".join([f"thread:{thread_names.get(thread_id, thread_id)}"] + self._stack(frame)))
+
+            loop_stacks = {}
+            for profile in profiles:
+                frame = frames.get(profile.loop_thread_id)
+                if frame is not None:
+                    task = asyncio.current_task(profile.loop)
+                    if task is None:
+                        owner = "idle"
+                    elif task is profile.task:
+                        owner = "request"
+                    else:
+                        owner = f"task:{getattr(task.get_coro(), '__qualname__', task.get_name())}"
+                    loop_stacks[profile] = ";".join([owner] + self._stack(frame, trim_loop=True))
+
+            # Counted under the lock, and only into profiles still registered, so once
+            # remove() returns a profile's stacks no longer change and it can be saved.
+            sampled = set(profiles)
+            with self._lock:
+                for profile in self._profiles:
+                    if profile not in sampled:
+                        continue
+                    if profile in loop_stacks:
+                        profile.stacks[loop_stacks[profile]] += 1
+                    for stack in others:
+                        profile.stacks[stack] += 1
+                    profile.samples += 1
+
+
+class ProfileStore:
+    """Profiles on disk under ``config.PROFILING_DIR``, oldest pruned beyond the limit."""
+
+    def __init__(self, directory: str, max_profiles: int):
+        self.directory = Path(directory)
+        self.max_profiles = max_profiles
+
+    def path(self, profile_id: str, suffix: str) -> Optional[Path]:
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        path = self.directory / f"{profile_id}{suffix}"
+        return path if path.exists() else None
+
+    def list(self) -> List[dict]:
+        if not self.directory.exists():
+            return []
+        profiles = []
+        for meta in sorted(self.directory.glob("*.json"), reverse=True):
+            try:
+                profiles.append(json.loads(meta.read_text()))
+            except (OSError, ValueError):
+                continue
+        return profiles
+
+    def save(self, profile: RequestProfile) -> None:
+        profile.save(self.directory)
+        metas = sorted(self.directory.glob("*.json"))
+        for meta in metas[:max(0, len(metas) - self.max_profiles)]:
+            meta.unlink(missing_ok=True)
+            meta.with_suffix(".folded").unlink(missing_ok=True)
+
+
+sampler = StackSampler(config.PROFILING_INTERVAL_MS / 1000)
+profile_store = ProfileStore(config.PROFILING_DIR, config.PROFILING_MAX_PROFILES)
+
+
+def is_profiling_user(authorization: Optional[bytes]) -> bool:
+    """Whether a request's bearer token belongs to one of ``PROFILING_USER_IDS``.
+
+    Checked before routing, so only the token itself counts (no database lookup).
+    """
+    if not authorization or not config.PROFILING_USER_IDS:
+        return False
+    scheme, _, token = authorization.decode("latin-1").partition(" ")
+    if scheme.lower() != "bearer":
+        return False
+    try:
+        return AccessTokens.verify(token.strip()) in config.PROFILING_USER_IDS
+    except ValueError:
+        return False
+
+
+class ProfilingMiddleware:
+    """Profiles requests that carry the trigger header or are picked by the sample rate.
+
+    The trigger header is only honoured for ``PROFILING_USER_IDS``; anyone
+    else is profiled at ``PROFILING_SAMPLE_RATE`` like a request without it.
+    The profile id is returned in the ``X-Profile-Id`` response header and the
+    collapsed stacks can be fetched from ``/profiles/{id}``.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.header = config.PROFILING_HEADER.lower().encode("latin-1")
+
+    def should_profile(self, scope) -> bool:
+        if scope["path"].startswith("/profiles"):
+            return False
+        headers = dict(scope["headers"])
+        value = headers.get(self.header)
+        if value is not None and is_profiling_user(headers.get(b"authorization")):
+            return value not in (b"", b"0", b"false")
+        return config.PROFILING_SAMPLE_RATE > 0 and random.random() < config.PROFILING_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"], asyncio.get_running_loop(), asyncio.current_task())
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile.id.encode("latin-1"))
+                ]
+            await send(message)
+
+        sampler.add(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.remove(profile)
+            profile.duration_ms = (time.perf_counter() - profile.started) * 1000
+            try:
+                await asyncio.to_thread(profile_store.save, profile)
+            except OSError as e:
+                logger.warning("Could not save profile %s: %s", profile.id, e)
@@ -0,0 +1,198 @@
+import numpy as np
+from typing import Callable, List, Tuple
+
+
+class RouteAnalysis:
+    """Analysed metrics for one route alternative."""
+
+    __slots__ = (
+        "route_index",
+        "polyline",
+        "distance",
+        "duration",
+        "num_nodes",
+        "bonus_type",
+        "bonus_value",
+        "total_distance_meters",
+        "total_distance_km",
+        "is_feasible",
+        "max_round_trips"
+    )
+
+    def __init__(
+        self,
+        route_index: int,
+        polyline: str,
+        distance: str,
+        duration: str,
+        num_nodes: int,
+        bonus_type: str,
+        bonus_value: int,
+        total_distance_meters: int,
+        total_distance_km: float,
+        is_feasible: bool,
+        max_round_trips: int
+    ):
+        self.route_index = route_index
+        self.polyline = polyline
+        self.distance = distance
+        self.duration = duration
+        self.num_nodes = num_nodes
+        self.bonus_type = bonus_type
+        self.bonus_value = bonus_value
+        self.total_distance_meters = total_distance_meters
+        self.total_distance_km = total_distance_km
+        self.is_feasible = is_feasible
+        self.max_round_trips = max_round_trips
+
+    def to_dict(self) -> dict:
+        return {
+            "route_index": self.route_index,
+            "polyline": self.polyline,
+            "num_nodes": self.num_nodes,
+            "bonus_type": self.bonus_type,
+            "bonus_value": self.bonus_value,
+            "total_distance_meters": self.total_distance_meters,
+            "total_distance_km": self.total_distance_km,
+            "is_feasible": self.is_feasible,
+            "max_round_trips": self.max_round_trips,
+            "distance": self.distance,
+            "duration": self.duration
+        }
+
+
+class RouteColumns:
+    """Step endpoints and distances of every alternative, flattened into arrays.
+
+    ``step_route[i]`` is the alternative that step ``i`` belongs to.
+    """
+
+    __slots__ = ("num_routes", "step_route", "start_lat", "start_lng", "end_lat", "end_lng", "distance_meters")
+
+    def __init__(self, routes: List[dict]):
+        step_route = []
+        start_lat = []
+        start_lng = []
+        end_lat = []
+        end_lng = []
+        distance_meters = []
+
+        for route_index, route in enumerate(routes):
+            for leg in route.get("legs", []):
+                for step in leg.get("steps", []):
+                    start = step.get("startLocation", {}).get("latLng", {})
+                    end = step.get("endLocation", {}).get("latLng", {})
+                    step_route.append(route_index)
+                    start_lat.append(start.get("latitude") or 0.0)
+                    start_lng.append(start.get("longitude") or 0.0)
+                    end_lat.append(end.get("latitude") or 0.0)
+                    end_lng.append(end.get("longitude") or 0.0)
+                    distance_meters.append(step.get("distanceMeters", 0))
+
+        self.num_routes = len(routes)
+        self.step_route = np.array(step_route, dtype=np.int64)
+        self.start_lat = np.array(start_lat, dtype=np.float64)
+        self.start_lng = np.array(start_lng, dtype=np.float64)
+        self.end_lat = np.array(end_lat, dtype=np.float64)
+        self.end_lng = np.array(end_lng, dtype=np.float64)
+        self.distance_meters = np.array(distance_meters, dtype=np.int64)
+
+    def total_distance_meters(self) -> np.ndarray:
+        # Every step counts towards the distance, including ones without coordinates.
+        totals = np.bincount(self.step_route, weights=self.distance_meters, minlength=self.num_routes)
+        return totals.astype(np.int64)
+
+    def unique_node_counts(self) -> np.ndarray:
+        # Steps with a missing (or zero) coordinate are not part of the route graph.
+        valid = (self.start_lat != 0) & (self.start_lng != 0) & (self.end_lat != 0) & (self.end_lng != 0)
+        route = np.concatenate((self.step_route[valid], self.step_route[valid]))
+        lat = np.concatenate((self.start_lat[valid], self.end_lat[valid]))
+        lng = np.concatenate((self.start_lng[valid], self.end_lng[valid]))
+        if len(route) == 0:
+            return np.zeros(self.num_routes, dtype=np.int64)
+
+        # Sort nodes by (route, lat, lng); a node is new wherever any key changes.
+        order = np.lexsort((lng, lat, route))
+        route, lat, lng = route[order], lat[order], lng[order]
+        is_new = np.empty(len(route), dtype=bool)
+        is_new[0] = True
+        is_new[1:] = (route[1:] != route[:-1]) | (lat[1:] != lat[:-1]) | (lng[1:] != lng[:-1])
+        return np.bincount(route[is_new], minlength=self.num_routes)
+
+
+def evaluate_feasibility(
+    total_distance_meters: np.ndarray,
+    bonus_values: np.ndarray,
+    initial_charge,
+    charge_per_km
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Whether each route can be driven on the available charge, and how many round trips fit.
+
+    The charge available is ``initial_charge + bonus_value`` and one trip needs
+    ``distance_km * charge_per_km``. A route is feasible when the charge covers
+    one trip, and the round trips are ``floor(charge / (2 * trip_charge))``.
+    Inputs broadcast against each other, so per-route distances can be evaluated
+    against one charge profile or against a column of profiles at once. A trip
+    that needs no charge (zero length or ``charge_per_km=0``) is feasible with
+    zero round trips.
+    """
+    total_distance_km = np.asarray(total_distance_meters, dtype=np.float64) / 1000.0
+    total_charge = np.asarray(initial_charge, dtype=np.float64) + np.asarray(bonus_values, dtype=np.float64)
+    charge_needed_per_trip = total_distance_km * np.asarray(charge_per_km, dtype=np.float64)
+
+    is_feasible = total_charge >= charge_needed_per_trip
+    charge_needed_per_round_trip = charge_needed_per_trip * 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        round_trips = np.floor(total_charge / charge_needed_per_round_trip)
+    max_round_trips = np.where(is_feasible & (charge_needed_per_round_trip > 0), round_trips, 0).astype(np.int64)
+
+    return is_feasible, max_round_trips
+
+
+def analyze_routes(
+    routes: List[dict],
+    determine_bonus: Callable[[int], Tuple[str, int]],
+    initial_charge,
+    charge_per_km
+) -> List[RouteAnalysis]:
+    """Analyse every alternative of a computeRoutes response in one batched pass."""
+    if not routes:
+        return []
+
+    columns = RouteColumns(routes)
+    num_nodes = columns.unique_node_counts()
+    total_distance_meters = columns.total_distance_meters()
+
+    bonuses = [determine_bonus(int(count)) for count in num_nodes]
+    bonus_values = np.array([bonus_value for _, bonus_value in bonuses], dtype=np.int64)
+    is_feasible, max_round_trips = evaluate_feasibility(
+        total_distance_meters, bonus_values, initial_charge, charge_per_km
+    )
+
+    analyses = []
+    for i, route in enumerate(routes):
+        total_distance_km = int(total_distance_meters[i]) / 1000.0
+
+        leg = route["legs"][0] if route.get("legs") and len(route["legs"]) > 0 else None
+        if leg:
+            distance_text = leg.get("localizedValues", {}).get("distance", {}).get("text", "")
+            duration_text = leg.get("localizedValues", {}).get("duration", {}).get("text", "")
+        else:
+            distance_text = f"{total_distance_km:.2f} km"
+            duration_text = ""
+
+        analyses.append(RouteAnalysis(
+            route_index=i,
+            polyline=route.get("polyline", {}).get("encodedPolyline", ""),
+            distance=distance_text,
+            duration=duration_text,
+            num_nodes=int(num_nodes[i]),
+            bonus_type=bonuses[i][0],
+            bonus_value=bonuses[i][1],
+            total_distance_meters=int(total_distance_meters[i]),
+            total_distance_km=total_distance_km,
+            is_feasible=bool(is_feasible[i]),
+            max_round_trips=int(max_round_trips[i])
+        ))
+
+    return analyses
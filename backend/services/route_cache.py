@@ -0,0 +1,81 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+from schemas.route_schemas import RouteRequest
+from config import config
+
+
+class TTLCache:
+    """Bounded in-process LRU cache with per-entry TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+
+class RouteCache(TTLCache):
+    """TTL cache of analysed routes keyed by rounded request coordinates."""
+
+    @staticmethod
+    def make_key(request: RouteRequest, precision: int = None) -> Tuple:
+        if precision is None:
+            precision = config.ROUTE_CACHE_PRECISION
+        return (
+            round(request.start_lat, precision),
+            round(request.start_lng, precision),
+            round(request.end_lat, precision),
+            round(request.end_lng, precision),
+            request.mode,
+            request.optimization_criteria
+        )
+
+
+route_cache = RouteCache(
+    max_entries=config.ROUTE_CACHE_MAX_ENTRIES,
+    ttl_seconds=config.ROUTE_CACHE_TTL_SECONDS
+)
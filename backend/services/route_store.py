@@ -0,0 +1,219 @@
+import hashlib
+import math
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Iterable, List, Optional, Tuple
+from config import config
+from models import Maps, Polylines, RouteAlternatives, RouteHistory
+from models.route_spatial_index import route_history_rtree
+from schemas.route_schemas import RouteRequest
+from services import polyline
+from services.geo import EARTH_RADIUS_METERS, haversine_meters
+from services.route_analysis import RouteAnalysis
+
+# Bounding-box candidates checked exactly for one nearby-route lookup, newest first.
+NEARBY_CANDIDATE_LIMIT = 64
+
+
+class RouteStore:
+    """Persistence for route alternatives and the shared polyline store."""
+
+    @staticmethod
+    def polyline_hash(encoded: str) -> bytes:
+        return hashlib.sha1(encoded.encode("ascii")).digest()
+
+    @staticmethod
+    async def save_polylines(db: AsyncSession, encoded_polylines: Iterable[str]) -> Dict[str, int]:
+        """Store polylines that are not already present and return their ids.
+
+        Uses INSERT ... ON CONFLICT DO NOTHING so concurrent workers storing
+        the same geometry don't collide on the unique hash.
+        """
+        hashes = {encoded: RouteStore.polyline_hash(encoded) for encoded in encoded_polylines}
+        if not hashes:
+            return {}
+
+        await db.execute(
+            sqlite_insert(Polylines)
+            .values([{"hash": digest, "encoded": encoded} for encoded, digest in hashes.items()])
+            .on_conflict_do_nothing(index_elements=["hash"])
+        )
+        result = await db.execute(
+            select(Polylines.hash, Polylines.id).where(Polylines.hash.in_(list(hashes.values())))
+        )
+        ids = dict(result.all())
+        return {encoded: ids[digest] for encoded, digest in hashes.items()}
+
+    @staticmethod
+    async def add_alternatives(
+        db: AsyncSession,
+        routes: List[Tuple[RouteHistory, List[RouteAnalysis], int]]
+    ) -> None:
+        """Add rows for the non-selected alternatives of each ``(record, analyses, best_index)``.
+
+        The rows reference their RouteHistory through the relationship, so
+        they are inserted in the same flush as the (still pending) records.
+        """
+        pending = []
+        for route_record, route_analyses, best_route_index in routes:
+            for analysis in route_analyses:
+                if analysis.route_index != best_route_index:
+                    encoded = polyline.simplify_encoded(analysis.polyline, config.POLYLINE_STORAGE_TOLERANCE_M)
+                    pending.append((route_record, analysis, encoded))
+
+        polyline_ids = await RouteStore.save_polylines(db, (encoded for _, _, encoded in pending))
+
+        db.add_all([
+            RouteAlternatives(
+                route_history=route_record,
+                route_index=analysis.route_index,
+                polyline_id=polyline_ids[encoded],
+                distance_meters=analysis.total_distance_meters,
+                num_nodes=analysis.num_nodes,
+                bonus_type=analysis.bonus_type,
+                bonus_value=analysis.bonus_value,
+                is_feasible=analysis.is_feasible,
+                max_round_trips=analysis.max_round_trips,
+                distance=analysis.distance,
+                duration=analysis.duration
+            )
+            for route_record, analysis, encoded in pending
+        ])
+
+    @staticmethod
+    async def get_route(db: AsyncSession, route_id: int) -> Optional[RouteHistory]:
+        result = await db.execute(select(RouteHistory).where(RouteHistory.id == route_id))
+        return result.scalars().first()
+
+    @staticmethod
+    async def get_route_owner(db: AsyncSession, route_id: int) -> Optional[int]:
+        result = await db.execute(select(RouteHistory.user_id).where(RouteHistory.id == route_id))
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def get_alternatives(
+        db: AsyncSession,
+        route_id: int,
+        tolerance_meters: Optional[float] = None
+    ) -> List[dict]:
+        """Alternatives of a saved route in the ``other_routes`` response shape."""
+        result = await db.execute(
+            select(RouteAlternatives, Polylines.encoded)
+            .join(Polylines, RouteAlternatives.polyline_id == Polylines.id)
+            .where(RouteAlternatives.route_history_id == route_id)
+            .order_by(RouteAlternatives.route_index)
+        )
+        rows = result.all()
+
+        if not rows:
+            # Routes saved before route_alternatives existed keep theirs on the Maps row.
+            legacy = await db.execute(
+                select(Maps.other_routes).where(Maps.selected_route == route_id).limit(1)
+            )
+            other_routes = legacy.scalar_one_or_none() or []
+            for route_data in other_routes:
+                route_data["polyline"] = polyline.simplify_encoded(route_data.get("polyline"), tolerance_meters)
+            return other_routes
+
+        return [
+            {
+                "route_index": alternative.route_index,
+                "polyline": polyline.simplify_encoded(encoded, tolerance_meters),
+                "num_nodes": alternative.num_nodes,
+                "bonus_type": alternative.bonus_type,
+                "bonus_value": alternative.bonus_value,
+                "total_distance_meters": alternative.distance_meters,
+                "total_distance_km": alternative.distance_meters / 1000.0,
+                "is_feasible": alternative.is_feasible,
+                "max_round_trips": alternative.max_round_trips,
+                "distance": alternative.distance,
+                "duration": alternative.duration
+            }
+            for alternative, encoded in rows
+        ]
+
+    @staticmethod
+    async def find_nearby_route(
+        db: AsyncSession,
+        request: RouteRequest,
+        radius_meters: float,
+        max_age_seconds: float
+    ) -> Optional[RouteHistory]:
+        """The saved route whose start and end both lie within ``radius_meters`` of the request's.
+
+        Candidates come from the R*Tree bounding-box query, limited to routes
+        with the same optimization criteria saved in the last
+        ``max_age_seconds``; the closest one by great-circle distance wins.
+        """
+        delta_lat = math.degrees(radius_meters / EARTH_RADIUS_METERS)
+
+        def delta_lng(lat: float) -> float:
+            return delta_lat / max(math.cos(math.radians(lat)), 1e-6)
+
+        rtree = route_history_rtree.c
+        start_dlng = delta_lng(request.start_lat)
+        end_dlng = delta_lng(request.end_lat)
+        result = await db.execute(
+            select(RouteHistory)
+            .join(route_history_rtree, rtree.id == RouteHistory.id)
+            .where(
+                rtree.max_start_lat >= request.start_lat - delta_lat,
+                rtree.min_start_lat <= request.start_lat + delta_lat,
+                rtree.max_start_lng >= request.start_lng - start_dlng,
+                rtree.min_start_lng <= request.start_lng + start_dlng,
+                rtree.max_end_lat >= request.end_lat - delta_lat,
+                rtree.min_end_lat <= request.end_lat + delta_lat,
+                rtree.max_end_lng >= request.end_lng - end_dlng,
+                rtree.min_end_lng <= request.end_lng + end_dlng,
+                RouteHistory.optimization_criteria == request.optimization_criteria,
+                RouteHistory.created_at >= datetime.utcnow() - timedelta(seconds=max_age_seconds),
+                RouteHistory.polyline_data.isnot(None)
+            )
+            .order_by(RouteHistory.created_at.desc())
+            .limit(NEARBY_CANDIDATE_LIMIT)
+        )
+        candidates = result.scalars().all()
+        if not candidates:
+            return None
+
+        start_offsets = haversine_meters(
+            request.start_lat, request.start_lng,
+            [route.start_lat for route in candidates], [route.start_lng for route in candidates]
+        )
+        end_offsets = haversine_meters(
+            request.end_lat, request.end_lng,
+            [route.end_lat for route in candidates], [route.end_lng for route in candidates]
+        )
+        within = (start_offsets <= radius_meters) & (end_offsets <= radius_meters)
+        if not within.any():
+            return None
+        # Ties (same offsets) go to the newest route, which comes first.
+        offsets = (start_offsets + end_offsets)[within]
+        return [route for route, keep in zip(candidates, within) if keep][int(offsets.argmin())]
+
+    @staticmethod
+    async def get_route_analyses(db: AsyncSession, route_record: RouteHistory) -> List[RouteAnalysis]:
+        """Rebuild the analysed alternatives of a saved route, the selected one included."""
+        alternatives = [RouteAnalysis(**route) for route in await RouteStore.get_alternatives(db, route_record.id)]
+        # Only the selected route's index isn't stored; it is the one the alternatives leave out.
+        taken = {analysis.route_index for analysis in alternatives}
+        best_route_index = next(index for index in range(len(taken) + 1) if index not in taken)
+
+        total_distance_km = route_record.total_distance_km or 0.0
+        selected = RouteAnalysis(
+            route_index=best_route_index,
+            polyline=route_record.polyline_data,
+            distance=route_record.distance,
+            duration=route_record.duration,
+            num_nodes=route_record.num_nodes,
+            bonus_type=route_record.bonus_type,
+            bonus_value=route_record.bonus_value,
+            total_distance_meters=int(round(total_distance_km * 1000)),
+            total_distance_km=total_distance_km,
+            # Only feasible routes are ever selected and saved.
+            is_feasible=True,
+            max_round_trips=route_record.max_round_trips
+        )
+        return sorted([selected, *alternatives], key=lambda analysis: analysis.route_index)
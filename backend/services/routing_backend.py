@@ -0,0 +1,186 @@
+import asyncio
+import json
+import logging
+import time
+from typing import List, Optional
+from config import config
+from schemas.route_schemas import RouteRequest
+from services.upstream_resilience import google_routes_upstream
+from services.metrics import route_stage_seconds
+
+logger = logging.getLogger(__name__)
+
+# Response fields MapService actually reads from computeRoutes; everything else is
+# left out of the field mask so the upstream does not build or send it.
+ROUTE_FIELD_MASK = (
+    "routes.legs.steps.distanceMeters",
+    "routes.legs.steps.startLocation.latLng",
+    "routes.legs.steps.endLocation.latLng",
+    "routes.legs.localizedValues.distance.text",
+    "routes.legs.localizedValues.duration.text",
+    "routes.polyline.encodedPolyline",
+)
+
+
+class RoutingBackend:
+    """Source of route alternatives in the computeRoutes response shape.
+
+    Implementations return a list of route dicts with ``legs[].steps[]``
+    (``distanceMeters``, ``startLocation``/``endLocation`` ``latLng``),
+    ``legs[].localizedValues`` and ``polyline.encodedPolyline``.
+    """
+
+    name = "base"
+
+    async def start(self) -> None:
+        """Load anything the backend needs before serving requests."""
+
+    async def compute_routes(self, request: RouteRequest) -> List[dict]:
+        raise NotImplementedError
+
+
+class GoogleRoutesBackend(RoutingBackend):
+    name = "google"
+
+    @staticmethod
+    def build_field_mask() -> str:
+        fields = list(ROUTE_FIELD_MASK)
+        for field in config.ROUTES_EXTRA_FIELDS:
+            if field not in fields:
+                fields.append(field)
+        return ",".join(fields)
+
+    async def compute_routes(self, request: RouteRequest) -> List[dict]:
+        google_api_key = config.GOOGLE_MAPS_API_KEY #os.getenv("GOOGLE_DIRECTIONS_API_KEY")
+
+        if not google_api_key:
+            raise ValueError("Google Directions API key not configured")
+
+        headers = {
+            "X-Goog-Api-Key": google_api_key,
+            "X-Goog-FieldMask": GoogleRoutesBackend.build_field_mask(),
+            "Content-Type": "application/json"
+        }
+        body = {
+            "origin": {
+                "location": {
+                    "latLng": {
+                        "latitude": request.start_lat,
+                        "longitude": request.start_lng
+                    }
+                }
+            },
+            "destination": {
+                "location": {
+                    "latLng": {
+                        "latitude": request.end_lat,
+                        "longitude": request.end_lng
+                    }
+                }
+            },
+            "travelMode": "DRIVE",
+            "languageCode": "en-US",
+            "units": "METRIC",
+            "computeAlternativeRoutes": True
+        }
+
+        request_content = json.dumps(body).encode("utf-8")
+        with route_stage_seconds.time("upstream"):
+            response = await google_routes_upstream.post(
+                config.GOOGLE_ROUTES_API_URL, headers=headers, content=request_content
+            )
+
+        decode_started = time.perf_counter()
+        route_data = response.json()
+        decode_seconds = time.perf_counter() - decode_started
+        route_stage_seconds.observe(decode_seconds, "decode")
+        decode_ms = decode_seconds * 1000
+        logger.info("computeRoutes: sent %d bytes, received %d bytes, JSON decode %.2f ms",
+                    len(request_content), len(response.content), decode_ms)
+
+        return route_data.get("routes", [])
+
+
+class LocalRoutingBackend(RoutingBackend):
+    """Routes on a local road graph (see services/local_router.py); no network involved."""
+
+    name = "local"
+
+    def __init__(self, graph_path: str):
+        self.graph_path = graph_path
+        self._graph = None
+        self._lock = asyncio.Lock()
+
+    async def get_graph(self):
+        if self._graph is None:
+            async with self._lock:
+                if self._graph is None:
+                    from services.local_router import LocalRoadGraph
+                    self._graph = await asyncio.to_thread(
+                        LocalRoadGraph.load,
+                        self.graph_path,
+                        config.LOCAL_DEFAULT_SPEED_KMH,
+                        config.LOCAL_NUM_LANDMARKS
+                    )
+        return self._graph
+
+    async def start(self) -> None:
+        if self.graph_path:
+            await self.get_graph()
+
+    def _compute(self, graph, request: RouteRequest) -> List[dict]:
+        source = graph.nearest_node(request.start_lat, request.start_lng, config.LOCAL_MAX_SNAP_METERS)
+        target = graph.nearest_node(request.end_lat, request.end_lng, config.LOCAL_MAX_SNAP_METERS)
+        if source is None or target is None:
+            return []
+
+        kind = "length" if request.optimization_criteria == "shortest" else "time"
+        paths = graph.alternative_paths(source, target, config.LOCAL_ALTERNATIVES, kind=kind)
+        return [graph.path_to_route(path) for path in paths]
+
+    async def compute_routes(self, request: RouteRequest) -> List[dict]:
+        if not self.graph_path:
+            raise ValueError("Local routing graph not configured")
+
+        graph = await self.get_graph()
+        with route_stage_seconds.time("local_routing"):
+            return await asyncio.to_thread(self._compute, graph, request)
+
+
+class AutoRoutingBackend(RoutingBackend):
+    """Serves from the local graph when it covers the trip and falls back to Google otherwise."""
+
+    name = "auto"
+
+    def __init__(self, local: LocalRoutingBackend, remote: RoutingBackend):
+        self.local = local
+        self.remote = remote
+
+    async def start(self) -> None:
+        await self.local.start()
+        await self.remote.start()
+
+    async def compute_routes(self, request: RouteRequest) -> List[dict]:
+        if self.local.graph_path:
+            try:
+                routes = await self.local.compute_routes(request)
+                if routes:
+                    return routes
+            except Exception as e:
+                logger.warning("Local routing failed, falling back to %s: %s", self.remote.name, e)
+        return await self.remote.compute_routes(request)
+
+
+_routing_backend: Optional[RoutingBackend] = None
+
+
+def get_routing_backend() -> RoutingBackend:
+    global _routing_backend
+    if _routing_backend is None:
+        if config.ROUTING_BACKEND == "local":
+            _routing_backend = LocalRoutingBackend(config.LOCAL_GRAPH_PATH)
+        elif config.ROUTING_BACKEND == "auto":
+            _routing_backend = AutoRoutingBackend(LocalRoutingBackend(config.LOCAL_GRAPH_PATH), GoogleRoutesBackend())
+        else:
+            _routing_backend = GoogleRoutesBackend()
+    return _routing_backend
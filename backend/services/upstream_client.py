@@ -0,0 +1,94 @@
+import httpx
+import logging
+from typing import Dict, Optional
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamClient:
+    """Application-scoped HTTP client for upstream APIs.
+
+    A single pooled ``httpx.AsyncClient`` is created on startup and reused by
+    every request so TCP/TLS connections (and HTTP/2 streams) stay warm.
+    """
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self.requests_total = 0
+        self.requests_in_flight = 0
+        self.errors_total = 0
+
+    def _build_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=config.UPSTREAM_MAX_CONNECTIONS,
+            max_keepalive_connections=config.UPSTREAM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=config.UPSTREAM_KEEPALIVE_EXPIRY
+        )
+        timeout = httpx.Timeout(
+            connect=config.UPSTREAM_CONNECT_TIMEOUT,
+            read=config.UPSTREAM_READ_TIMEOUT,
+            write=config.UPSTREAM_WRITE_TIMEOUT,
+            pool=config.UPSTREAM_POOL_TIMEOUT
+        )
+        http2 = config.UPSTREAM_HTTP2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("UPSTREAM_HTTP2 is enabled but the 'h2' package is missing; falling back to HTTP/1.1")
+                http2 = False
+
+        return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+
+    async def start(self) -> None:
+        if self._client is None:
+            self._client = self._build_client()
+            logger.info("Upstream HTTP client started (max_connections=%s, http2=%s)",
+                        config.UPSTREAM_MAX_CONNECTIONS, config.UPSTREAM_HTTP2)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logger.info("Upstream HTTP client closed")
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Lazily create the client when used outside the app lifecycle (scripts, tests).
+        if self._client is None:
+            self._client = self._build_client()
+        return self._client
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        self.requests_total += 1
+        self.requests_in_flight += 1
+        try:
+            return await self.client.post(url, **kwargs)
+        except httpx.HTTPError:
+            self.errors_total += 1
+            raise
+        finally:
+            self.requests_in_flight -= 1
+
+    def stats(self) -> Dict[str, int]:
+        # httpx and httpcore expose no public pool API, so each private attribute
+        # is looked up defensively; a layout change only blanks these two figures.
+        connections = []
+        if self._client is not None:
+            transport = getattr(self._client, "_transport", None)
+            pool = getattr(transport, "_pool", None)
+            connections = list(getattr(pool, "connections", None) or [])
+
+        return {
+            "max_connections": config.UPSTREAM_MAX_CONNECTIONS,
+            "max_keepalive_connections": config.UPSTREAM_MAX_KEEPALIVE_CONNECTIONS,
+            "connections_open": len(connections),
+            "connections_idle": sum(1 for conn in connections if getattr(conn, "is_idle", lambda: False)()),
+            "requests_in_flight": self.requests_in_flight,
+            "requests_total": self.requests_total,
+            "errors_total": self.errors_total
+        }
+
+
+upstream_client = UpstreamClient()
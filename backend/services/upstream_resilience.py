@@ -0,0 +1,306 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Dict, Optional
+import httpx
+from config import config
+from services.metrics import registry
+from services.upstream_client import upstream_client
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth another attempt; any other 4xx is the request's own fault and is raised as is.
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+# Not worth retrying either, but they fail every call (a bad or revoked key), so they trip the breaker.
+AUTH_FAILURE_STATUS_CODES = frozenset({401, 403})
+# Latency samples kept for the hedge percentile, and how many are needed before it is trusted.
+LATENCY_WINDOW = 256
+MIN_LATENCY_SAMPLES = 20
+
+upstream_attempts_total = registry.counter(
+    "upstream_attempts_total", "Upstream HTTP attempts by outcome (HTTP status or error).", ("upstream", "outcome")
+)
+upstream_hedges_total = registry.counter(
+    "upstream_hedges_total", "Duplicate upstream requests sent because the first one was slow.", ("upstream",)
+)
+upstream_hedge_wins_total = registry.counter(
+    "upstream_hedge_wins_total", "Hedged upstream requests that answered before the original.", ("upstream",)
+)
+upstream_retries_total = registry.counter(
+    "upstream_retries_total", "Upstream retries by the failure that caused them.", ("upstream", "reason")
+)
+upstream_retries_denied_total = registry.counter(
+    "upstream_retries_denied_total", "Retries skipped because the retry budget was spent.", ("upstream",)
+)
+upstream_breaker_state = registry.gauge(
+    "upstream_breaker_state", "Circuit breaker state: 0 closed, 1 half-open, 2 open.", ("upstream",)
+)
+upstream_breaker_rejections_total = registry.counter(
+    "upstream_breaker_rejections_total", "Calls failed fast because the circuit breaker was open.", ("upstream",)
+)
+
+
+class UpstreamError(Exception):
+    """The upstream call failed; ``status_code`` is set when it answered with an error status."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class UpstreamUnavailableError(UpstreamError):
+    """The upstream was not called (circuit open) or ran out of its deadline."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    After ``failure_threshold`` failures in a row the circuit opens and calls
+    fail fast. Once ``reset_seconds`` have passed a single probe call is let
+    through (half-open): success closes the circuit, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._state = CircuitBreaker.CLOSED
+        self._probe_in_flight = False
+        upstream_breaker_state.set(0, name)
+
+    @property
+    def state(self) -> str:
+        if self._state == CircuitBreaker.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self._set_state(CircuitBreaker.HALF_OPEN)
+        return self._state
+
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets a probe through."""
+        return max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+
+    def _set_state(self, state: str) -> None:
+        if state != self._state:
+            logger.warning("Circuit breaker %s: %s -> %s", self.name, self._state, state)
+        self._state = state
+        upstream_breaker_state.set(CircuitBreaker.STATE_VALUES[state], self.name)
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == CircuitBreaker.CLOSED:
+            return True
+        if state == CircuitBreaker.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._probe_in_flight = False
+        self._set_state(CircuitBreaker.CLOSED)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probe_in_flight = False
+        if self._state == CircuitBreaker.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self.times_opened += 1
+            self._set_state(CircuitBreaker.OPEN)
+
+    def record_abandoned(self) -> None:
+        """The call was cancelled before it had an outcome; let another probe through."""
+        self._probe_in_flight = False
+
+
+class RetryBudget:
+    """Token bucket that keeps retries to a fraction of the call volume.
+
+    Every call deposits ``ratio`` tokens (capped at ``reserve``) and every
+    retry spends one, so a failing upstream sees at most ``1 + ratio`` times
+    the normal load instead of ``1 + max_retries`` times.
+    """
+
+    def __init__(self, ratio: float, reserve: float):
+        self.ratio = ratio
+        self.reserve = reserve
+        self.tokens = reserve
+
+    def deposit(self) -> None:
+        self.tokens = min(self.reserve, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class LatencyTracker:
+    """Sliding window of recent upstream latencies."""
+
+    def __init__(self, size: int = LATENCY_WINDOW):
+        self._samples = deque(maxlen=size)
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if len(self._samples) < MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+
+class ResilientUpstream:
+    """Deadline, hedging, retries and a circuit breaker around ``upstream_client.post``.
+
+    Each call gets ``UPSTREAM_DEADLINE_SECONDS`` in total. Within it an
+    attempt that has not answered after the observed latency percentile
+    (``UPSTREAM_HEDGE_PERCENTILE``) is hedged with one duplicate request, and
+    the first usable answer wins. Transport errors and retryable statuses are
+    retried with jittered backoff, bounded by ``UPSTREAM_MAX_RETRIES`` and the
+    retry budget. Calls that still fail count towards the circuit breaker.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.breaker = CircuitBreaker(
+            name, config.UPSTREAM_BREAKER_FAILURE_THRESHOLD, config.UPSTREAM_BREAKER_RESET_SECONDS
+        )
+        self.retry_budget = RetryBudget(config.UPSTREAM_RETRY_BUDGET_RATIO, config.UPSTREAM_RETRY_BUDGET_RESERVE)
+        self.latency = LatencyTracker()
+
+    def hedge_delay(self) -> Optional[float]:
+        if not config.UPSTREAM_HEDGE_ENABLED:
+            return None
+        observed = self.latency.percentile(config.UPSTREAM_HEDGE_PERCENTILE)
+        if observed is None:
+            return config.UPSTREAM_HEDGE_INITIAL_DELAY_MS / 1000
+        return max(observed, config.UPSTREAM_HEDGE_MIN_DELAY_MS / 1000)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        if not self.breaker.allow_request():
+            upstream_breaker_rejections_total.inc(self.name)
+            retry_after = self.breaker.retry_after()
+            raise UpstreamUnavailableError(
+                f"{self.name} is unavailable (circuit open, retry in {retry_after:.0f}s)", retry_after
+            )
+
+        self.retry_budget.deposit()
+        try:
+            async with asyncio.timeout(config.UPSTREAM_DEADLINE_SECONDS):
+                response = await self._call_with_retries(url, kwargs)
+        except TimeoutError:
+            self.breaker.record_failure()
+            raise UpstreamUnavailableError(
+                f"{self.name} did not answer within {config.UPSTREAM_DEADLINE_SECONDS:g}s"
+            )
+        except UpstreamError as e:
+            if (
+                e.status_code is None
+                or e.status_code in RETRYABLE_STATUS_CODES
+                or e.status_code in AUTH_FAILURE_STATUS_CODES
+            ):
+                self.breaker.record_failure()
+            else:
+                # A request the upstream rejects as invalid is neither a success nor a sign of ill health.
+                self.breaker.record_abandoned()
+            raise
+        except BaseException:
+            self.breaker.record_abandoned()
+            raise
+
+        self.breaker.record_success()
+        return response
+
+    async def _call_with_retries(self, url: str, kwargs: dict) -> httpx.Response:
+        error = None
+        for attempt in range(config.UPSTREAM_MAX_RETRIES + 1):
+            if attempt:
+                if not self.retry_budget.withdraw():
+                    upstream_retries_denied_total.inc(self.name)
+                    break
+                upstream_retries_total.inc(self.name, str(error.status_code or "error"))
+                backoff = config.UPSTREAM_RETRY_BACKOFF_MS / 1000 * 2 ** (attempt - 1)
+                await asyncio.sleep(random.uniform(0, backoff))
+
+            try:
+                response = await self._hedged(url, kwargs)
+            except httpx.TransportError as e:
+                error = UpstreamError(f"{self.name} request failed: {e!r}")
+                continue
+
+            if response.status_code < 400:
+                return response
+            error = UpstreamError(f"{self.name} returned HTTP {response.status_code}", response.status_code)
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                break
+        raise error
+
+    async def _attempt(self, url: str, kwargs: dict) -> httpx.Response:
+        started = time.perf_counter()
+        try:
+            response = await upstream_client.post(url, **kwargs)
+        except httpx.TransportError as e:
+            upstream_attempts_total.inc(self.name, type(e).__name__)
+            raise
+        upstream_attempts_total.inc(self.name, str(response.status_code))
+        if response.status_code < 400:
+            self.latency.observe(time.perf_counter() - started)
+        return response
+
+    async def _hedged(self, url: str, kwargs: dict) -> httpx.Response:
+        """One attempt, plus a duplicate if it is slower than the hedge delay; the first usable answer wins."""
+        delay = self.hedge_delay()
+        if delay is None:
+            return await self._attempt(url, kwargs)
+
+        original = asyncio.ensure_future(self._attempt(url, kwargs))
+        pending = {original}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                upstream_hedges_total.inc(self.name)
+                pending.add(asyncio.ensure_future(self._attempt(url, kwargs)))
+
+            fallback = None
+            while True:
+                for task in done:
+                    if task.exception() is None and task.result().status_code not in RETRYABLE_STATUS_CODES:
+                        if task is not original:
+                            upstream_hedge_wins_total.inc(self.name)
+                        return task.result()
+                    fallback = task
+                if not pending:
+                    # Every attempt failed; surface the last failure to the retry loop.
+                    return fallback.result()
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, float]:
+        hedge_delay = self.hedge_delay()
+        return {
+            "breaker_state": self.breaker.state,
+            "breaker_failures": self.breaker.failures,
+            "breaker_times_opened": self.breaker.times_opened,
+            "retry_budget_tokens": round(self.retry_budget.tokens, 2),
+            "hedge_delay_ms": round(hedge_delay * 1000, 1) if hedge_delay is not None else None
+        }
+
+
+google_routes_upstream = ResilientUpstream("google_routes")
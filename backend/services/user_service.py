@@ -1,14 +1,200 @@
-from sqlalchemy.orm import Session
-from models import Users, RouteHistory
-from typing import List, Optional
+import base64
+from datetime import datetime
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.engine import Row
+from config import config
+from models import Users, RouteHistory, UserRouteStats
+from schemas.auth_schemas import UserProfileResponse
+from schemas.route_schemas import UserRouteStatsResponse
+from services.route_cache import TTLCache
+from typing import List, Optional, Tuple
+
+# Bonus types with their own counter in user_route_stats
+BONUS_COUNT_COLUMNS = {
+    "None": "bonus_none_count",
+    "Type A": "bonus_type_a_count",
+    "Type B": "bonus_type_b_count",
+}
+
+# Columns returned by the history list view; polyline_data is only fetched on request.
+ROUTE_HISTORY_LIST_COLUMNS = (
+    RouteHistory.id,
+    RouteHistory.start_lat,
+    RouteHistory.start_lng,
+    RouteHistory.end_lat,
+    RouteHistory.end_lng,
+    RouteHistory.distance,
+    RouteHistory.duration,
+    RouteHistory.optimization_criteria,
+    RouteHistory.bonus_type,
+    RouteHistory.bonus_value,
+    RouteHistory.max_round_trips,
+    RouteHistory.num_nodes,
+    RouteHistory.total_distance_km,
+    RouteHistory.created_at,
+)
+
+# Profiles by user id. Users are never edited or deleted, so entries only expire to bound staleness.
+user_profile_cache = TTLCache(max_entries=config.USER_CACHE_MAX_ENTRIES, ttl_seconds=config.USER_CACHE_TTL_SECONDS)
 
 
 class UserService:
     @staticmethod
-    def get_user_by_id(db: Session, user_id: int) -> Optional[Users]:
-        return db.query(Users).filter(Users.id == user_id).first()
-    
+    async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[Users]:
+        result = await db.execute(select(Users).where(Users.id == user_id))
+        return result.scalars().first()
+
+    @staticmethod
+    def profile_of(user: Users) -> UserProfileResponse:
+        return UserProfileResponse(id=user.id, email=user.email, name=user.name, created_at=user.created_at)
+
+    @staticmethod
+    def cache_profile(user: Users) -> UserProfileResponse:
+        profile = UserService.profile_of(user)
+        user_profile_cache.set(user.id, profile)
+        return profile
+
+    @staticmethod
+    async def get_user_profile(db: AsyncSession, user_id: int) -> Optional[UserProfileResponse]:
+        """A user's profile, from the profile cache when possible; unknown users are not cached."""
+        profile = user_profile_cache.get(user_id)
+        if profile is None:
+            user = await UserService.get_user_by_id(db, user_id)
+            if user is not None:
+                profile = UserService.cache_profile(user)
+        return profile
+
+    @staticmethod
+    def encode_history_cursor(created_at: datetime, route_id: int) -> str:
+        raw = f"{created_at.isoformat()}|{route_id}".encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
     @staticmethod
-    def get_user_route_history(db: Session, user_id: int) -> List[RouteHistory]:
-        return db.query(RouteHistory).filter(RouteHistory.user_id == user_id).order_by(RouteHistory.created_at.desc()).all()
+    def decode_history_cursor(cursor: str) -> Tuple[datetime, int]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+            created_at, route_id = raw.split("|")
+            return datetime.fromisoformat(created_at), int(route_id)
+        except ValueError:
+            raise ValueError("Invalid history cursor")
     
+    @staticmethod
+    def history_payload(rows: List[Row]) -> List[dict]:
+        """History rows as RouteHistoryResponse-shaped dicts, ready for the JSON encoder.
+
+        The rows come straight from our own query, so they are not validated
+        through the response model again.
+        """
+        if not rows:
+            return []
+        keys = rows[0]._fields
+        if "polyline_data" in keys:
+            return [dict(zip(keys, row)) for row in rows]
+        return [dict(zip(keys, row), polyline_data=None) for row in rows]
+
+    @staticmethod
+    async def get_user_route_history(
+        db: AsyncSession,
+        user_id: int,
+        limit: Optional[int],
+        cursor: Optional[str] = None,
+        include_polyline: bool = False
+    ) -> Tuple[List[Row], Optional[str]]:
+        """One page of a user's routes, newest first, plus the cursor for the next page.
+
+        ``limit=None`` returns all of them and no cursor.
+        """
+        columns = ROUTE_HISTORY_LIST_COLUMNS + ((RouteHistory.polyline_data,) if include_polyline else ())
+        query = select(*columns).where(RouteHistory.user_id == user_id)
+
+        if cursor:
+            created_at, route_id = UserService.decode_history_cursor(cursor)
+            query = query.where(or_(
+                RouteHistory.created_at < created_at,
+                and_(RouteHistory.created_at == created_at, RouteHistory.id < route_id)
+            ))
+
+        query = query.order_by(RouteHistory.created_at.desc(), RouteHistory.id.desc())
+        if limit is not None:
+            query = query.limit(limit + 1)
+        rows = (await db.execute(query)).all()
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = UserService.encode_history_cursor(rows[-1].created_at, rows[-1].id)
+
+        return rows, next_cursor
+
+    @staticmethod
+    async def add_route_stats(db: AsyncSession, user_id: int, route_records: List[RouteHistory]) -> None:
+        """Fold newly saved routes into the user's running totals.
+
+        Runs as one INSERT ... ON CONFLICT DO UPDATE in the caller's
+        transaction, so the totals commit (or roll back) together with the
+        RouteHistory rows. The update only adds deltas, which keeps
+        concurrent writers from different workers consistent.
+        """
+        if not route_records:
+            return
+
+        now = datetime.utcnow()
+        # Stamp the pending rows so last_route_at matches their created_at exactly.
+        for record in route_records:
+            if record.created_at is None:
+                record.created_at = now
+        values = {
+            "user_id": user_id,
+            "route_count": len(route_records),
+            "total_distance_km": sum(record.total_distance_km or 0.0 for record in route_records),
+            "total_round_trips": sum(record.max_round_trips or 0 for record in route_records),
+            "max_round_trips": max(record.max_round_trips or 0 for record in route_records),
+            "total_nodes": sum(record.num_nodes or 0 for record in route_records),
+            "total_bonus_value": sum(record.bonus_value or 0 for record in route_records),
+            "first_route_at": now,
+            "last_route_at": now,
+        }
+        for column in BONUS_COUNT_COLUMNS.values():
+            values[column] = 0
+        for record in route_records:
+            column = BONUS_COUNT_COLUMNS.get(record.bonus_type)
+            if column:
+                values[column] += 1
+
+        statement = sqlite_insert(UserRouteStats).values(**values)
+        additive = [
+            "route_count", "total_distance_km", "total_round_trips", "total_nodes", "total_bonus_value",
+            *BONUS_COUNT_COLUMNS.values()
+        ]
+        updates = {column: getattr(UserRouteStats, column) + getattr(statement.excluded, column) for column in additive}
+        updates["max_round_trips"] = func.max(UserRouteStats.max_round_trips, statement.excluded.max_round_trips)
+        updates["first_route_at"] = func.coalesce(UserRouteStats.first_route_at, statement.excluded.first_route_at)
+        updates["last_route_at"] = statement.excluded.last_route_at
+
+        await db.execute(statement.on_conflict_do_update(index_elements=["user_id"], set_=updates))
+
+    @staticmethod
+    async def get_route_stats(db: AsyncSession, user_id: int) -> UserRouteStatsResponse:
+        result = await db.execute(select(UserRouteStats).where(UserRouteStats.user_id == user_id))
+        stats = result.scalars().first()
+        if stats is None:
+            return UserRouteStatsResponse(user_id=user_id)
+
+        count = stats.route_count or 0
+        return UserRouteStatsResponse(
+            user_id=user_id,
+            route_count=count,
+            total_distance_km=round(stats.total_distance_km, 2),
+            average_distance_km=round(stats.total_distance_km / count, 2) if count else 0.0,
+            average_round_trips=round(stats.total_round_trips / count, 2) if count else 0.0,
+            max_round_trips=stats.max_round_trips,
+            average_nodes=round(stats.total_nodes / count, 1) if count else 0.0,
+            total_bonus_value=stats.total_bonus_value,
+            bonus_distribution={
+                bonus_type: getattr(stats, column) for bonus_type, column in BONUS_COUNT_COLUMNS.items()
+            },
+            first_route_at=stats.first_route_at,
+            last_route_at=stats.last_route_at
+        )
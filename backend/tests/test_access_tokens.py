@@ -0,0 +1,88 @@
+import base64
+import os
+import threading
+import orjson
+import pytest
+from services import access_tokens
+from services.access_tokens import AccessTokens
+
+
+@pytest.fixture(autouse=True)
+def signing_secret(monkeypatch):
+    monkeypatch.setattr(access_tokens.config, "AUTH_TOKEN_SECRET", "test-secret")
+    monkeypatch.setattr(AccessTokens, "_secret", None)
+
+
+def encode(claims: dict) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps(claims)).rstrip(b"=").decode("ascii")
+
+
+def test_issued_token_verifies_to_its_user():
+    assert AccessTokens.verify(AccessTokens.issue(42)) == 42
+
+
+def test_tampered_payload_is_rejected():
+    header, _, signature = AccessTokens.issue(42).split(".")
+    forged = ".".join([header, encode({"sub": "1", "iat": 0, "exp": 2 ** 40}), signature])
+    with pytest.raises(ValueError, match="Invalid"):
+        AccessTokens.verify(forged)
+
+
+def test_tampered_signature_is_rejected():
+    header, payload, signature = AccessTokens.issue(42).split(".")
+    flipped = ("A" if signature[0] != "A" else "B") + signature[1:]
+    with pytest.raises(ValueError, match="Invalid"):
+        AccessTokens.verify(".".join([header, payload, flipped]))
+
+
+def test_token_signed_with_another_secret_is_rejected(monkeypatch):
+    token = AccessTokens.issue(42)
+    monkeypatch.setattr(access_tokens.config, "AUTH_TOKEN_SECRET", "other-secret")
+    monkeypatch.setattr(AccessTokens, "_secret", None)
+    with pytest.raises(ValueError, match="Invalid"):
+        AccessTokens.verify(token)
+
+
+def test_expired_token_is_rejected():
+    token = AccessTokens.issue(42, ttl_seconds=-(access_tokens.EXPIRY_LEEWAY_SECONDS + 5))
+    with pytest.raises(ValueError, match="expired"):
+        AccessTokens.verify(token)
+
+
+def test_expiry_tolerates_clock_skew():
+    token = AccessTokens.issue(42, ttl_seconds=-(access_tokens.EXPIRY_LEEWAY_SECONDS - 5))
+    assert AccessTokens.verify(token) == 42
+
+
+@pytest.mark.parametrize("token", ["", "not-a-token", "a.b", "a.b.c.d", "café.b.c"])
+def test_malformed_tokens_are_rejected(token):
+    with pytest.raises(ValueError):
+        AccessTokens.verify(token)
+
+
+def test_validly_signed_token_without_claims_is_rejected():
+    header = AccessTokens.issue(42).split(".")[0]
+    payload = encode({"iat": 0})
+    signing_input = f"{header}.{payload}".encode("ascii")
+    token = f"{header}.{payload}.{AccessTokens.sign(signing_input).decode('ascii')}"
+    with pytest.raises(ValueError, match="Malformed"):
+        AccessTokens.verify(token)
+
+
+def test_generated_secret_is_shared_and_private(tmp_path):
+    path = tmp_path / "data" / "token_secret"
+    secrets = []
+    threads = [
+        threading.Thread(target=lambda: secrets.append(AccessTokens.load_or_create_secret(path)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(secrets)) == 1
+    assert len(secrets[0]) == 64
+    assert os.listdir(path.parent) == ["token_secret"]
+    assert path.stat().st_mode & 0o777 == 0o600
+    assert AccessTokens.load_or_create_secret(path) == secrets[0]
@@ -0,0 +1,158 @@
+import asyncio
+import pytest
+from services.admission import AdmissionController, AdmissionRejected
+
+
+def controller(**overrides) -> AdmissionController:
+    settings = dict(max_concurrency=2, max_queue=4, max_queue_per_user=2, queue_timeout=1.0)
+    settings.update(overrides)
+    return AdmissionController("test", **settings)
+
+
+async def settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_admits_up_to_max_concurrency_without_queueing():
+    async def scenario():
+        admission = controller()
+        await admission.acquire("a")
+        await admission.acquire("b")
+        assert admission.active == 2
+        assert admission.queued == 0
+        admission.release()
+        admission.release()
+        assert admission.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_rejects_when_queue_is_full():
+    async def scenario():
+        admission = controller(max_concurrency=1, max_queue=1, max_queue_per_user=1)
+        await admission.acquire("a")
+        waiter = asyncio.create_task(admission.acquire("b"))
+        await settle()
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await admission.acquire("c")
+        assert rejected.value.reason == "queue_full"
+        assert rejected.value.retry_after >= 1
+
+        admission.release()
+        await waiter
+        assert admission.stats()["rejected"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_rejects_when_user_queue_is_full():
+    async def scenario():
+        admission = controller(max_concurrency=1, max_queue_per_user=1)
+        await admission.acquire("a")
+        waiter = asyncio.create_task(admission.acquire("b"))
+        await settle()
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await admission.acquire("b")
+        assert rejected.value.reason == "user_queue_full"
+
+        admission.release()
+        await waiter
+
+    asyncio.run(scenario())
+
+
+def test_queue_timeout_rejects_and_frees_the_queue():
+    async def scenario():
+        admission = controller(max_concurrency=1, queue_timeout=0.01)
+        await admission.acquire("a")
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await admission.acquire("b")
+        assert rejected.value.reason == "queue_timeout"
+        assert admission.queued == 0
+
+        # The timed-out waiter must not be handed the slot.
+        admission.release()
+        assert admission.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_waiters_are_released_in_fair_order():
+    async def scenario():
+        admission = controller(max_concurrency=1, max_queue_per_user=4)
+        await admission.acquire("holder")
+        order = []
+
+        async def request(user):
+            await admission.acquire(user)
+            order.append(user)
+
+        tasks = [asyncio.create_task(request(user)) for user in ("a", "a", "a", "b")]
+        await settle()
+        for _ in tasks:
+            admission.release()
+            await settle()
+        await asyncio.gather(*tasks)
+
+        # b queued last but is served before a's second request.
+        assert order == ["a", "b", "a", "a"]
+
+    asyncio.run(scenario())
+
+
+def test_user_weights_favour_heavier_users():
+    async def scenario():
+        admission = controller(max_concurrency=1, max_queue_per_user=4, weights={"b": 4.0})
+        await admission.acquire("holder")
+        order = []
+
+        async def request(user):
+            await admission.acquire(user)
+            order.append(user)
+
+        tasks = [asyncio.create_task(request(user)) for user in ("a", "a", "b", "b")]
+        await settle()
+        for _ in tasks:
+            admission.release()
+            await settle()
+        await asyncio.gather(*tasks)
+
+        assert order == ["b", "b", "a", "a"]
+
+    asyncio.run(scenario())
+
+
+def test_slot_block_releases_its_slot_and_records_service_time():
+    async def scenario():
+        admission = controller(max_concurrency=1)
+        with pytest.raises(RuntimeError):
+            async with admission.slot("a"):
+                assert admission.active == 1
+                await asyncio.sleep(0.02)
+                raise RuntimeError("route failed")
+        assert admission.active == 0
+        assert admission.stats()["service_ms"] < 100
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_no_slot_behind():
+    async def scenario():
+        admission = controller(max_concurrency=1)
+        await admission.acquire("a")
+        waiter = asyncio.create_task(admission.acquire("b"))
+        await settle()
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert admission.queued == 0
+
+        admission.release()
+        assert admission.active == 0
+
+    asyncio.run(scenario())
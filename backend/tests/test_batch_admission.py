@@ -0,0 +1,65 @@
+import asyncio
+import time
+from schemas.route_schemas import RouteRequest
+from services import map_service
+from services.admission import AdmissionController
+from services.map_service import MapService
+from services.route_analysis import RouteAnalysis
+
+SERVICE_SECONDS = 0.02
+
+
+class Session:
+    async def commit(self):
+        pass
+
+
+def route_request(i: int) -> RouteRequest:
+    return RouteRequest(
+        start_lat=12.9 + i / 1000, start_lng=77.59, end_lat=13.08, end_lng=77.6,
+        optimization_criteria="fastest", mode="driving"
+    )
+
+
+async def calculated_alternatives(request: RouteRequest):
+    await asyncio.sleep(SERVICE_SECONDS)
+    return [RouteAnalysis(0, "", "20 km", "30 mins", 4, "Type A", 5, 20_000, 20.0, True, 2)]
+
+
+def test_large_batch_shares_the_worker_with_single_requests(monkeypatch):
+    admission = AdmissionController("test", max_concurrency=4, max_queue=64, max_queue_per_user=16, queue_timeout=2.0)
+    monkeypatch.setattr(map_service, "route_admission", admission)
+    monkeypatch.setattr(map_service.config, "ADMISSION_ENABLED", True)
+    monkeypatch.setattr(map_service.config, "BATCH_UPSTREAM_CONCURRENCY", 8)
+    monkeypatch.setattr(MapService, "get_route_alternatives", calculated_alternatives)
+
+    async def add_route_records(db, user_id, saved):
+        pass
+
+    monkeypatch.setattr(MapService, "add_route_records", add_route_records)
+
+    async def single_request(request: RouteRequest) -> float:
+        started = time.monotonic()
+        async with admission.slot(2):
+            await calculated_alternatives(request)
+        return time.monotonic() - started
+
+    async def scenario():
+        batch = asyncio.create_task(
+            MapService.calculate_optimal_routes(Session(), 1, [route_request(i) for i in range(32)])
+        )
+        await asyncio.sleep(SERVICE_SECONDS / 4)
+        singles = [asyncio.create_task(single_request(route_request(100 + i))) for i in range(4)]
+
+        single_latencies = await asyncio.gather(*singles)
+        batch_running = not batch.done()
+        return await batch, single_latencies, batch_running
+
+    response, single_latencies, batch_running = asyncio.run(scenario())
+
+    assert response.succeeded == 32
+    assert admission.rejected == 0
+    # Single requests are interleaved with the batch's routes rather than queued behind all of them.
+    assert batch_running
+    assert max(single_latencies) < 8 * SERVICE_SECONDS
+    assert admission.active == 0
@@ -0,0 +1,100 @@
+import random
+from schemas.route_schemas import VehicleProfile
+from services.map_service import MapService
+from services.route_analysis import RouteAnalysis
+
+
+def alternative(route_index: int, total_distance_meters: int, bonus_value: int) -> RouteAnalysis:
+    return RouteAnalysis(
+        route_index=route_index,
+        polyline="",
+        distance=f"{total_distance_meters / 1000:.1f} km",
+        duration="",
+        num_nodes=3,
+        bonus_type="Type A" if bonus_value else "None",
+        bonus_value=bonus_value,
+        total_distance_meters=total_distance_meters,
+        total_distance_km=total_distance_meters / 1000.0,
+        is_feasible=False,
+        max_round_trips=0
+    )
+
+
+def reference_feasibility(total_distance_meters: int, bonus_value: int, initial_charge, charge_per_km):
+    total_charge = initial_charge + bonus_value
+    charge_needed_per_trip = total_distance_meters / 1000.0 * charge_per_km
+    if charge_needed_per_trip == 0:
+        return True, 0
+    if total_charge < charge_needed_per_trip:
+        return False, 0
+    return True, int(total_charge / (charge_needed_per_trip * 2))
+
+
+def reference_vehicle(route_analyses, vehicle: VehicleProfile):
+    """One vehicle at a time: re-evaluate every alternative, then pick as the route endpoint does."""
+    evaluated = []
+    for analysis in route_analyses:
+        is_feasible, round_trips = reference_feasibility(
+            analysis.total_distance_meters, analysis.bonus_value, vehicle.initial_charge, vehicle.charge_per_km
+        )
+        evaluated.append(alternative(analysis.route_index, analysis.total_distance_meters, analysis.bonus_value))
+        evaluated[-1].is_feasible = is_feasible
+        evaluated[-1].max_round_trips = round_trips
+    best, _ = MapService.select_best_route(evaluated)
+    return evaluated, best
+
+
+def test_sweep_matches_evaluating_each_vehicle_separately():
+    rng = random.Random(25)
+    route_analyses = [
+        alternative(i, rng.choice([0, rng.randrange(1_000, 150_000)]), rng.choice([0, 5, 10])) for i in range(4)
+    ]
+    vehicles = [
+        VehicleProfile(
+            id=f"v{i}",
+            initial_charge=rng.choice([0, rng.uniform(0, 400)]),
+            charge_per_km=rng.choice([0, rng.uniform(0.1, 3)])
+        )
+        for i in range(1000)
+    ]
+
+    response = MapService.sweep_vehicle_feasibility(route_analyses, vehicles, route_id=7)
+
+    assert response.status == "success"
+    assert response.route_id == 7
+    assert [route.route_index for route in response.routes] == [0, 1, 2, 3]
+    feasible_vehicles = 0
+    for vehicle, result in zip(vehicles, response.vehicles):
+        evaluated, best = reference_vehicle(route_analyses, vehicle)
+        assert result.vehicle_id == vehicle.id
+        assert result.is_feasible == [analysis.is_feasible for analysis in evaluated]
+        assert result.max_round_trips == [analysis.max_round_trips for analysis in evaluated]
+        assert result.best_route_index == (best.route_index if best else None)
+        assert result.best_round_trips == (best.max_round_trips if best else 0)
+        feasible_vehicles += best is not None
+    assert response.feasible_vehicles == feasible_vehicles
+
+
+def test_ties_go_to_the_earliest_alternative():
+    route_analyses = [alternative(0, 50_000, 0), alternative(1, 50_000, 0)]
+    response = MapService.sweep_vehicle_feasibility(
+        route_analyses, [VehicleProfile(initial_charge=100, charge_per_km=1)]
+    )
+    assert response.vehicles[0].best_route_index == 0
+    assert response.vehicles[0].best_round_trips == 1
+
+
+def test_vehicle_without_a_feasible_route():
+    response = MapService.sweep_vehicle_feasibility(
+        [alternative(0, 80_000, 0)], [VehicleProfile(initial_charge=10, charge_per_km=1)]
+    )
+    assert response.vehicles[0].is_feasible == [False]
+    assert response.vehicles[0].best_route_index is None
+    assert response.vehicles[0].best_round_trips == 0
+    assert response.feasible_vehicles == 0
+
+
+def test_sweep_without_alternatives_is_an_error():
+    response = MapService.sweep_vehicle_feasibility([], [VehicleProfile(initial_charge=100, charge_per_km=1)])
+    assert response.status == "error"
+    assert response.vehicles == []
@@ -0,0 +1,18 @@
+import numpy as np
+import pytest
+from services.geo import EARTH_RADIUS_METERS, haversine_meters
+
+
+def test_one_degree_of_latitude():
+    assert haversine_meters(0.0, 0.0, 1.0, 0.0) == pytest.approx(EARTH_RADIUS_METERS * np.pi / 180)
+
+
+def test_same_point_is_zero():
+    assert haversine_meters(12.9716, 77.5946, 12.9716, 77.5946) == 0.0
+
+
+def test_arrays_broadcast_against_a_point():
+    distances = haversine_meters(12.9716, 77.5946, np.array([12.9716, 13.0827]), np.array([77.5946, 77.6093]))
+    assert distances.shape == (2,)
+    assert distances[0] == 0.0
+    assert distances[1] == pytest.approx(12_450, rel=0.01)
@@ -0,0 +1,53 @@
+import asyncio
+import pytest
+from schemas.auth_schemas import UserLoginRequest
+from services import auth_service
+from services.auth_service import AuthService, LoginStats
+from services.password_hasher import PasswordPoolSaturated
+
+
+class User:
+    password_hash = "hash"
+
+
+@pytest.fixture
+def stats(monkeypatch):
+    fresh = LoginStats()
+    monkeypatch.setattr(auth_service, "login_stats", fresh)
+
+    async def get_user_by_email(db, email):
+        return User() if email == "known@example.com" else None
+
+    monkeypatch.setattr(AuthService, "get_user_by_email", get_user_by_email)
+    return fresh
+
+
+def login(email: str, password: str = "secret123"):
+    return asyncio.run(AuthService.authenticate_user(None, UserLoginRequest(email=email, password=password)))
+
+
+def test_success_and_bad_credentials_are_counted(monkeypatch, stats):
+    async def verify_password(password, hashed_password):
+        return password == "secret123"
+
+    monkeypatch.setattr(AuthService, "verify_password", verify_password)
+    assert login("known@example.com") is not None
+    assert login("known@example.com", "wrong-password") is None
+    assert login("unknown@example.com") is None
+
+    assert stats.stats()["count"] == 3
+    assert stats.stats()["failed"] == 2
+    assert stats.stats()["saturated"] == 0
+
+
+def test_saturated_pool_is_not_a_failed_login(monkeypatch, stats):
+    async def verify_password(password, hashed_password):
+        raise PasswordPoolSaturated("busy")
+
+    monkeypatch.setattr(AuthService, "verify_password", verify_password)
+    with pytest.raises(PasswordPoolSaturated):
+        login("known@example.com")
+
+    assert stats.stats()["saturated"] == 1
+    assert stats.stats()["failed"] == 0
+    assert stats.stats()["avg_ms"] == 0.0
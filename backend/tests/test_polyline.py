@@ -0,0 +1,65 @@
+import random
+import pytest
+from services import polyline
+
+# The worked example from Google's encoded polyline documentation.
+GOOGLE_EXAMPLE = "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+GOOGLE_POINTS = [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+
+
+def test_encode_matches_the_reference_example():
+    assert polyline.encode(GOOGLE_POINTS) == GOOGLE_EXAMPLE
+
+
+def test_decode_matches_the_reference_example():
+    assert polyline.decode(GOOGLE_EXAMPLE) == pytest.approx(GOOGLE_POINTS)
+
+
+def test_random_paths_round_trip_at_five_decimals():
+    rng = random.Random(9)
+    for _ in range(200):
+        points = [
+            (round(rng.uniform(-89, 89), 5), round(rng.uniform(-179, 179), 5))
+            for _ in range(rng.randrange(0, 40))
+        ]
+        assert polyline.decode(polyline.encode(points)) == pytest.approx(points, abs=1e-9)
+
+
+def test_empty_polyline():
+    assert polyline.encode([]) == ""
+    assert polyline.decode("") == []
+
+
+def test_simplify_drops_collinear_points_and_keeps_endpoints():
+    line = [(12.9, 77.5 + i / 1000) for i in range(50)]
+    assert polyline.simplify(line, 1.0) == [line[0], line[-1]]
+
+
+def test_simplify_keeps_points_beyond_the_tolerance():
+    # A ~111 m detour in the middle of a ~1 km straight line.
+    path = [(12.9, 77.5), (12.9, 77.504), (12.901, 77.505), (12.9, 77.506), (12.9, 77.51)]
+    assert (12.901, 77.505) in polyline.simplify(path, 50.0)
+    assert polyline.simplify(path, 500.0) == [path[0], path[-1]]
+
+
+def test_simplify_without_tolerance_returns_every_point():
+    path = [(12.9, 77.5), (12.9, 77.504), (12.9, 77.51)]
+    assert polyline.simplify(path, 0) == path
+
+
+def test_simplify_encoded_leaves_unsimplifiable_input_alone():
+    assert polyline.simplify_encoded(GOOGLE_EXAMPLE, None) == GOOGLE_EXAMPLE
+    assert polyline.simplify_encoded(GOOGLE_EXAMPLE, 1.0) == GOOGLE_EXAMPLE
+    assert polyline.simplify_encoded("", 10.0) == ""
+
+
+def test_simplify_encoded_returns_a_shorter_valid_polyline():
+    line = [(12.9, 77.5 + i / 1000) for i in range(50)]
+    simplified = polyline.simplify_encoded(polyline.encode(line), 1.0)
+    assert polyline.decode(simplified) == pytest.approx([line[0], line[-1]])
+
+
+def test_zoom_tolerance_halves_with_each_zoom_level():
+    assert polyline.zoom_to_tolerance(0) == pytest.approx(polyline.METERS_PER_PIXEL_ZOOM_0)
+    assert polyline.zoom_to_tolerance(11) == pytest.approx(polyline.zoom_to_tolerance(10) / 2)
+    assert polyline.zoom_to_tolerance(10, latitude=60) == pytest.approx(polyline.zoom_to_tolerance(10) / 2)
@@ -0,0 +1,66 @@
+import asyncio
+import time
+import pytest
+from services import profiler
+from services.access_tokens import AccessTokens
+from services.profiler import ProfilingMiddleware, RequestProfile, StackSampler
+
+
+def test_removed_profile_stops_collecting_samples(tmp_path):
+    loop = asyncio.new_event_loop()
+    try:
+        sampler = StackSampler(0.001)
+        profile = RequestProfile("GET", "/maps/calculate-route", loop, None)
+        sampler.add(profile)
+        time.sleep(0.05)
+        sampler.remove(profile)
+
+        samples, stacks = profile.samples, dict(profile.stacks)
+        time.sleep(0.05)
+        assert samples > 0
+        assert profile.samples == samples
+        assert dict(profile.stacks) == stacks
+
+        profile.save(tmp_path)
+        assert (tmp_path / f"{profile.id}.folded").read_text().strip()
+    finally:
+        loop.close()
+
+
+@pytest.fixture
+def profiling_config(monkeypatch):
+    monkeypatch.setattr(profiler.config, "AUTH_TOKEN_SECRET", "test-secret")
+    monkeypatch.setattr(AccessTokens, "_secret", None)
+    monkeypatch.setattr(profiler.config, "PROFILING_USER_IDS", {7})
+    monkeypatch.setattr(profiler.config, "PROFILING_SAMPLE_RATE", 0.0)
+    return ProfilingMiddleware(app=None)
+
+
+def scope(*headers, path="/maps/calculate-route"):
+    return {"type": "http", "path": path, "headers": [(name, value) for name, value in headers]}
+
+
+def bearer(user_id: int):
+    return b"authorization", f"Bearer {AccessTokens.issue(user_id)}".encode("ascii")
+
+
+def test_trigger_header_is_honoured_for_profiling_users(profiling_config):
+    assert profiling_config.should_profile(scope((b"x-profile", b"1"), bearer(7)))
+    assert not profiling_config.should_profile(scope((b"x-profile", b"0"), bearer(7)))
+
+
+@pytest.mark.parametrize("authorization", [
+    None,
+    (b"authorization", b"Bearer forged.token.value"),
+    (b"authorization", b"Basic dXNlcjpwYXNz"),
+])
+def test_trigger_header_is_ignored_for_anyone_else(profiling_config, authorization):
+    headers = [(b"x-profile", b"1")] + ([authorization] if authorization else [])
+    assert not profiling_config.should_profile(scope(*headers))
+    assert not profiling_config.should_profile(scope((b"x-profile", b"1"), bearer(8)))
+
+
+def test_other_callers_still_fall_under_the_sample_rate(profiling_config, monkeypatch):
+    monkeypatch.setattr(profiler.config, "PROFILING_SAMPLE_RATE", 1.0)
+    assert profiling_config.should_profile(scope((b"x-profile", b"0"), bearer(8)))
+    assert not profiling_config.should_profile(scope(bearer(7), path="/profiles"))
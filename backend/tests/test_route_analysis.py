@@ -0,0 +1,129 @@
+import random
+import numpy as np
+import pytest
+from services.route_analysis import analyze_routes, evaluate_feasibility
+
+INITIAL_CHARGE = 100
+CHARGE_PER_KM = 1
+
+
+# Scalar reference for the batched analysis: the per-route graph walk it replaced.
+def reference_unique_nodes(route: dict) -> int:
+    graph = {}
+    for leg in route.get("legs", []):
+        for step in leg.get("steps", []):
+            start = step.get("startLocation", {}).get("latLng", {})
+            end = step.get("endLocation", {}).get("latLng", {})
+            if not start.get("latitude") or not start.get("longitude") or \
+               not end.get("latitude") or not end.get("longitude"):
+                continue
+            start_node = (start["latitude"], start["longitude"])
+            end_node = (end["latitude"], end["longitude"])
+            graph.setdefault(start_node, {})[end_node] = step.get("distanceMeters", 0)
+
+    nodes = set(graph)
+    for destinations in graph.values():
+        nodes.update(destinations)
+    return len(nodes)
+
+
+def reference_total_distance(route: dict) -> int:
+    return sum(step.get("distanceMeters", 0) for leg in route.get("legs", []) for step in leg.get("steps", []))
+
+
+def reference_feasibility(total_distance_meters: int, bonus_value: int, initial_charge, charge_per_km):
+    total_charge = initial_charge + bonus_value
+    charge_needed_per_trip = total_distance_meters / 1000.0 * charge_per_km
+    if total_charge < charge_needed_per_trip:
+        return False, 0
+    return True, int(total_charge / (charge_needed_per_trip * 2))
+
+
+def bonus(num_nodes: int):
+    return ("Type B", 10) if num_nodes >= 3 else ("None", 0)
+
+
+def lat_lng(rng: random.Random) -> dict:
+    # A coarse grid so alternatives revisit nodes; some steps lack coordinates.
+    if rng.random() < 0.1:
+        return {}
+    return {"latLng": {"latitude": 12.9 + rng.randrange(6) / 100, "longitude": 77.5 + rng.randrange(6) / 100}}
+
+
+def random_route(rng: random.Random) -> dict:
+    legs = []
+    for _ in range(rng.randrange(0, 3)):
+        steps = [
+            {
+                "startLocation": lat_lng(rng),
+                "endLocation": lat_lng(rng),
+                "distanceMeters": rng.choice([0, rng.randrange(1, 120_000)])
+            }
+            for _ in range(rng.randrange(0, 8))
+        ]
+        legs.append({"steps": steps})
+    return {"legs": legs, "polyline": {"encodedPolyline": "abc"}}
+
+
+def test_batched_analysis_matches_the_per_route_reference():
+    rng = random.Random(8)
+    for _ in range(300):
+        routes = [random_route(rng) for _ in range(rng.randrange(1, 5))]
+        analyses = analyze_routes(routes, bonus, INITIAL_CHARGE, CHARGE_PER_KM)
+
+        assert [analysis.route_index for analysis in analyses] == list(range(len(routes)))
+        for route, analysis in zip(routes, analyses):
+            num_nodes = reference_unique_nodes(route)
+            total_distance = reference_total_distance(route)
+            assert analysis.num_nodes == num_nodes
+            assert (analysis.bonus_type, analysis.bonus_value) == bonus(num_nodes)
+            assert analysis.total_distance_meters == total_distance
+            assert analysis.total_distance_km == total_distance / 1000.0
+            if total_distance:
+                expected = reference_feasibility(total_distance, analysis.bonus_value, INITIAL_CHARGE, CHARGE_PER_KM)
+                assert (analysis.is_feasible, analysis.max_round_trips) == expected
+
+
+def test_analysis_reads_leg_texts_and_polyline():
+    route = {
+        "legs": [{
+            "steps": [],
+            "localizedValues": {"distance": {"text": "12 km"}, "duration": {"text": "20 mins"}}
+        }],
+        "polyline": {"encodedPolyline": "_p~iF~ps|U"}
+    }
+    analysis = analyze_routes([route, {}], bonus, INITIAL_CHARGE, CHARGE_PER_KM)
+    assert (analysis[0].distance, analysis[0].duration, analysis[0].polyline) == ("12 km", "20 mins", "_p~iF~ps|U")
+    assert (analysis[1].distance, analysis[1].duration, analysis[1].polyline) == ("0.00 km", "", "")
+
+
+def test_analyze_routes_without_routes():
+    assert analyze_routes([], bonus, INITIAL_CHARGE, CHARGE_PER_KM) == []
+
+
+def test_feasibility_matches_the_scalar_formula():
+    rng = np.random.default_rng(8)
+    distances = rng.integers(1, 250_000, size=500)
+    bonuses = rng.choice([0, 5, 10], size=500)
+    is_feasible, round_trips = evaluate_feasibility(distances, bonuses, INITIAL_CHARGE, CHARGE_PER_KM)
+
+    for i in range(500):
+        expected = reference_feasibility(int(distances[i]), int(bonuses[i]), INITIAL_CHARGE, CHARGE_PER_KM)
+        assert (bool(is_feasible[i]), int(round_trips[i])) == expected
+
+
+@pytest.mark.parametrize("distance, charge_per_km", [(0, 1), (42_000, 0)])
+def test_trip_needing_no_charge_is_feasible_without_round_trips(distance, charge_per_km):
+    is_feasible, round_trips = evaluate_feasibility(np.array([distance]), np.array([0]), INITIAL_CHARGE, charge_per_km)
+    assert is_feasible.tolist() == [True]
+    assert round_trips.tolist() == [0]
+
+
+def test_feasibility_broadcasts_profiles_against_routes():
+    distances = np.array([10_000, 60_000, 200_000])
+    initial_charge = np.array([[50], [100], [400]])
+    is_feasible, round_trips = evaluate_feasibility(distances, np.zeros(3), initial_charge, 1)
+
+    assert is_feasible.shape == (3, 3)
+    assert is_feasible.tolist() == [[True, False, False], [True, True, False], [True, True, True]]
+    assert round_trips.tolist() == [[2, 0, 0], [5, 0, 0], [20, 3, 1]]
@@ -0,0 +1,80 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from models import RouteHistory
+from models.base import Base
+from services.user_service import UserService
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 17, 8, 30, 12, 345678)
+    cursor = UserService.encode_history_cursor(created_at, 981)
+    assert "=" not in cursor
+    assert UserService.decode_history_cursor(cursor) == (created_at, 981)
+
+
+@pytest.mark.parametrize("cursor", ["", "!!!", "bm90LWEtY3Vyc29y", "MjAyNC0wNS0xN3x4"])
+def test_invalid_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError, match="Invalid history cursor"):
+        UserService.decode_history_cursor(cursor)
+
+
+async def history_session(route_count: int):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all, tables=[RouteHistory.__table__])
+
+    db = AsyncSession(engine)
+    # Two routes share each timestamp so paging has to break ties on id.
+    started = datetime(2024, 1, 1)
+    db.add_all([
+        RouteHistory(
+            user_id=1, start_lat=12.9, start_lng=77.5, end_lat=13.0, end_lng=77.6,
+            polyline_data=f"poly{i}", created_at=started + timedelta(minutes=i // 2)
+        )
+        for i in range(route_count)
+    ])
+    await db.commit()
+    return engine, db
+
+
+def test_pages_cover_every_route_once_newest_first():
+    async def scenario():
+        engine, db = await history_session(7)
+        try:
+            seen, cursor = [], None
+            while True:
+                rows, cursor = await UserService.get_user_route_history(db, 1, 3, cursor=cursor)
+                seen.extend(rows)
+                if cursor is None:
+                    break
+        finally:
+            await db.close()
+            await engine.dispose()
+
+        assert len(seen) == 7
+        assert len({row.id for row in seen}) == 7
+        keys = [(row.created_at, row.id) for row in seen]
+        assert keys == sorted(keys, reverse=True)
+        assert "polyline_data" not in seen[0]._fields
+
+    asyncio.run(scenario())
+
+
+def test_unpaginated_history_returns_everything_with_polylines():
+    async def scenario():
+        engine, db = await history_session(5)
+        try:
+            rows, cursor = await UserService.get_user_route_history(db, 1, None, include_polyline=True)
+        finally:
+            await db.close()
+            await engine.dispose()
+
+        assert cursor is None
+        assert len(rows) == 5
+        assert [route["polyline_data"] for route in UserService.history_payload(rows)] == [
+            "poly4", "poly3", "poly2", "poly1", "poly0"
+        ]
+
+    asyncio.run(scenario())
@@ -0,0 +1,132 @@
+import asyncio
+import httpx
+import pytest
+from services import upstream_resilience
+from services.upstream_resilience import CircuitBreaker, ResilientUpstream, RetryBudget, UpstreamError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(upstream_resilience.time, "monotonic", fake)
+    return fake
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_seconds=10)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.retry_after() == pytest.approx(10)
+
+
+def test_breaker_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_seconds=10)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_breaker_lets_one_probe_through(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_seconds=10)
+    breaker.record_failure()
+    clock.now += 10
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+
+def test_failed_probe_reopens_the_breaker(clock):
+    breaker = CircuitBreaker("test", failure_threshold=5, reset_seconds=10)
+    for _ in range(5):
+        breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.times_opened == 2
+
+
+def test_abandoned_probe_allows_another(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_seconds=10)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow_request()
+
+    breaker.record_abandoned()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+
+
+def test_retry_budget_spends_its_reserve_then_refills_by_ratio():
+    budget = RetryBudget(ratio=0.5, reserve=2)
+    assert budget.withdraw()
+    assert budget.withdraw()
+    assert not budget.withdraw()
+
+    budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert budget.withdraw()
+
+
+def test_retry_budget_is_capped_at_its_reserve():
+    budget = RetryBudget(ratio=1.0, reserve=2)
+    for _ in range(10):
+        budget.deposit()
+    assert budget.tokens == 2
+
+
+def upstream_answering(monkeypatch, status_code: int) -> ResilientUpstream:
+    async def post(url, **kwargs):
+        return httpx.Response(status_code)
+
+    monkeypatch.setattr(upstream_resilience.upstream_client, "post", post)
+    monkeypatch.setattr(upstream_resilience.config, "UPSTREAM_HEDGE_ENABLED", False)
+    monkeypatch.setattr(upstream_resilience.config, "UPSTREAM_MAX_RETRIES", 0)
+    monkeypatch.setattr(upstream_resilience.config, "UPSTREAM_BREAKER_FAILURE_THRESHOLD", 2)
+    return ResilientUpstream("test")
+
+
+def call_repeatedly(upstream: ResilientUpstream, times: int) -> None:
+    async def scenario():
+        for _ in range(times):
+            with pytest.raises(UpstreamError):
+                await upstream.post("http://upstream.test/route")
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("status_code", [401, 403, 503])
+def test_auth_and_server_errors_open_the_breaker(monkeypatch, status_code):
+    upstream = upstream_answering(monkeypatch, status_code)
+    call_repeatedly(upstream, 2)
+    assert upstream.breaker.state == CircuitBreaker.OPEN
+
+
+def test_invalid_request_does_not_count_as_success(monkeypatch):
+    upstream = upstream_answering(monkeypatch, 400)
+    upstream.breaker.record_failure()
+    call_repeatedly(upstream, 3)
+    assert upstream.breaker.state == CircuitBreaker.CLOSED
+    assert upstream.breaker.failures == 1
@@ -0,0 +1,91 @@
+import asyncio
+import importlib.util
+import random
+from pathlib import Path
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from models import RouteHistory, UserRouteStats
+from models.base import Base
+from services.user_service import BONUS_COUNT_COLUMNS, UserService
+
+SCRIPT = Path(__file__).resolve().parent.parent / "scripts" / "rebuild_user_stats.py"
+
+
+@pytest.fixture
+def rebuild_user_stats(tmp_path, monkeypatch):
+    """The rebuild script, pointed at a scratch database."""
+    spec = importlib.util.spec_from_file_location("rebuild_user_stats", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'stats.db'}")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(module, "SessionLocal", sessionmaker(bind=engine))
+    yield module
+    engine.dispose()
+
+
+def random_route(rng: random.Random, user_id: int) -> RouteHistory:
+    return RouteHistory(
+        user_id=user_id, start_lat=12.9, start_lng=77.5, end_lat=13.0, end_lng=77.6,
+        bonus_type=rng.choice([*BONUS_COUNT_COLUMNS, None]),
+        bonus_value=rng.choice([0, 5, 10, None]),
+        max_round_trips=rng.choice([0, rng.randrange(1, 40), None]),
+        num_nodes=rng.choice([rng.randrange(0, 300), None]),
+        total_distance_km=rng.choice([round(rng.uniform(0.5, 200), 3), None])
+    )
+
+
+async def save_in_batches(path: Path) -> None:
+    """Save routes the way the request path does: each batch upserts its own deltas."""
+    rng = random.Random(20)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    try:
+        for _ in range(25):
+            user_id = rng.choice([1, 2, 3])
+            records = [random_route(rng, user_id) for _ in range(rng.randrange(1, 6))]
+            async with AsyncSession(engine) as db:
+                db.add_all(records)
+                await UserService.add_route_stats(db, user_id, records)
+                await db.commit()
+    finally:
+        await engine.dispose()
+
+
+def read_stats(module) -> dict:
+    with module.SessionLocal() as db:
+        rows = db.execute(select(UserRouteStats)).scalars().all()
+        return {
+            row.user_id: {column.name: getattr(row, column.name) for column in UserRouteStats.__table__.columns}
+            for row in rows
+        }
+
+
+def test_incremental_totals_match_a_full_rebuild(rebuild_user_stats, tmp_path):
+    asyncio.run(save_in_batches(tmp_path / "stats.db"))
+    incremental = read_stats(rebuild_user_stats)
+
+    assert rebuild_user_stats.rebuild() == 3
+    rebuilt = read_stats(rebuild_user_stats)
+
+    assert incremental.keys() == rebuilt.keys() == {1, 2, 3}
+    assert sum(totals["route_count"] for totals in rebuilt.values()) > 25
+    for user_id, totals in rebuilt.items():
+        for column, value in totals.items():
+            if isinstance(value, float):
+                assert incremental[user_id][column] == pytest.approx(value), (user_id, column)
+            else:
+                assert incremental[user_id][column] == value, (user_id, column)
+
+
+def test_rebuild_of_one_user_leaves_the_others(rebuild_user_stats, tmp_path):
+    asyncio.run(save_in_batches(tmp_path / "stats.db"))
+    before = read_stats(rebuild_user_stats)
+
+    assert rebuild_user_stats.rebuild(user_id=2) == 1
+    after = read_stats(rebuild_user_stats)
+    assert after[1] == before[1]
+    assert after[3] == before[3]
+    assert after[2]["route_count"] == before[2]["route_count"]
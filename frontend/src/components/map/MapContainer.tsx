@@ -63,6 +63,37 @@ interface RouteResponse {
   other_routes?: AlternativeRoute[];
 }
 
+type RouteStreamEvent =
+  | ({ event: 'route' } & RouteResponse)
+  | { event: 'alternative'; route: AlternativeRoute }
+  | { event: 'saved'; route_id: number }
+  | { event: 'done' }
+  | { event: 'error'; message: string };
+
+// Reads an NDJSON response body, calling onEvent for each line as it arrives.
+async function readRouteStream(response: Response, onEvent: (event: RouteStreamEvent) => void) {
+  const reader = response.body!.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { value, done } = await reader.read();
+    buffer += decoder.decode(value, { stream: !done });
+
+    let newline = buffer.indexOf('\n');
+    while (newline >= 0) {
+      const line = buffer.slice(0, newline).trim();
+      buffer = buffer.slice(newline + 1);
+      if (line) {
+        onEvent(JSON.parse(line));
+      }
+      newline = buffer.indexOf('\n');
+    }
+
+    if (done) break;
+  }
+}
+
 interface MapContainerProps {
   onControlPanelData: (data: {
     pointA: RoutePoint | null;
@@ -81,7 +112,7 @@ interface MapContainerProps {
 }
 
 export default function MapContainer({ onControlPanelData }: MapContainerProps) {
-  const { user } = useAuth();
+  const { authHeaders } = useAuth();
   const [map, setMap] = useState<google.maps.Map | null>(null);
   const [center, setCenter] = useState<RoutePoint>(defaultCenter);
   const [pointA, setPointA] = useState<RoutePoint | null>(null);
@@ -158,13 +189,10 @@ export default function MapContainer({ onControlPanelData }: MapContainerProps)
       
       const headers: Record<string, string> = {
         'Content-Type': 'application/json',
+        ...authHeaders(),
       };
       
-      if (user?.id) {
-        headers['x-user-id'] = user.id.toString();
-      }
-      
-      const response = await fetch(`${backendUrl}/maps/calculate-route`, {
+      const response = await fetch(`${backendUrl}/maps/calculate-route/stream`, {
         method: 'POST',
         headers,
         body: JSON.stringify({
@@ -182,39 +210,8 @@ export default function MapContainer({ onControlPanelData }: MapContainerProps)
         throw new Error(errorData.detail || `HTTP error! status: ${response.status}`);
       }
 
-      const data: RouteResponse = await response.json();
-
-      if (data.status === 'success' && data.polyline) {
-        const decodedPath = polyline
-          .decode(data.polyline)
-          .map((p: [number, number]) => ({ lat: p[0], lng: p[1] }));
-        
-        setRoutePolyline(decodedPath);
-        setDefaultRoutePolyline(decodedPath);
-        setSelectedRouteIndex(null);
-        setRouteInfo({
-          distance: data.distance || null,
-          duration: data.duration || null,
-          optimization: data.optimization_used || optimizationCriteria,
-          bonus_type: data.bonus_type,
-          bonus_value: data.bonus_value,
-          max_round_trips: data.max_round_trips,
-          message: data.message,
-        });
-
-        setAlternativeRoutes(data.other_routes || []);
-
-        if (map && decodedPath.length > 0) {
-          const bounds = new window.google.maps.LatLngBounds();
-          decodedPath.forEach((point: RoutePoint) => bounds.extend(point));
-          bounds.extend(start);
-          bounds.extend(end);
-          map.fitBounds(bounds);
-        }
-
-        toast.success('Route calculated successfully!');
-      } else {
-        toast.error(data.message || 'Failed to get route data.');
+      let routeShown = false;
+      const clearRoute = () => {
         setRoutePolyline(null);
         setDefaultRoutePolyline(null);
         setAlternativeRoutes([]);
@@ -224,6 +221,50 @@ export default function MapContainer({ onControlPanelData }: MapContainerProps)
           duration: null, 
           optimization: optimizationCriteria 
         });
+      };
+
+      // The best route arrives first and is drawn immediately; alternatives
+      // and the saved route id follow on the same stream.
+      await readRouteStream(response, (event) => {
+        if (event.event === 'route' && event.polyline) {
+          const decodedPath = polyline
+            .decode(event.polyline)
+            .map((p: [number, number]) => ({ lat: p[0], lng: p[1] }));
+          
+          setRoutePolyline(decodedPath);
+          setDefaultRoutePolyline(decodedPath);
+          setSelectedRouteIndex(null);
+          setAlternativeRoutes([]);
+          setRouteInfo({
+            distance: event.distance || null,
+            duration: event.duration || null,
+            optimization: event.optimization_used || optimizationCriteria,
+            bonus_type: event.bonus_type,
+            bonus_value: event.bonus_value,
+            max_round_trips: event.max_round_trips,
+            message: event.message,
+          });
+
+          if (map && decodedPath.length > 0) {
+            const bounds = new window.google.maps.LatLngBounds();
+            decodedPath.forEach((point: RoutePoint) => bounds.extend(point));
+            bounds.extend(start);
+            bounds.extend(end);
+            map.fitBounds(bounds);
+          }
+
+          routeShown = true;
+          setLoading(false);
+          toast.success('Route calculated successfully!');
+        } else if (event.event === 'alternative') {
+          setAlternativeRoutes((routes) => [...routes, event.route]);
+        } else if (event.event === 'error') {
+          toast.error(event.message || 'Failed to get route data.');
+        }
+      });
+
+      if (!routeShown) {
+        clearRoute();
       }
     } catch (err) {
       console.error('Error calculating route:', err);
@@ -241,7 +282,7 @@ export default function MapContainer({ onControlPanelData }: MapContainerProps)
     } finally {
       setLoading(false);
     }
-  }, [optimizationCriteria, map, user]);
+  }, [optimizationCriteria, map, authHeaders]);
 
   const handleMapClick = useCallback(
     (event: google.maps.MapMouseEvent) => {
@@ -1,6 +1,6 @@
 'use client';
 
-import { createContext, useContext, useState, ReactNode } from 'react';
+import { createContext, useCallback, useContext, useState, ReactNode } from 'react';
 
 interface User {
   id: number;
@@ -11,7 +11,9 @@ interface User {
 
 interface AuthContextType {
   user: User | null;
+  accessToken: string | null;
   isAuthenticated: boolean;
+  authHeaders: () => Record<string, string>;
   login: (email: string, password: string) => Promise<{ success: boolean; message: string }>;
   signup: (email: string, password: string, name: string) => Promise<{ success: boolean; message: string }>;
   logout: () => void;
@@ -34,6 +36,7 @@ interface AuthProviderProps {
 
 export const AuthProvider = ({ children }: AuthProviderProps) => {
   const [user, setUser] = useState<User | null>(null);
+  const [accessToken, setAccessToken] = useState<string | null>(null);
   const [loading, setLoading] = useState(false);
 
   const login = async (email: string, password: string): Promise<{ success: boolean; message: string }> => {
@@ -53,6 +56,7 @@ export const AuthProvider = ({ children }: AuthProviderProps) => {
       if (response.ok && data.status === 'success') {
         const userData = data.user;
         setUser(userData);
+        setAccessToken(data.access_token ?? null);
         return { success: true, message: data.message };
       } else {
         return { success: false, message: data.message || 'Login failed' };
@@ -82,6 +86,7 @@ export const AuthProvider = ({ children }: AuthProviderProps) => {
       if (response.ok && data.status === 'success') {
         const userData = data.user;
         setUser(userData);
+        setAccessToken(data.access_token ?? null);
         return { success: true, message: data.message };
       } else {
         return { success: false, message: data.message || 'Signup failed' };
@@ -96,11 +101,18 @@ export const AuthProvider = ({ children }: AuthProviderProps) => {
 
   const logout = () => {
     setUser(null);
+    setAccessToken(null);
   };
 
+  const authHeaders = useCallback((): Record<string, string> => {
+    return accessToken ? { Authorization: `Bearer ${accessToken}` } : {};
+  }, [accessToken]);
+
   const value = {
     user,
+    accessToken,
     isAuthenticated: !!user,
+    authHeaders,
     login,
     signup,
     logout,